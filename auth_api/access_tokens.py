@@ -0,0 +1,209 @@
+"""
+Stateless HMAC-signed access and refresh tokens (JWT, HS256).
+
+Access tokens are verified with an HMAC and an in-memory revocation denylist,
+so authenticating a request needs no database query. Refresh tokens are bound
+to the password hash of the user and are rotated on every refresh.
+"""
+import base64
+import hashlib
+import heapq
+import hmac
+import json
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from auth_api.models import RevokedToken
+
+ACCESS = 'access'
+REFRESH = 'refresh'
+_HEADER = base64.urlsafe_b64encode(json.dumps({'alg': 'HS256', 'typ': 'JWT'}, separators=(',', ':')).encode()).rstrip(b'=')
+
+
+class TokenError(Exception):
+    """
+    Raised for malformed, expired, revoked or otherwise invalid tokens.
+    """
+
+
+def get_token_setting(name, default):
+    """
+    Read a value from the optional AUTH_API_TOKENS settings dict.
+    """
+    return getattr(settings, 'AUTH_API_TOKENS', {}).get(name, default)
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=')
+
+
+def _b64decode(data):
+    return base64.urlsafe_b64decode(data + b'=' * (-len(data) % 4))
+
+
+def _signing_key():
+    return (get_token_setting('SIGNING_KEY', None) or settings.SECRET_KEY).encode()
+
+
+def _sign(signing_input):
+    return _b64encode(hmac.new(_signing_key(), signing_input, hashlib.sha256).digest())
+
+
+def password_fingerprint(user):
+    """
+    Short HMAC of the password hash; refresh tokens die when the password changes.
+    """
+    return salted_hmac('auth_api.access_tokens', user.password, algorithm='sha256').hexdigest()[:16]
+
+
+def encode_token(claims):
+    payload = _b64encode(json.dumps(claims, separators=(',', ':')).encode())
+    signing_input = _HEADER + b'.' + payload
+    return (signing_input + b'.' + _sign(signing_input)).decode()
+
+
+def decode_token(token, token_type):
+    """
+    Verify a token's signature, type, expiry and revocation and return its claims.
+    """
+    try:
+        raw = token.encode()
+        header, payload, signature = raw.split(b'.')
+    except (AttributeError, ValueError):
+        raise TokenError('Malformed token.')
+    if not constant_time_compare(_sign(header + b'.' + payload), signature) or header != _HEADER:
+        raise TokenError('Invalid token signature.')
+    try:
+        claims = json.loads(_b64decode(payload))
+    except ValueError:
+        raise TokenError('Malformed token.')
+    if claims.get('typ') != token_type:
+        raise TokenError('Wrong token type.')
+    if claims.get('exp', 0) <= time.time():
+        raise TokenError('Token has expired.')
+    if denylist.contains(claims.get('jti')):
+        raise TokenError('Token has been revoked.')
+    return claims
+
+
+def issue_token_pair(user):
+    """
+    Return a new access/refresh token pair for the user.
+    """
+    now = int(time.time())
+    access_ttl = get_token_setting('ACCESS_TTL', 300)
+    refresh_ttl = get_token_setting('REFRESH_TTL', 7 * 24 * 3600)
+    access = encode_token({
+        'typ': ACCESS,
+        'sub': str(user.pk),
+        'iat': now,
+        'exp': now + access_ttl,
+        'jti': uuid.uuid4().hex,
+    })
+    refresh = encode_token({
+        'typ': REFRESH,
+        'sub': str(user.pk),
+        'iat': now,
+        'exp': now + refresh_ttl,
+        'jti': uuid.uuid4().hex,
+        'pwd': password_fingerprint(user),
+    })
+    return {'access': access, 'refresh': refresh, 'token_type': 'Bearer', 'expires_in': access_ttl}
+
+
+def revoke(claims):
+    """
+    Revoke a decoded token until it expires.
+
+    Returns False when the token was already revoked, by this or another
+    worker: of several concurrent calls for one token exactly one returns True.
+    """
+    _, created = RevokedToken.objects.get_or_create(
+        jti=claims['jti'], defaults={'expires_at': RevokedToken.expiry_from_timestamp(claims['exp'])},
+    )
+    denylist.add(claims['jti'], claims['exp'])
+    return created
+
+
+def prune_revoked(batch_size=1000, now=None):
+    """
+    Delete the revocations of tokens that have expired anyway, in batches.
+
+    Yields the number of rows deleted per batch.
+    """
+    cutoff = RevokedToken.expiry_from_timestamp(now or time.time())
+    while True:
+        ids = list(RevokedToken.objects.filter(expires_at__lte=cutoff).order_by('expires_at')
+                   .values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return
+        deleted, _ = RevokedToken.objects.filter(id__in=ids).delete()
+        yield deleted
+
+
+class Denylist:
+    """
+    In-memory set of revoked token ids with an expiry heap for pruning.
+
+    Built from RevokedToken on first use and then synced incrementally every
+    DENYLIST_REFRESH_SECONDS, so revocations made by other workers show up
+    within that interval at the cost of one indexed query per interval.
+
+    Each sync reads the rows created since the previous sync started, minus
+    DENYLIST_SYNC_OVERLAP_SECONDS. Ids and created_at values are assigned
+    before commit, so a row may become visible after rows that were created
+    later; the overlap (which also absorbs clock skew between workers) keeps
+    such rows from being skipped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._jtis = set()
+        self._expiries = []
+        self._synced_at = None
+
+    def add(self, jti, exp):
+        with self._lock:
+            if jti not in self._jtis:
+                self._jtis.add(jti)
+                heapq.heappush(self._expiries, (exp, jti))
+
+    def _prune(self, now):
+        while self._expiries and self._expiries[0][0] <= now:
+            _, jti = heapq.heappop(self._expiries)
+            self._jtis.discard(jti)
+
+    def sync(self, force=False):
+        now = time.time()
+        interval = get_token_setting('DENYLIST_REFRESH_SECONDS', 5)
+        if not force and self._synced_at is not None and now - self._synced_at < interval:
+            return
+        rows = RevokedToken.objects.filter(expires_at__gt=RevokedToken.expiry_from_timestamp(now))
+        if self._synced_at is not None:
+            overlap = get_token_setting('DENYLIST_SYNC_OVERLAP_SECONDS', 60)
+            rows = rows.filter(created_at__gte=RevokedToken.expiry_from_timestamp(self._synced_at - overlap))
+        with self._lock:
+            for jti, expires_at in rows.values_list('jti', 'expires_at'):
+                if jti not in self._jtis:
+                    self._jtis.add(jti)
+                    heapq.heappush(self._expiries, (expires_at.timestamp(), jti))
+            self._prune(now)
+            self._synced_at = now
+
+    def contains(self, jti):
+        self.sync()
+        return jti in self._jtis
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+
+denylist = Denylist()
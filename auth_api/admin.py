@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Profile
+from .models import User, Profile, OutboundEmail
+from .user_listing import EstimatedCountPaginator, export_response, staff_queryset
 
 class UserProfileInline(admin.StackedInline):
     model = Profile
@@ -13,12 +14,17 @@ class UserModelAdmin(BaseUserAdmin):
     # The fields to be used in displaying the User model.
     # These override the definitions on the base UserModelAdmin
     # that reference specific fields on auth.User.
-    list_display = ["id", "email", "get_full_name", "is_admin"]
+    list_display = ["id", "email", "mobile", "is_active", "is_admin", "created_at"]
     list_filter = ["is_admin"]
+    # One JOIN for the profile column instead of a query per row
+    list_select_related = ["profile"]
+    # Never COUNT(*) the whole table: estimated page count, no "show all" total
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ["export_csv", "export_jsonl"]
     fieldsets = [
         ("User Credentials", {"fields": ["email", "password"]}),
-        ("Personal info", {"fields": ["get_full_name"]}),
-        ("Permissions", {"fields": ["is_admin"]}),
+        ("Permissions", {"fields": ["is_active", "is_admin"]}),
     ]
     # add_fieldsets is not a standard ModelAdmin attribute. UserModelAdmin
     # overrides get_fieldsets to use this attribute when creating a user.
@@ -35,8 +41,39 @@ class UserModelAdmin(BaseUserAdmin):
     ordering = ["email", "id"]
     filter_horizontal = []
 
+    @admin.display(description="Mobile")
+    def mobile(self, obj):
+        try:
+            return obj.profile.mobile
+        except Profile.DoesNotExist:
+            return ""
+
+    def export(self, queryset, fmt):
+        # Stream the selected users (all of them with "select all") from a server-side cursor
+        return export_response(staff_queryset().filter(pk__in=queryset.values("pk")), fmt)
+
+    @admin.action(description="Export selected users as CSV")
+    def export_csv(self, request, queryset):
+        return self.export(queryset, "csv")
+
+    @admin.action(description="Export selected users as JSON Lines")
+    def export_jsonl(self, request, queryset):
+        return self.export(queryset, "jsonl")
+
 # Register the User model with the custom admin class
 admin.site.register(User, UserModelAdmin)
 
 # Register the Profile model
 admin.site.register(Profile)
+
+
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ["id", "kind", "recipient", "status", "attempts", "available_at", "sent_at"]
+    list_filter = ["status", "kind"]
+    search_fields = ["recipient"]
+    ordering = ["-id"]
+    # Queued links carry live activation/reset tokens
+    exclude = ["url"]
+
+# Register the outbound email queue
+admin.site.register(OutboundEmail, OutboundEmailAdmin)
@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.urls import path
+
+from .views import (
+    GetCSRFToken,
+    CheckAuthenticatedView,
+    RegistrationView,
+    ActivateView,
+    ActivationConfirm,
+    LoginView,
+    UserDetailView,
+    ChangePasswordView,
+    DeleteAccountView,
+    LogoutView,
+    ResetPasswordEmailView,
+    ResetPasswordView,
+    ResetPasswordConfirmView,
+    ProfileView,
+    BulkUserImportView,
+    StaffUserListView,
+    StaffUserExportView,
+    TokenObtainView,
+    TokenRefreshView,
+    TokenRevokeView,
+    MetricsView,
+)
+
+# With AUTH_API_ASYNC_VIEWS the hot endpoints are served by their async versions
+# on the regular URLs; they are always reachable under /api/async/ as well.
+if getattr(settings, 'AUTH_API_ASYNC_VIEWS', False):
+    from .async_views import (
+        CheckAuthenticatedView,
+        LoginView,
+        UserDetailView,
+        LogoutView,
+        ProfileView,
+    )
+
+# The API endpoints alone, without the schema and Swagger UI routes of
+# auth_api.urls; used by the slim API URLconf (user_auth.urls_api).
+urlpatterns = [
+    path('auth-api/get-csrf-token/', GetCSRFToken.as_view(), name='get_csrf_token'),
+    path('auth-api/check-authenticated/', CheckAuthenticatedView.as_view(), name='check_authenticated'),
+    path('auth-api/register/', RegistrationView.as_view(), name='register'),
+    path('auth-api/activate/<str:uid>/<str:token>/', ActivateView.as_view(), name='activate'),
+    path('auth-api/activate/confirm/', ActivationConfirm.as_view(), name='activation_confirm'),
+    path('auth-api/login/', LoginView.as_view(), name='login'),
+    path('auth-api/user-detail/', UserDetailView.as_view(), name='user_detail'),
+    path('auth-api/change-password/', ChangePasswordView.as_view(), name='change_password'),
+    path('auth-api/delete-account/', DeleteAccountView.as_view(), name='delete_account'),
+    path('auth-api/logout/', LogoutView.as_view(), name='logout'),
+    path('auth-api/reset-password-email/', ResetPasswordEmailView.as_view(), name='reset_password_email'),
+    path('auth-api/reset-password/<str:uid>/<str:token>/', ResetPasswordView.as_view(), name='reset_password'),
+    path('auth-api/reset-password/confirm/', ResetPasswordConfirmView.as_view(), name='reset_password_confirm'),
+    path('auth-api/profile/', ProfileView.as_view(), name='profile'),
+    path('auth-api/users/', StaffUserListView.as_view(), name='staff_users'),
+    path('auth-api/users/import/', BulkUserImportView.as_view(), name='bulk_user_import'),
+    path('auth-api/users/export/', StaffUserExportView.as_view(), name='staff_users_export'),
+    path('auth-api/token/', TokenObtainView.as_view(), name='token_obtain'),
+    path('auth-api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('auth-api/token/revoke/', TokenRevokeView.as_view(), name='token_revoke'),
+    path('auth-api/metrics/', MetricsView.as_view(), name='metrics'),
+]
@@ -1,13 +1,17 @@
 
 from django.apps import AppConfig
-from django.db import models  # Add this line
 
 class AuthApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'auth_api'
 
     def ready(self):
-        # Import the signal handler here to avoid circular import
-        from .signals import User_Profile_group_Creation
-        # Connect the signal
-        models.signals.post_save.connect(User_Profile_group_Creation, sender=self.get_model('User'))
+        # Importing the module registers its receivers (each exactly once, via
+        # @receiver); connecting them again here would run the handler twice.
+        from . import signals  # noqa: F401
+        # Register the login/logout receivers that invalidate cached auth status
+        from . import auth_status  # noqa: F401
+        # Register the connection_created receiver applying the SQLite pragmas
+        from . import sqlite  # noqa: F401
+        # Register the system check requiring a shared user cache
+        from . import checks  # noqa: F401
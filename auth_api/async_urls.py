@@ -0,0 +1,19 @@
+from django.urls import path
+
+from .async_views import (
+    CheckAuthenticatedView,
+    LoginView,
+    UserDetailView,
+    LogoutView,
+    ProfileView,
+)
+
+# Async (ASGI-native) versions of the hot endpoints, mounted under /api/async/ so
+# that they can be load tested side by side with the sync views.
+urlpatterns = [
+    path('auth-api/check-authenticated/', CheckAuthenticatedView.as_view(), name='async_check_authenticated'),
+    path('auth-api/login/', LoginView.as_view(), name='async_login'),
+    path('auth-api/user-detail/', UserDetailView.as_view(), name='async_user_detail'),
+    path('auth-api/logout/', LogoutView.as_view(), name='async_logout'),
+    path('auth-api/profile/', ProfileView.as_view(), name='async_profile'),
+]
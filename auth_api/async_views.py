@@ -0,0 +1,201 @@
+from math import ceil
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, login, logout
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponseNotModified, JsonResponse
+from django.utils.crypto import constant_time_compare
+from django.views import View
+
+from auth_api import auth_status, etags, renderers, responses, views
+from auth_api.hashing import ahash_password, averify_user_password
+from auth_api.models import User, Profile
+from auth_api.throttling import check_limits, client_ip
+from auth_api.serializers import UserSerializer, ProfileSerializer
+from auth_api.user_cache import aget_cached_user
+
+async def aget_user(request):
+    """
+    Resolve the session user through the user cache and the async ORM instead
+    of AuthenticationMiddleware.
+
+    Only the session load runs in a thread; the result is stored on
+    `request.user` so that later sync code (e.g. logout) reuses it.
+    """
+    def read_session():
+        session = request.session
+        return session.get(SESSION_KEY), session.get(BACKEND_SESSION_KEY), session.get(HASH_SESSION_KEY)
+
+    user_id, backend_path, session_hash = await sync_to_async(read_session)()
+    user = None
+    if user_id is not None and backend_path in settings.AUTHENTICATION_BACKENDS:
+        user = await aget_cached_user(user_id)
+        if user is not None and not user.is_active:
+            user = None
+        if user is not None and not (session_hash and constant_time_compare(session_hash, user.get_session_auth_hash())):
+            await sync_to_async(request.session.flush)()
+            user = None
+
+    request.user = user or AnonymousUser()
+    return request.user
+
+
+def parse_body(request):
+    """
+    Decode a JSON or form encoded request body into a dict.
+    """
+    if request.content_type == 'application/json':
+        try:
+            data = renderers.loads(request.body or b'{}')
+        except (renderers.DecodeError, UnicodeDecodeError):
+            return None
+        return data if isinstance(data, dict) else None
+    return request.POST
+
+
+def error_response(e):
+    return JsonResponse({'error': f'An error occurred: {str(e)}'}, status=500)
+
+
+def not_modified(etag):
+    response = HttpResponseNotModified()
+    response['ETag'] = etag
+    return response
+
+
+class AsyncAPIView(View):
+    """
+    Base for the async endpoints.
+
+    Methods without an async implementation are delegated to the synchronous
+    DRF view in a thread, so an async route can replace the sync one entirely.
+    CSRF is enforced by CsrfViewMiddleware since these views are not exempt.
+    """
+
+    sync_view_class = None
+    sync_methods = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for method in cls.sync_methods:
+            setattr(cls, method, cls._delegate)
+
+    async def _delegate(self, request, *args, **kwargs):
+        view = self.sync_view_class.as_view()
+        return await sync_to_async(view)(request, *args, **kwargs)
+
+
+class CheckAuthenticatedView(AsyncAPIView):
+
+    async def get(self, request):
+        """
+        Check if the user is authenticated.
+        """
+        try:
+            user = await aget_user(request)
+            auth_status.remember(request, user.is_authenticated)
+            return responses.json_response(responses.AUTHENTICATED if user.is_authenticated else responses.NOT_AUTHENTICATED)
+        except Exception as e:
+            return error_response(e)
+
+
+class LoginView(AsyncAPIView):
+
+    async def post(self, request):
+        """
+        Handle user login.
+        """
+        try:
+            data = parse_body(request)
+            if data is None:
+                return responses.json_response(responses.JSON_PARSE_ERROR, status=400)
+            email = data.get('email')
+            password = data.get('password')
+
+            # Reject throttled attempts before any password hashing happens
+            wait = check_limits('login', client_ip(request), email)
+            if wait:
+                response = JsonResponse(
+                    {'detail': f'Request was throttled. Expected available in {ceil(wait)} seconds.'},
+                    status=429,
+                )
+                response['Retry-After'] = str(ceil(wait))
+                return response
+
+            user = None
+            if email is not None and password is not None:
+                user = await User.objects.aget_by_email(email)
+                if user is None:
+                    # Same timing mitigation as EmailBackend for unknown emails
+                    await ahash_password(password)
+                elif not (await averify_user_password(user, password) and user.is_active):
+                    user = None
+
+            if user is None:
+                return responses.json_response(responses.INVALID_CREDENTIALS, status=400)
+
+            await sync_to_async(login)(request, user, backend=settings.AUTHENTICATION_BACKENDS[0])
+            return responses.json_response(responses.LOGGED_IN)
+        except Exception as e:
+            return error_response(e)
+
+
+class LogoutView(AsyncAPIView):
+
+    async def post(self, request):
+        """
+        Handle user logout.
+        """
+        try:
+            user = await aget_user(request)
+            if not user.is_authenticated:
+                return responses.json_response(responses.CREDENTIALS_NOT_PROVIDED, status=403)
+            await sync_to_async(logout)(request)
+            return responses.json_response(responses.LOGGED_OUT)
+        except Exception as e:
+            return error_response(e)
+
+
+class UserDetailView(AsyncAPIView):
+    sync_view_class = views.UserDetailView
+    sync_methods = ('patch',)
+
+    async def get(self, request):
+        """
+        Get user details.
+        """
+        try:
+            user = await aget_user(request)
+            if not user.is_authenticated:
+                return responses.json_response(responses.CREDENTIALS_NOT_PROVIDED, status=403)
+            etag = etags.user_etag(user)
+            if etags.if_none_match(request, etag):
+                return not_modified(etag)
+            data = UserSerializer(user).data
+            data['is_staff'] = user.is_staff
+            return responses.json_response(renderers.dumps(data), headers={'ETag': etag})
+        except Exception as e:
+            return error_response(e)
+
+
+class ProfileView(AsyncAPIView):
+    sync_view_class = views.ProfileView
+    sync_methods = ('post', 'put', 'delete')
+
+    async def get(self, request):
+        """
+        Retrieve the profile of the authenticated user.
+        """
+        user = await aget_user(request)
+        if not user.is_authenticated:
+            return responses.json_response(responses.CREDENTIALS_NOT_PROVIDED, status=403)
+        try:
+            # The profile is joined into the cached user
+            profile = user.profile
+        except Profile.DoesNotExist:
+            return responses.json_response(responses.PROFILE_DOES_NOT_EXIST, status=404)
+        etag = etags.profile_etag(profile)
+        if etags.if_none_match(request, etag):
+            return not_modified(etag)
+        return responses.json_response(renderers.dumps(ProfileSerializer(profile, context={'request': request}).data), headers={'ETag': etag})
@@ -0,0 +1,168 @@
+import hashlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.core import signing
+from django.core.cache import caches
+from django.dispatch import receiver
+from django.urls import reverse
+
+from auth_api import responses
+
+SIGNING_SALT = 'auth_api.auth_status'
+
+
+def get_status_setting(name, default):
+    """
+    Read a value from the optional AUTH_API_AUTH_STATUS settings dict.
+    """
+    return getattr(settings, 'AUTH_API_AUTH_STATUS', {}).get(name, default)
+
+
+def _session_digest(session_key):
+    return hashlib.sha256(session_key.encode()).hexdigest()
+
+
+def _cache():
+    return caches[get_status_setting('CACHE_ALIAS', 'default')]
+
+
+def _cache_key(session_key):
+    return f'auth_api:auth_status:{_session_digest(session_key)}'
+
+
+def lookup(request):
+    """
+    Answer "is this request authenticated?" without touching the database.
+
+    Returns True/False when the answer is known from the session cookie, the
+    signed status cookie or the cache, and None when the session has to be loaded.
+    """
+    if request.META.get('HTTP_AUTHORIZATION', '').startswith('Bearer '):
+        # Token requests are answered by the view
+        return None
+    session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not session_key:
+        return False
+
+    if get_status_setting('MODE', 'cache') == 'signed_cookie':
+        cookie = request.COOKIES.get(get_status_setting('COOKIE_NAME', 'auth_status'))
+        if not cookie:
+            return None
+        try:
+            value = signing.loads(cookie, salt=SIGNING_SALT, max_age=get_status_setting('TTL', 300))
+        except signing.BadSignature:
+            return None
+        # The cookie is bound to the session it was issued for
+        if value.get('s') != _session_digest(session_key):
+            return None
+        return bool(value.get('a'))
+
+    return _cache().get(_cache_key(session_key))
+
+
+def _http_request(request):
+    # Flags must live on the HttpRequest seen by the middleware, not on a DRF Request
+    return getattr(request, '_request', request)
+
+
+def remember(request, is_authenticated):
+    """
+    Record the authentication status of the current session.
+    """
+    request = _http_request(request)
+    session_key = request.session.session_key
+    if not session_key:
+        return
+    if get_status_setting('MODE', 'cache') == 'signed_cookie':
+        request._auth_status_cookie = signing.dumps(
+            {'s': _session_digest(session_key), 'a': is_authenticated},
+            salt=SIGNING_SALT,
+        )
+    else:
+        _cache().set(_cache_key(session_key), is_authenticated, get_status_setting('TTL', 300))
+
+
+def forget(request):
+    """
+    Drop the recorded status of the current session (logout, account deletion).
+    """
+    request = _http_request(request)
+    session_key = request.session.session_key
+    if session_key:
+        _cache().delete(_cache_key(session_key))
+    request._auth_status_cookie = ''
+
+
+@receiver(user_logged_in)
+def on_user_logged_in(sender, request, user, **kwargs):
+    # login() cycles the session key, so the new key is recorded lazily by the
+    # next check-authenticated call; the old key must not answer True anymore.
+    if request is not None:
+        forget(request)
+
+
+@receiver(user_logged_out)
+def on_user_logged_out(sender, request, user, **kwargs):
+    if request is not None:
+        forget(request)
+
+
+class AuthStatusMiddleware:
+    """
+    Answer GET check-authenticated from the status cache or signed cookie.
+
+    Place it right after SessionMiddleware and CorsMiddleware: a known status is
+    returned before CSRF, authentication and the view run, so the poll costs no
+    database query. Unknown statuses fall through to CheckAuthenticatedView,
+    which records the answer for the next poll.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self._path = None
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.short_circuit(request)
+        if response is None:
+            response = self.get_response(request)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        response = self.short_circuit(request)
+        if response is None:
+            response = await self.get_response(request)
+        return self.process_response(request, response)
+
+    def short_circuit(self, request):
+        if self._path is None:
+            self._path = reverse('check_authenticated')
+        if request.method == 'GET' and request.path_info == self._path and get_status_setting('SHORT_CIRCUIT', True):
+            status = lookup(request)
+            if status is not None:
+                return responses.json_response(responses.AUTHENTICATED if status else responses.NOT_AUTHENTICATED)
+        return None
+
+    def process_response(self, request, response):
+        cookie = getattr(request, '_auth_status_cookie', None)
+        cookie_name = get_status_setting('COOKIE_NAME', 'auth_status')
+        if cookie:
+            response.set_cookie(
+                cookie_name,
+                cookie,
+                max_age=get_status_setting('TTL', 300),
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite=settings.SESSION_COOKIE_SAMESITE,
+            )
+        elif cookie == '' and cookie_name in request.COOKIES:
+            response.delete_cookie(cookie_name, samesite=settings.SESSION_COOKIE_SAMESITE)
+        return response
@@ -0,0 +1,295 @@
+"""
+Avatar upload, storage and thumbnail pipeline.
+
+Uploads are streamed to a temporary file with a size cap while their SHA-256 is
+computed. The original is stored under its content hash (identical uploads are
+stored once and the URLs can be cached forever), and fixed-size WebP and JPEG
+thumbnails are rendered on a background thread using Pillow's draft mode and
+reduce() so that large photos are never fully decoded.
+"""
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import wraps
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from django.db import close_old_connections, transaction
+from django.db.models import F
+
+from auth_api.models import Profile
+from auth_api.user_cache import invalidate_user
+
+logger = logging.getLogger(__name__)
+
+AVATAR_DIR = 'avatars'
+ORIGINAL = 'original'
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp', 'GIF': 'gif'}
+FORMAT_EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+
+
+class AvatarError(ValueError):
+    """
+    Raised for uploads that are not acceptable avatar images.
+    """
+
+
+def get_avatar_setting(name, default):
+    """
+    Read a value from the optional AUTH_API_AVATARS settings dict.
+    """
+    return getattr(settings, 'AUTH_API_AVATARS', {}).get(name, default)
+
+
+def get_sizes():
+    return get_avatar_setting('SIZES', {'small': 64, 'medium': 256, 'large': 512})
+
+
+class AvatarUploadHandler(FileUploadHandler):
+    """
+    Stream uploaded files to disk, hashing them and enforcing MAX_UPLOAD_SIZE.
+
+    A file over the limit is skipped as soon as the limit is crossed, and the
+    request is flagged with `avatar_upload_too_large` for the view to report.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_size = get_avatar_setting('MAX_UPLOAD_SIZE', 5 * 1024 * 1024)
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.file = TemporaryUploadedFile(self.file_name, self.content_type, 0, self.charset, self.content_type_extra)
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.size > self.max_size:
+            self.file.close()
+            if self.request is not None:
+                self.request.avatar_upload_too_large = True
+            raise SkipFile
+        self.digest.update(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.content_hash = self.digest.hexdigest()
+        return self.file
+
+    def upload_interrupted(self):
+        if hasattr(self, 'file'):
+            self.file.close()
+
+
+def avatar_upload_handler(view_func):
+    """
+    View decorator installing AvatarUploadHandler before anything reads the body.
+
+    Must wrap the CSRF check, which parses POST bodies to look for the token.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers = [AvatarUploadHandler(request)]
+        return view_func(request, *args, **kwargs)
+
+    return wrapper
+
+
+def upload_too_large(request):
+    """
+    Parse the request body (running the upload handler) and report whether a file hit the cap.
+    """
+    request.data
+    return getattr(getattr(request, '_request', request), 'avatar_upload_too_large', False)
+
+
+def content_hash(upload):
+    digest = getattr(upload, 'content_hash', None)
+    if digest is None:
+        sha = hashlib.sha256()
+        for chunk in upload.chunks():
+            sha.update(chunk)
+        digest = sha.hexdigest()
+        upload.seek(0)
+    return digest
+
+
+def avatar_dir(name):
+    return os.path.dirname(name)
+
+
+def thumbnail_name(name, size_name, fmt):
+    return f'{avatar_dir(name)}/{size_name}.{FORMAT_EXTENSIONS[fmt]}'
+
+
+def avatar_name(upload):
+    """
+    Validate an uploaded image and return the storage name of its original.
+
+    Only the image header is read, and nothing is stored: serializers call this
+    while validating, and storing_avatar writes the file when the profile is saved.
+    """
+    # Pillow is imported on first upload rather than at worker startup
+    from PIL import Image
+
+    try:
+        with Image.open(upload) as image:
+            fmt, (width, height) = image.format, image.size
+    except (OSError, Image.DecompressionBombError):
+        raise AvatarError('Upload a valid image.')
+    if fmt not in EXTENSIONS:
+        raise AvatarError('Unsupported image format.')
+    if width * height > get_avatar_setting('MAX_PIXELS', 40_000_000):
+        raise AvatarError('Image dimensions are too large.')
+    upload.seek(0)
+
+    digest = content_hash(upload)
+    return f'{AVATAR_DIR}/{digest[:2]}/{digest}/{ORIGINAL}.{EXTENSIONS[fmt]}'
+
+
+def store_avatar(upload, name):
+    """
+    Store an uploaded original under the name returned by avatar_name.
+
+    Returns True when this call wrote the file, False when the content was stored already.
+    """
+    if default_storage.exists(name):
+        return False
+    upload.seek(0)
+    saved = default_storage.save(name, upload)
+    if saved != name:
+        # Another request stored the same content concurrently
+        default_storage.delete(saved)
+        return False
+    return True
+
+
+@contextmanager
+def storing_avatar(upload, name):
+    """
+    Store an uploaded original around the save of the profile pointing to it.
+
+    If the save fails, a file written here is deleted again; content stored
+    before, which other profiles may use, is left alone.
+    """
+    created = upload is not None and store_avatar(upload, name)
+    try:
+        yield
+    except BaseException:
+        if created:
+            default_storage.delete(name)
+        raise
+
+
+def render_thumbnails(name):
+    """
+    Render every configured size in every format for a stored original.
+    """
+    from PIL import Image, ImageOps
+
+    sizes = get_sizes()
+    formats = get_avatar_setting('FORMATS', ('webp', 'jpeg'))
+    quality = get_avatar_setting('QUALITY', 82)
+    largest = max(sizes.values())
+
+    with default_storage.open(name) as f, Image.open(f) as image:
+        # JPEG: let the decoder downscale by up to 8x while decoding
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        side = min(image.size)
+        left, top = (image.width - side) // 2, (image.height - side) // 2
+        image = image.crop((left, top, left + side, top + side))
+
+        for size_name, size in sorted(sizes.items(), key=lambda item: -item[1]):
+            factor = image.width // (size * 2)
+            if factor > 1:
+                # Cheap integer box downscale, then a high quality final resize
+                image = image.reduce(factor)
+            thumb = image.resize((size, size), Image.Resampling.LANCZOS) if image.width != size else image
+            for fmt in formats:
+                out = BytesIO()
+                if fmt == 'jpeg':
+                    thumb.convert('RGB').save(out, 'JPEG', quality=quality, optimize=True, progressive=True)
+                else:
+                    thumb.save(out, 'WEBP', quality=quality, method=4)
+                target = thumbnail_name(name, size_name, fmt)
+                if not default_storage.exists(target):
+                    default_storage.save(target, ContentFile(out.getvalue()))
+
+
+def thumbnails_exist(name):
+    return all(
+        default_storage.exists(thumbnail_name(name, size_name, fmt))
+        for size_name in get_sizes()
+        for fmt in get_avatar_setting('FORMATS', ('webp', 'jpeg'))
+    )
+
+
+def process_avatar(profile_id, user_id, name):
+    """
+    Render the thumbnails of a profile's avatar and mark them ready.
+
+    The flag is only set while the profile still points to this avatar.
+    """
+    try:
+        if not thumbnails_exist(name):
+            render_thumbnails(name)
+        if Profile.objects.filter(pk=profile_id, avatar=name).update(avatar_ready=True, version=F('version') + 1):
+            invalidate_user(user_id)
+    except Exception:
+        logger.exception('Rendering avatar thumbnails for %s failed', name)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _run_in_background(profile_id, user_id, name):
+    try:
+        process_avatar(profile_id, user_id, name)
+    finally:
+        close_old_connections()
+
+
+def schedule_thumbnails(profile):
+    """
+    Render the thumbnails after the current transaction commits.
+
+    Runs on a small background thread pool unless AUTH_API_AVATARS['SYNC'] is set.
+    """
+    global _executor
+    args = (profile.pk, profile.user_id, profile.avatar.name)
+    if get_avatar_setting('SYNC', False):
+        transaction.on_commit(lambda: process_avatar(*args))
+        return
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=get_avatar_setting('WORKERS', 2), thread_name_prefix='auth_api-avatars'
+            )
+    transaction.on_commit(lambda: _executor.submit(_run_in_background, *args))
+
+
+def avatar_urls(profile):
+    """
+    Return {size name: {format: url}}, or None while thumbnails are not ready.
+    """
+    if not profile.avatar or not profile.avatar_ready:
+        return None
+    name = profile.avatar.name
+    return {
+        size_name: {fmt: default_storage.url(thumbnail_name(name, size_name, fmt)) for fmt in get_avatar_setting('FORMATS', ('webp', 'jpeg'))}
+        for size_name in get_sizes()
+    }
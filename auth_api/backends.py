@@ -0,0 +1,39 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from auth_api import hashing
+from auth_api.user_cache import get_cached_user
+
+UserModel = get_user_model()
+
+
+class EmailBackend(ModelBackend):
+    """
+    Authenticate by email and password, hashing on the auth_api hashing pool.
+
+    Session users are resolved through the user cache, so a warm request does
+    not query the user or profile tables.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Run the default password hasher once to reduce the timing
+            # difference between an existing and a nonexistent user.
+            hashing.hash_password(password)
+            return None
+        if hashing.verify_user_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    def get_user(self, user_id):
+        """
+        Load the session user (with its profile) through the versioned user cache.
+        """
+        user = get_cached_user(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
@@ -0,0 +1,76 @@
+"""
+Helpers shared by the bench_* management commands.
+
+Benchmarks run against a throwaway test database and Django's locmem email
+backend, so they never touch the development database or send real mail.
+"""
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections, transaction
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+
+
+@contextmanager
+def benchmark_database(keepdb=False, test_db_name=None):
+    """
+    Create the test databases (and locmem email backend) for the duration of the block.
+
+    SQLite test databases live in memory unless `test_db_name` names a file,
+    which concurrent benchmarks need so that writers wait on the file lock.
+    """
+    if test_db_name is not None:
+        connections['default'].settings_dict['TEST']['NAME'] = test_db_name
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0, keepdb=keepdb, interactive=False)
+    old_config = runner.setup_databases()
+    try:
+        yield
+    finally:
+        runner.teardown_databases(old_config)
+        teardown_test_environment()
+
+
+def percentile(sorted_values, fraction):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def count_queries(func, *args, **kwargs):
+    """
+    Call func and return (result, number of SQL queries it ran on the default database).
+    """
+    with CaptureQueriesContext(connection) as captured:
+        result = func(*args, **kwargs)
+    return result, len(captured.captured_queries)
+
+
+def seed_users(count, password, prefix='seed', batch_size=5000, is_active=True, progress=None):
+    """
+    Insert `count` provisioned users sharing one password and return their ids.
+
+    The password is hashed once and rows are written with bulk_create and
+    provision_users, so 100k users take seconds instead of hours of hashing.
+    """
+    from auth_api.models import User
+    from auth_api.provisioning import provision_users
+
+    encoded = make_password(password)
+    ids = []
+    for start in range(0, count, batch_size):
+        with transaction.atomic():
+            users = User.objects.bulk_create([
+                User(email=f'{prefix}{i}@example.com', password=encoded, is_active=is_active)
+                for i in range(start, min(start + batch_size, count))
+            ])
+            provision_users(users, invalidate=False)
+        ids.extend(user.pk for user in users)
+        if progress is not None:
+            progress(len(ids))
+    return ids
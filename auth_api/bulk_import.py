@@ -0,0 +1,260 @@
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, connection, transaction
+from django.db.models.functions import Lower
+
+from auth_api.models import User
+from auth_api.provisioning import provision_users
+
+TRUE_VALUES = {'1', 'true', 't', 'yes', 'y'}
+FALSE_VALUES = {'0', 'false', 'f', 'no', 'n'}
+
+
+def get_import_setting(name, default):
+    """
+    Read a value from the optional AUTH_API_BULK_IMPORT settings dict.
+    """
+    return getattr(settings, 'AUTH_API_BULK_IMPORT', {}).get(name, default)
+
+
+class ImportReport:
+    """
+    Counters and per-row errors collected while importing users.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.skipped = 0
+        self.errors = []
+
+    def add_error(self, line, email, message):
+        self.skipped += 1
+        self.errors.append({'line': line, 'email': email, 'error': message})
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'skipped': self.skipped,
+            'errors': self.errors,
+        }
+
+
+def iter_rows(stream, fmt):
+    """
+    Yield (line_number, row_dict) pairs from a CSV or JSON Lines text stream.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == 'jsonl':
+        for line_number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            if not isinstance(row, dict):
+                row = {'_error': 'Line is not a JSON object.'}
+            yield line_number, row
+    else:
+        raise ValueError(f'Unsupported import format: {fmt}')
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_bool(value, default):
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    value = str(value).strip().lower()
+    if not value:
+        return default
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValueError(f'Invalid boolean value: {value}')
+
+
+def _init_hash_worker():
+    # Worker processes started with the spawn method need their own app registry
+    if not django.apps.apps.ready:
+        django.setup()
+
+
+def _hash_passwords(passwords, pool, workers):
+    if pool is None:
+        return [make_password(password) for password in passwords]
+    return list(pool.map(make_password, passwords, chunksize=max(1, len(passwords) // (workers * 4))))
+
+
+def validate_chunk(rows, report, default_active, check_passwords):
+    """
+    Validate a chunk of rows and return the ones that can be inserted.
+
+    Each returned item is a dict with the normalized email, the flags and either
+    a raw `password` to hash or an already encoded `password_hash`.
+    """
+    candidates = {}
+    for line, row in rows:
+        report.rows += 1
+        if '_error' in row:
+            report.add_error(line, None, row['_error'])
+            continue
+
+        email = (row.get('email') or '').strip()
+        try:
+            validate_email(email)
+        except ValidationError:
+            report.add_error(line, email, 'Enter a valid email address.')
+            continue
+        email = User.objects.normalize_email(email)
+        if email.lower() in candidates:
+            report.add_error(line, email, 'Duplicate email in import.')
+            continue
+
+        try:
+            is_active = parse_bool(row.get('is_active'), default_active)
+            is_admin = parse_bool(row.get('is_admin'), False)
+        except ValueError as e:
+            report.add_error(line, email, str(e))
+            continue
+
+        password_hash = row.get('password_hash')
+        password = row.get('password')
+        if password_hash:
+            try:
+                identify_hasher(password_hash)
+            except ValueError:
+                report.add_error(line, email, 'Unknown password hash format.')
+                continue
+        elif password:
+            if check_passwords:
+                try:
+                    validate_password(password, user=User(email=email))
+                except ValidationError as e:
+                    report.add_error(line, email, ' '.join(e.messages))
+                    continue
+        else:
+            report.add_error(line, email, 'Missing password or password_hash.')
+            continue
+
+        candidates[email.lower()] = {
+            'line': line,
+            'email': email,
+            'is_active': is_active,
+            'is_admin': is_admin,
+            'password': password,
+            'password_hash': password_hash,
+        }
+
+    # One query per chunk to drop the accounts that already exist, ignoring case
+    existing = User.objects.alias(email_lower=Lower('email')).filter(email_lower__in=list(candidates))
+    for email in existing.values_list('email', flat=True):
+        candidate = candidates.pop(email.lower(), None)
+        if candidate is not None:
+            report.add_error(candidate['line'], candidate['email'], 'A user with this email already exists.')
+    return list(candidates.values())
+
+
+def _insert_users(users):
+    """
+    Insert `users`, skipping emails taken in the meantime, and return the rows
+    this call created with their primary keys.
+    """
+    if connection.features.can_return_rows_from_bulk_insert:
+        try:
+            # A savepoint, so that an account created since validate_chunk only
+            # sends the chunk down the conflict-tolerant path below
+            with transaction.atomic():
+                return User.objects.bulk_create(users)
+        except IntegrityError:
+            pass
+    User.objects.bulk_create(users, ignore_conflicts=True)
+    # ignore_conflicts returns no primary keys; the salted hashes tell the rows
+    # inserted here from accounts created concurrently with the same email
+    hashes = {user.email: user.password for user in users}
+    rows = User.objects.filter(email__in=list(hashes)).only('id', 'email', 'password', 'is_admin')
+    return [row for row in rows if hashes[row.email] == row.password]
+
+
+def insert_chunk(candidates, pool, workers, report):
+    """
+    Hash the passwords of a validated chunk and insert it with bulk_create.
+
+    Returns the number of users created; rows whose email was taken since
+    validation are reported as skipped.
+    """
+    to_hash = [candidate for candidate in candidates if not candidate['password_hash']]
+    for candidate, encoded in zip(to_hash, _hash_passwords([c['password'] for c in to_hash], pool, workers)):
+        candidate['password_hash'] = encoded
+
+    users = [
+        User(
+            email=candidate['email'],
+            password=candidate['password_hash'],
+            is_active=candidate['is_active'],
+            is_admin=candidate['is_admin'],
+        )
+        for candidate in candidates
+    ]
+    with transaction.atomic():
+        created = _insert_users(users)
+        provision_users(created, invalidate=False)
+    created_emails = {user.email for user in created}
+    for candidate in candidates:
+        if candidate['email'] not in created_emails:
+            report.add_error(candidate['line'], candidate['email'], 'A user with this email already exists.')
+    return len(created)
+
+
+def import_users(stream, fmt, chunk_size=None, workers=None, default_active=True, check_passwords=True, progress=None):
+    """
+    Stream users from a CSV or JSON Lines text stream into the database.
+
+    Rows are validated and inserted in chunks of `chunk_size`; raw passwords are
+    hashed across `workers` processes (0 hashes in the current process). Returns
+    an ImportReport.
+    """
+    chunk_size = chunk_size or get_import_setting('CHUNK_SIZE', 1000)
+    if workers is None:
+        workers = get_import_setting('HASH_WORKERS', None)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    report = ImportReport()
+
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_hash_worker) if workers != 0 else None
+    try:
+        for rows in chunked(iter_rows(stream, fmt), chunk_size):
+            candidates = validate_chunk(rows, report, default_active, check_passwords)
+            if candidates:
+                report.created += insert_chunk(candidates, pool, workers, report)
+            if progress:
+                progress(report)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return report
@@ -0,0 +1,57 @@
+from django.core.checks import Error, Tags, register
+
+from auth_api.auth_status import get_status_setting
+from auth_api.user_cache import get_user_cache_setting
+
+PROCESS_LOCAL_CACHES = {'django.core.cache.backends.locmem.LocMemCache'}
+
+
+def _process_local_backend(alias):
+    from django.conf import settings
+
+    backend = settings.CACHES.get(alias, {}).get('BACKEND')
+    return backend if backend in PROCESS_LOCAL_CACHES else None
+
+
+@register(Tags.caches)
+def check_user_cache_is_shared(app_configs, **kwargs):
+    """
+    The user cache is invalidated by bumping a version stamp in the cache; a
+    process-local backend only sees the bumps of its own process, so other
+    workers would keep serving a deactivated user or a changed password.
+    """
+    alias = get_user_cache_setting('CACHE_ALIAS', 'default')
+    backend = _process_local_backend(alias)
+    if backend and not get_user_cache_setting('ALLOW_PROCESS_LOCAL', False):
+        return [Error(
+            f"AUTH_API_USER_CACHE uses the process-local cache '{alias}' ({backend}).",
+            hint=(
+                'Point CACHE_ALIAS at a cache shared by every worker (Redis, Memcached, database), '
+                "or set AUTH_API_USER_CACHE['ALLOW_PROCESS_LOCAL'] for a single-process server."
+            ),
+            id='auth_api.E001',
+        )]
+    return []
+
+
+@register(Tags.caches)
+def check_auth_status_cache_is_shared(app_configs, **kwargs):
+    """
+    In 'cache' mode a logout forgets the recorded status in the cache; with a
+    process-local backend the other workers keep answering "authenticated"
+    until the TTL runs out.
+    """
+    if get_status_setting('MODE', 'cache') != 'cache':
+        return []
+    alias = get_status_setting('CACHE_ALIAS', 'default')
+    backend = _process_local_backend(alias)
+    if backend and not get_status_setting('ALLOW_PROCESS_LOCAL', False):
+        return [Error(
+            f"AUTH_API_AUTH_STATUS uses the process-local cache '{alias}' ({backend}).",
+            hint=(
+                'Point CACHE_ALIAS at a cache shared by every worker, switch MODE to '
+                "'signed_cookie', or set AUTH_API_AUTH_STATUS['ALLOW_PROCESS_LOCAL'] for a single-process server."
+            ),
+            id='auth_api.E002',
+        )]
+    return []
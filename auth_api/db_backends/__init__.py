@@ -0,0 +1,8 @@
+"""
+Database backends of the auth API.
+
+'auth_api.db_backends.mysql' and 'auth_api.db_backends.postgresql' take their
+connections from a per-process pool (see auth_api.db_pool);
+'auth_api.db_backends.sqlite3' starts transactions with BEGIN IMMEDIATE (see
+auth_api.sqlite).
+"""
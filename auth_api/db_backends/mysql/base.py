@@ -0,0 +1,7 @@
+from django.db.backends.mysql import base
+
+from auth_api.db_pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    pass
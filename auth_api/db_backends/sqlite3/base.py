@@ -0,0 +1,14 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite backend that takes the write lock when a transaction starts.
+
+    TRANSACTION_MODE in the database settings picks DEFERRED, IMMEDIATE
+    (default) or EXCLUSIVE; see auth_api.sqlite.
+    """
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict.get('TRANSACTION_MODE', 'IMMEDIATE')
+        self.cursor().execute(f'BEGIN {mode}')
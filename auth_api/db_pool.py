@@ -0,0 +1,163 @@
+"""
+In-process database connection pool for threaded WSGI/ASGI workers.
+
+With persistent connections (CONN_MAX_AGE) every worker thread keeps its own
+connection open, so a process with many threads holds as many connections as
+it has threads whether they are busy or not. The pooled backends in
+auth_api.db_backends instead hand a connection back to a per-process pool
+whenever Django closes it (at the end of every request with CONN_MAX_AGE=0)
+and reuse it for the next request of any thread.
+
+Pool parameters come from the POOL dict of the database settings:
+
+    'POOL': {
+        'MAX_SIZE': 10,         # connections open at once per process
+        'TIMEOUT': 5,           # seconds to wait for a free one
+        'MAX_LIFETIME': 1800,   # reconnect after this many seconds
+        'CHECK_AFTER': 30,      # ping connections idle for longer than this
+    }
+"""
+import threading
+import time
+from collections import deque
+
+from django.db.utils import OperationalError
+
+
+class ConnectionPool:
+    """
+    A bounded LIFO pool of DB-API connections made by `connect()`.
+    """
+
+    def __init__(self, connect, max_size=10, timeout=5.0, max_lifetime=1800.0, check_after=30.0):
+        self._connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.check_after = check_after
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        # (connection, created, released); the most recently used one is reused first
+        self._idle = deque()
+        self._created = {}
+
+    def acquire(self):
+        """
+        Return an idle, healthy connection or open a new one.
+
+        Raises OperationalError when MAX_SIZE connections are in use for longer
+        than TIMEOUT seconds.
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            raise OperationalError(
+                f'Timed out after {self.timeout}s waiting for one of {self.max_size} pooled database connections.'
+            )
+        try:
+            while True:
+                with self._lock:
+                    item = self._idle.pop() if self._idle else None
+                if item is None:
+                    connection = self._connect()
+                    self._created[id(connection)] = time.monotonic()
+                    return connection
+                connection, created, released = item
+                now = time.monotonic()
+                if now - created > self.max_lifetime or (now - released > self.check_after and not self.is_usable(connection)):
+                    self._discard(connection)
+                    continue
+                self._created[id(connection)] = created
+                return connection
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, connection, discard=False):
+        """
+        Give a connection back; it is closed instead when `discard` is set or
+        it cannot be rolled back to a clean state.
+        """
+        created = self._created.pop(id(connection), None)
+        try:
+            if discard or created is None:
+                self._discard(connection)
+                return
+            try:
+                connection.rollback()
+            except Exception:
+                self._discard(connection)
+                return
+            with self._lock:
+                self._idle.append((connection, created, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    def is_usable(self, connection):
+        try:
+            cursor = connection.cursor()
+            try:
+                cursor.execute('SELECT 1')
+            finally:
+                cursor.close()
+            # Do not leave a transaction open for drivers that started one
+            connection.rollback()
+        except Exception:
+            return False
+        return True
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def close_idle(self):
+        """
+        Close every idle connection, e.g. before forking or in tests.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+        for connection, _, _ in idle:
+            self._discard(connection)
+
+    @property
+    def idle_count(self):
+        return len(self._idle)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, connect, options):
+    pool = _pools.get(alias)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(alias)
+            if pool is None:
+                pool = _pools[alias] = ConnectionPool(
+                    connect,
+                    max_size=options.get('MAX_SIZE', 10),
+                    timeout=options.get('TIMEOUT', 5),
+                    max_lifetime=options.get('MAX_LIFETIME', 1800),
+                    check_after=options.get('CHECK_AFTER', 30),
+                )
+    return pool
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    Take connections from, and return them to, the per-process pool of the alias.
+
+    Mix into a backend's DatabaseWrapper and run it with CONN_MAX_AGE = 0, so
+    that Django "closes" (returns) the connection at the end of each request.
+    """
+
+    def get_new_connection(self, conn_params):
+        connect = super().get_new_connection
+        pool = get_pool(self.alias, lambda: connect(conn_params), self.settings_dict.get('POOL', {}))
+        return pool.acquire()
+
+    def _close(self):
+        if self.connection is not None:
+            # A connection closed inside a transaction or after an error is not reused
+            _pools[self.alias].release(self.connection, discard=self.in_atomic_block or self.errors_occurred)
@@ -0,0 +1,70 @@
+"""
+Dirty-field tracking for models that are saved field by field.
+"""
+from django.db import models
+
+
+def _comparable(field, value):
+    # FieldFile objects are mutated in place; compare the stored name instead
+    if isinstance(field, models.FileField):
+        return getattr(value, 'name', value) or ''
+    return value
+
+
+class DirtyFieldsMixin(models.Model):
+    """
+    Remember the loaded column values and save only the ones that changed.
+
+    A plain `save()` on an existing instance becomes `save(update_fields=...)`
+    with the changed columns (plus `auto_now` columns such as updated_at), and
+    is skipped entirely, without signals, when nothing changed. Explicit
+    `update_fields` and inserts behave as usual.
+    """
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._snapshot(set(fields) if fields else None)
+
+    def _snapshot(self, attnames=None):
+        if attnames is None or not hasattr(self, '_loaded_values'):
+            self._loaded_values = {}
+        for field in self._meta.concrete_fields:
+            if field.attname in self.__dict__ and (attnames is None or field.attname in attnames):
+                self._loaded_values[field.attname] = _comparable(field, self.__dict__[field.attname])
+
+    def get_dirty_fields(self):
+        """
+        Return the attnames of loaded (or newly assigned) columns that changed.
+        """
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return None
+        dirty = []
+        for field in self._meta.concrete_fields:
+            if field.primary_key or field.attname not in self.__dict__:
+                continue
+            if field.attname not in loaded or _comparable(field, self.__dict__[field.attname]) != loaded[field.attname]:
+                dirty.append(field.attname)
+        return dirty
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None and not args and not self._state.adding and not kwargs.get('force_insert'):
+            dirty = self.get_dirty_fields()
+            if dirty is not None:
+                if not dirty:
+                    return
+                auto_now = [f.attname for f in self._meta.concrete_fields if getattr(f, 'auto_now', False)]
+                kwargs['update_fields'] = dirty + [name for name in auto_now if name not in dirty]
+                update_fields = kwargs['update_fields']
+        super().save(*args, **kwargs)
+        self._snapshot(set(update_fields) if update_fields is not None else None)
@@ -0,0 +1,86 @@
+"""
+Strong ETags and conditional request checks for the user and profile resources.
+
+The ETags are computed from `User.updated_at` and `Profile.version` of the
+cached request user (see auth_api.user_cache), so answering a matching
+If-None-Match with 304 needs neither a query nor the serializer.
+"""
+from django.utils.cache import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from auth_api.models import Profile, User
+
+
+def user_etag(user):
+    return f'"user-{user.pk}-{int(user.updated_at.timestamp() * 1_000_000)}"'
+
+
+def profile_etag(profile):
+    return f'"profile-{profile.pk}-{profile.version}"'
+
+
+def _matches(header, etag, weak):
+    etags = parse_etags(header)
+    if '*' in etags:
+        return True
+    if weak:
+        etag = etag.removeprefix('W/')
+        return any(candidate.removeprefix('W/') == etag for candidate in etags)
+    return etag in etags
+
+
+def if_none_match(request, etag):
+    """
+    True when the request's If-None-Match matches `etag` (weak comparison).
+    """
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    return bool(header) and _matches(header, etag, weak=True)
+
+
+def not_modified(request, etag):
+    """
+    Return a 304 response when If-None-Match matches `etag`, else None.
+    """
+    if if_none_match(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        response['ETag'] = etag
+        return response
+    return None
+
+
+def precondition_failed(request, etag):
+    """
+    Return a 412 response when If-Match is sent and does not match `etag`, else None.
+    """
+    header = request.META.get('HTTP_IF_MATCH')
+    if header and not _matches(header, etag, weak=False):
+        return Response(
+            {'detail': 'The resource was modified by another request.'},
+            status=status.HTTP_412_PRECONDITION_FAILED,
+        )
+    return None
+
+
+def current_user_etag(user):
+    """
+    ETag of the user as stored in the database, for If-Match checks on writes.
+
+    The row stays locked until the enclosing transaction ends, so the check and
+    the save that follows cannot interleave with another write.
+    """
+    updated_at = User.objects.select_for_update().values_list('updated_at', flat=True).get(pk=user.pk)
+    return user_etag(User(pk=user.pk, updated_at=updated_at))
+
+
+def current_profile_etag(profile):
+    """
+    ETag of the profile as stored in the database, for If-Match checks on writes.
+
+    Locks the row like current_user_etag, and carries the stored version over
+    to `profile` so that saving it bumps the latest version.
+    """
+    version = Profile.objects.select_for_update().values_list('version', flat=True).get(pk=profile.pk)
+    if profile.version != version:
+        profile.version = version
+    return profile_etag(profile)
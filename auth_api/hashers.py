@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+)
+
+
+def get_profile_params(profile):
+    """
+    Return the cost parameters configured for a hasher profile.
+    """
+    return getattr(settings, 'AUTH_API_HASHER_PROFILES', {}).get(profile, {}).get('PARAMS', {})
+
+
+class ProfiledHasherMixin:
+    """
+    Take the hasher cost parameters from AUTH_API_HASHER_PROFILES.
+
+    The algorithm names are left untouched, so hashes written with older
+    parameters still verify and are reported by `must_update`, which makes
+    Django re-hash them on the next successful login.
+    """
+
+    profile = None
+
+    def __init__(self, params=None):
+        if params is None:
+            params = get_profile_params(self.profile)
+        for name, value in params.items():
+            setattr(self, name, value)
+
+
+class ProfiledPBKDF2PasswordHasher(ProfiledHasherMixin, PBKDF2PasswordHasher):
+    profile = 'pbkdf2'
+
+
+class ProfiledArgon2PasswordHasher(ProfiledHasherMixin, Argon2PasswordHasher):
+    profile = 'argon2'
+
+
+class ProfiledScryptPasswordHasher(ProfiledHasherMixin, ScryptPasswordHasher):
+    profile = 'scrypt'
@@ -0,0 +1,193 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, identify_hasher, make_password
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from auth_api.instrumentation import record_hash
+
+
+class HashingPoolBusy(RuntimeError):
+    """
+    Raised when the hashing pool has no free slot within QUEUE_TIMEOUT seconds.
+    """
+
+
+def get_hashing_setting(name, default):
+    """
+    Read a value from the optional AUTH_API_HASHING settings dict.
+    """
+    return getattr(settings, 'AUTH_API_HASHING', {}).get(name, default)
+
+
+def _init_worker():
+    # Worker processes started with the spawn method need their own app registry
+    if not django.apps.apps.ready:
+        django.setup()
+
+
+def _verify(password, encoded):
+    """
+    Check a password and report whether its hash uses outdated parameters.
+
+    Module level so that it can run in a process pool. Returns (valid, must_update).
+    """
+    if password is None or not encoded:
+        return False, False
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return False, False
+    if not hasher.verify(password, encoded):
+        return False, False
+    preferred = get_hasher('default')
+    must_update = hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
+    return True, must_update
+
+
+class HashingPool:
+    """
+    Bounded executor for password hashing and verification.
+
+    At most MAX_WORKERS hashes run at once and at most MAX_PENDING more wait for
+    a worker; callers beyond that wait QUEUE_TIMEOUT seconds for a slot and then
+    get HashingPoolBusy, so a login storm cannot queue unbounded CPU work.
+    """
+
+    def __init__(self, kind='thread', max_workers=None, max_pending=None, queue_timeout=10):
+        self.kind = kind
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = self.max_workers * 4 if max_pending is None else max_pending
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_pending)
+        if kind == 'process':
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker)
+        elif kind == 'thread':
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='auth_api-hashing')
+        else:
+            raise ValueError(f'Unknown hashing pool kind: {kind}')
+
+    def submit(self, func, *args):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise HashingPoolBusy('Password hashing pool is saturated.')
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, func, *args):
+        start = time.perf_counter()
+        try:
+            return self.submit(func, *args).result()
+        finally:
+            record_hash(time.perf_counter() - start)
+
+    async def arun(self, func, *args):
+        # Acquiring a slot may block, so do it off the event loop as well
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            future = await loop.run_in_executor(None, self.submit, func, *args)
+            return await asyncio.wrap_future(future)
+        finally:
+            record_hash(time.perf_counter() - start)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Return the process-wide hashing pool, creating it on first use.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HashingPool(
+                    kind=get_hashing_setting('POOL', 'thread'),
+                    max_workers=get_hashing_setting('MAX_WORKERS', None),
+                    max_pending=get_hashing_setting('MAX_PENDING', None),
+                    queue_timeout=get_hashing_setting('QUEUE_TIMEOUT', 10),
+                )
+    return _pool
+
+
+@receiver(setting_changed)
+def reset_pool(setting, **kwargs):
+    global _pool
+    if setting in ('AUTH_API_HASHING', 'PASSWORD_HASHERS', 'AUTH_API_HASHER_PROFILES'):
+        with _pool_lock:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = None
+
+
+def hash_password(password):
+    """
+    Hash a raw password with the preferred hasher on the hashing pool.
+    """
+    return get_pool().run(make_password, password)
+
+
+async def ahash_password(password):
+    return await get_pool().arun(make_password, password)
+
+
+def check_password(password, encoded):
+    """
+    Verify a raw password on the hashing pool. Returns (valid, must_update).
+    """
+    return get_pool().run(_verify, password, encoded)
+
+
+async def acheck_password(password, encoded):
+    return await get_pool().arun(_verify, password, encoded)
+
+
+def set_user_password(user, password):
+    """
+    Pool-backed equivalent of `user.set_password()`; the caller saves the user.
+    """
+    user.password = hash_password(password)
+    user._password = password
+
+
+async def aset_user_password(user, password):
+    user.password = await ahash_password(password)
+    user._password = password
+
+
+def verify_user_password(user, password):
+    """
+    Pool-backed equivalent of `user.check_password()`.
+
+    A hash that uses an outdated algorithm or cost parameters is transparently
+    replaced by one made with the current hasher profile.
+    """
+    valid, must_update = check_password(password, user.password)
+    if valid and must_update:
+        set_user_password(user, password)
+        user.save(update_fields=['password'])
+    return valid
+
+
+async def averify_user_password(user, password):
+    valid, must_update = await acheck_password(password, user.password)
+    if valid and must_update:
+        await aset_user_password(user, password)
+        await user.asave(update_fields=['password'])
+    return valid
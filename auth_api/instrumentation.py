@@ -0,0 +1,241 @@
+"""
+Per-request instrumentation of the auth API.
+
+InstrumentationMiddleware measures wall time, SQL queries (count and time),
+password hashing time and a few events (cache hits, queued emails) per view,
+and aggregates them into in-process histograms that MetricsView exposes in
+the Prometheus text format. When AUTH_API_INSTRUMENTATION['ENABLED'] is off
+the middleware removes itself and the recording hooks reduce to one
+ContextVar lookup.
+"""
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.urls import Resolver404, resolve
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+_current = ContextVar('auth_api_request_stats', default=None)
+
+
+def get_instrumentation_setting(name, default):
+    """
+    Read a value from the optional AUTH_API_INSTRUMENTATION settings dict.
+    """
+    return getattr(settings, 'AUTH_API_INSTRUMENTATION', {}).get(name, default)
+
+
+class RequestStats:
+    """
+    Numbers collected while one request is handled.
+    """
+
+    __slots__ = ('queries', 'db_time', 'hash_time', 'events')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.hash_time = 0.0
+        self.events = {}
+
+
+def record_hash(seconds):
+    """
+    Add password hashing time to the current request, if it is instrumented.
+    """
+    stats = _current.get()
+    if stats is not None:
+        stats.hash_time += seconds
+
+
+def incr(event):
+    """
+    Count an event (e.g. 'user_cache_hit', 'email_queued') for the current request.
+    """
+    stats = _current.get()
+    if stats is not None:
+        stats.events[event] = stats.events.get(event, 0) + 1
+
+
+def _query_wrapper(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - start
+
+
+def install_query_wrapper(conn):
+    if _query_wrapper not in conn.execute_wrappers:
+        conn.execute_wrappers.append(_query_wrapper)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    # Covers connections opened in other threads, e.g. by sync_to_async
+    install_query_wrapper(connection)
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram in the Prometheus sense.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """
+    Process-wide histograms and counters keyed by (view, method).
+    """
+
+    HISTOGRAMS = {
+        'auth_api_request_duration_seconds': ('Wall time per request.', DEFAULT_BUCKETS),
+        'auth_api_request_db_seconds': ('Time spent in SQL queries per request.', DEFAULT_BUCKETS),
+        'auth_api_request_hash_seconds': ('Time spent hashing passwords per request.', DEFAULT_BUCKETS),
+        'auth_api_request_queries': ('SQL queries per request.', QUERY_BUCKETS),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {name: {} for name in self.HISTOGRAMS}
+            self._events = {}
+
+    def _observe(self, name, labels, value):
+        histogram = self._histograms[name].get(labels)
+        if histogram is None:
+            histogram = self._histograms[name][labels] = Histogram(self.HISTOGRAMS[name][1])
+        histogram.observe(value)
+
+    def observe_request(self, labels, duration, stats):
+        with self._lock:
+            self._observe('auth_api_request_duration_seconds', labels, duration)
+            self._observe('auth_api_request_db_seconds', labels, stats.db_time)
+            self._observe('auth_api_request_hash_seconds', labels, stats.hash_time)
+            self._observe('auth_api_request_queries', labels, stats.queries)
+            for event, count in stats.events.items():
+                key = labels + (event,)
+                self._events[key] = self._events.get(key, 0) + count
+
+    def render(self):
+        """
+        Return the histograms and event counters in the Prometheus text format.
+        """
+        lines = []
+        with self._lock:
+            for name, (help_text, _) in self.HISTOGRAMS.items():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for (view, method), histogram in sorted(self._histograms[name].items()):
+                    labels = f'view="{view}",method="{method}"'
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                    lines.append(f'{name}_sum{{{labels}}} {histogram.sum}')
+                    lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+            lines.append('# HELP auth_api_request_events_total Events counted while handling requests.')
+            lines.append('# TYPE auth_api_request_events_total counter')
+            for (view, method, event), count in sorted(self._events.items()):
+                lines.append(f'auth_api_request_events_total{{view="{view}",method="{method}",event="{event}"}} {count}')
+        return lines
+
+
+registry = Registry()
+
+
+def render_counters(name, help_text, counts, label='kind'):
+    """
+    Render a dict of counters as one Prometheus counter family.
+    """
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+    lines.extend(f'{name}{{{label}="{key}"}} {value}' for key, value in sorted(counts.items()))
+    return lines
+
+
+class InstrumentationMiddleware:
+    """
+    Record per-view wall time, SQL queries, hashing time and events.
+
+    Place it first in MIDDLEWARE so that the other middleware is measured too.
+    Raises MiddlewareNotUsed when instrumentation is disabled, so a disabled
+    setup has no per-request cost at all.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not get_instrumentation_setting('ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.server_timing = get_instrumentation_setting('SERVER_TIMING', False)
+        connection_created.connect(_on_connection_created, dispatch_uid='auth_api.instrumentation')
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        install_query_wrapper(connection)
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats, time.perf_counter() - start)
+
+    def finish(self, request, response, stats, duration):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            # Answered by a middleware before URL resolution (e.g. AuthStatusMiddleware)
+            try:
+                match = resolve(request.path_info)
+            except Resolver404:
+                pass
+        view = (match.url_name or match.view_name) if match else 'unmatched'
+        registry.observe_request((view, request.method), duration, stats)
+        if self.server_timing:
+            response['Server-Timing'] = (
+                f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries", '
+                f'hash;dur={stats.hash_time * 1000:.2f}, '
+                f'total;dur={duration * 1000:.2f}'
+            )
+        return response
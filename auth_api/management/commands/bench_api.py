@@ -0,0 +1,225 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import urlsafe_base64_encode
+
+from auth_api.benchmarking import benchmark_database, percentile, seed_users
+from auth_api.models import User
+
+PASSWORD = 'Bench-Passw0rd!'
+OTHER_PASSWORD = 'Other-Passw0rd!'
+API = '/api/auth-api'
+
+
+def link(email):
+    user = User.objects.get(email=email)
+    return {'uid': urlsafe_base64_encode(str(user.pk).encode()), 'token': default_token_generator.make_token(user)}
+
+
+class Worker:
+    """
+    One simulated client: its own test Client, seeded account and password.
+    """
+
+    def __init__(self, index, email):
+        self.index = index
+        self.client = Client(REMOTE_ADDR=f'10.0.{index // 250}.{index % 250 + 1}')
+        self.email = email
+        self.password = PASSWORD
+        self.registered = []
+
+    def request(self, method, path, data=None):
+        call = getattr(self.client, method)
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            if data is None:
+                response = call(f'{API}{path}')
+            else:
+                response = call(f'{API}{path}', data, content_type='application/json')
+            elapsed = time.perf_counter() - start
+        return response.status_code, elapsed, len(captured.captured_queries)
+
+    # Each step returns (method, path, data, expected status); setup runs unmeasured
+
+    def register(self, i):
+        email = f'w{self.index}-{i}@bench.example.com'
+        self.registered.append(email)
+        return 'post', '/register/', {'email': email, 'password': PASSWORD, 'confirm_password': PASSWORD}, 201
+
+    def activate(self, i):
+        return 'post', '/activate/confirm/', link(self.registered[i % len(self.registered)]), 200
+
+    def login(self, i):
+        return 'post', '/login/', {'email': self.email, 'password': self.password}, 200
+
+    def check_authenticated(self, i):
+        return 'get', '/check-authenticated/', None, 200
+
+    def user_detail(self, i):
+        return 'get', '/user-detail/', None, 200
+
+    def profile_get(self, i):
+        return 'get', '/profile/', None, 200
+
+    def profile_put(self, i):
+        return 'put', '/profile/', {'mobile': '9876543210', 'bio': f'Bio {i}', 'gender': 'MF'[i % 2]}, 200
+
+    def profile_delete(self, i):
+        return 'delete', '/profile/', None, 204
+
+    def profile_create(self, i):
+        return 'post', '/profile/', {'mobile': '9876543210', 'bio': 'Bio', 'gender': 'M'}, 201
+
+    def change_password(self, i):
+        # Changing the password ends the session, so log in again (unmeasured)
+        self.client.login(email=self.email, password=self.password)
+        old, self.password = self.password, OTHER_PASSWORD if self.password == PASSWORD else PASSWORD
+        return 'post', '/change-password/', {'old_password': old, 'new_password': self.password}, 200
+
+    def reset_password_email(self, i):
+        return 'post', '/reset-password-email/', {'email': self.email}, 200
+
+    def reset_password_confirm(self, i):
+        self.password = OTHER_PASSWORD if self.password == PASSWORD else PASSWORD
+        return 'post', '/reset-password/confirm/', dict(link(self.email), new_password=self.password), 200
+
+
+# Profile delete and create alternate so that every iteration has a profile to act on
+SCENARIOS = [
+    ('register', ['register']),
+    ('activate', ['activate']),
+    ('login', ['login']),
+    ('check_authenticated', ['check_authenticated']),
+    ('user_detail', ['user_detail']),
+    ('profile_get', ['profile_get']),
+    ('profile_put', ['profile_put']),
+    ('profile_delete_create', ['profile_delete', 'profile_create']),
+    ('change_password', ['change_password']),
+    ('reset_password', ['reset_password_email', 'reset_password_confirm']),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Run every auth endpoint against a throwaway SQLite database and the locmem email backend, '
+        'with one or more concurrent clients, and report throughput, latency percentiles and queries per request.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help='Requests per endpoint and worker.')
+        parser.add_argument('--workers', type=int, nargs='+', default=[1, 4],
+                            help='Concurrency levels to run, e.g. --workers 1 8.')
+        parser.add_argument('--seed-users', type=int, default=1000,
+                            help='Extra users inserted before the run (e.g. 100000).')
+        parser.add_argument('--scenarios', nargs='+', choices=[name for name, _ in SCENARIOS],
+                            help='Only run these scenarios.')
+        parser.add_argument('--fast-hasher', action='store_true',
+                            help='Hash with MD5 to measure everything except password hashing.')
+        parser.add_argument('--keep-throttling', action='store_true', help='Leave the rate limits enabled.')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout.')
+
+    def run_scenario(self, workers, steps, iterations):
+        lock = threading.Lock()
+        samples = []
+
+        def work(worker):
+            mine = []
+            try:
+                for i in range(iterations):
+                    for step in steps:
+                        method, path, data, expected = getattr(worker, step)(i)
+                        status_code, elapsed, queries = worker.request(method, path, data)
+                        mine.append((step, elapsed, queries, status_code == expected))
+            finally:
+                connection.close()
+            with lock:
+                samples.extend(mine)
+
+        # Throughput is over the wall time of the scenario, unmeasured setup included
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(workers)) as executor:
+            list(executor.map(work, workers))
+        wall = time.perf_counter() - start
+
+        timings = sorted(elapsed for _, elapsed, _, _ in samples)
+        return {
+            'requests': len(samples),
+            'errors': sum(1 for *_, ok in samples if not ok),
+            'throughput_rps': round(len(samples) / wall, 2) if wall else None,
+            'p50_ms': round(percentile(timings, 0.50) * 1000, 3),
+            'p95_ms': round(percentile(timings, 0.95) * 1000, 3),
+            'p99_ms': round(percentile(timings, 0.99) * 1000, 3),
+            'queries_per_request': round(sum(q for _, _, q, _ in samples) / len(samples), 2) if samples else 0,
+        }
+
+    def run_level(self, count, iterations, scenarios, offset):
+        caches['default'].clear()
+        workers = [Worker(offset + i, f'seed{offset + i}@example.com') for i in range(count)]
+        # Login is needed by every authenticated scenario, register by activate
+        selected = set(scenarios or [name for name, _ in SCENARIOS]) | {'login'}
+        if 'activate' in selected:
+            selected.add('register')
+        results = {}
+        for name, steps in SCENARIOS:
+            if name not in selected:
+                continue
+            results[name] = self.run_scenario(workers, steps, iterations)
+            self.stderr.write(
+                f'  {count:>3} workers  {name:<22} {results[name]["throughput_rps"]:>9} req/s  '
+                f'p95 {results[name]["p95_ms"]:>9} ms  {results[name]["queries_per_request"]:>6} q/req  '
+                f'{results[name]["errors"]} errors'
+            )
+        return results
+
+    def handle(self, *args, **options):
+        overrides = {}
+        if options['fast_hasher']:
+            overrides['PASSWORD_HASHERS'] = ['django.contrib.auth.hashers.MD5PasswordHasher']
+        if not options['keep_throttling']:
+            rest_framework = deepcopy(settings.REST_FRAMEWORK)
+            rest_framework['DEFAULT_THROTTLE_RATES'] = {}
+            overrides['REST_FRAMEWORK'] = rest_framework
+
+        seed_count = max(options['seed_users'], sum(options['workers']))
+        report = {
+            'settings': {
+                'iterations': options['iterations'],
+                'seed_users': seed_count,
+                'fast_hasher': options['fast_hasher'],
+                'throttling': options['keep_throttling'],
+                'database': settings.DATABASES['default']['ENGINE'],
+            },
+            'runs': {},
+        }
+
+        with tempfile.TemporaryDirectory() as tmp, override_settings(**overrides), \
+                benchmark_database(test_db_name=os.path.join(tmp, 'bench.sqlite3')):
+            start = time.perf_counter()
+            seed_users(seed_count, PASSWORD)
+            report['seed_seconds'] = round(time.perf_counter() - start, 3)
+            self.stderr.write(f'Seeded {seed_count} users in {report["seed_seconds"]}s')
+
+            offset = 0
+            for count in options['workers']:
+                report['runs'][str(count)] = self.run_level(count, options['iterations'], options['scenarios'], offset)
+                offset += count
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f'Report written to {options["output"]}'))
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+from auth_api.benchmarking import benchmark_database, count_queries
+from auth_api.models import User
+
+
+class Command(BaseCommand):
+    help = 'Compare queries and latency of check-authenticated with and without AuthStatusMiddleware.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Polls per scenario.')
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            user = User.objects.create_user('bench@example.com', 'Bench-Passw0rd!', is_active=True)
+            modes = [
+                ('full middleware stack', {'SHORT_CIRCUIT': False}),
+                ('cache short-circuit', {'MODE': 'cache'}),
+                ('signed cookie short-circuit', {'MODE': 'signed_cookie'}),
+            ]
+            for label, status_settings in modes:
+                with override_settings(AUTH_API_AUTH_STATUS=status_settings):
+                    for who in ('anonymous', 'authenticated'):
+                        client = Client()
+                        if who == 'authenticated':
+                            client.force_login(user)
+                        # The first poll records the status, the rest are measured
+                        client.get('/api/auth-api/check-authenticated/')
+
+                        queries = 0
+                        start = time.perf_counter()
+                        for _ in range(options['requests']):
+                            response, count = count_queries(client.get, '/api/auth-api/check-authenticated/')
+                            queries += count
+                        elapsed = time.perf_counter() - start
+                        assert response.json()['isAuthenticated'] == (who == 'authenticated')
+
+                        self.stdout.write(
+                            f'{label:<28} {who:<14} {queries / options["requests"]:>5.2f} queries/req  '
+                            f'{elapsed / options["requests"] * 1e6:>8.1f} us/req'
+                        )
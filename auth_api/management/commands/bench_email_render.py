@@ -0,0 +1,61 @@
+import time
+
+from django.core.mail import EmailMultiAlternatives
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.utils.html import strip_tags
+from django.conf import settings
+
+from auth_api.utils import ACTIVATION_EMAIL, EMAIL_TEMPLATES, build_email, build_email_batch
+
+
+def legacy_build_email(kind, recipient_email, url):
+    """
+    The original rendering path: render_to_string + strip_tags on every call.
+    """
+    spec = EMAIL_TEMPLATES[kind]
+    subject = spec['subject'].format(site_name=settings.SITE_NAME)
+    html_content = render_to_string(spec['html_template'], {spec['url_variable']: url})
+    text_content = strip_tags(html_content)
+    email = EmailMultiAlternatives(subject, text_content, settings.EMAIL_HOST_USER, [recipient_email])
+    email.attach_alternative(html_content, "text/html")
+    return email
+
+
+class Command(BaseCommand):
+    help = 'Microbenchmark of the email rendering paths (no mail is sent).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=500, help='Emails rendered per path.')
+        parser.add_argument('--kind', default=ACTIVATION_EMAIL, choices=sorted(EMAIL_TEMPLATES))
+
+    def handle(self, *args, **options):
+        count, kind = options['count'], options['kind']
+        recipients = [(f'user{i}@example.com', f'{settings.SITE_DOMAIN}/activate/{i}/token/') for i in range(count)]
+
+        def legacy():
+            for email, url in recipients:
+                legacy_build_email(kind, email, url).message()
+
+        def cached():
+            for email, url in recipients:
+                build_email(kind, email, url).message()
+
+        def batched():
+            for email in build_email_batch(kind, recipients):
+                email.message()
+
+        # Warm the template caches so that only steady-state rendering is measured
+        build_email(kind, *recipients[0])
+        render_to_string(EMAIL_TEMPLATES[kind]['html_template'], {})
+
+        baseline = None
+        for name, func in [('render_to_string+strip_tags', legacy), ('cached templates', cached), ('cached batch', batched)]:
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            self.stdout.write(
+                f'{name:<28} {count / elapsed:>10.1f} emails/s  '
+                f'{elapsed / count * 1e6:>9.1f} us/email  x{baseline / elapsed:.2f}'
+            )
@@ -0,0 +1,62 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+from auth_api.hashing import HashingPool
+from auth_api.hashers import get_profile_params
+
+
+def _hash_with(hasher, password):
+    return hasher.encode(password, hasher.salt())
+
+
+class Command(BaseCommand):
+    help = 'Report password hashes/sec per core for every hasher profile.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', action='append', dest='profiles', default=None,
+                            help='Profile to benchmark (repeatable). Defaults to all configured profiles.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Pool size used for the parallel measurement.')
+        parser.add_argument('--pool', choices=['thread', 'process'], default='thread')
+        parser.add_argument('--hashes', type=int, default=20,
+                            help='Hashes per measurement on a single core.')
+
+    def handle(self, *args, **options):
+        profiles = options['profiles'] or list(settings.AUTH_API_HASHER_PROFILES)
+        workers = options['workers']
+        cores = min(workers, os.cpu_count() or 1)
+        self.stdout.write(f'{"profile":<10} {"1 core h/s":>12} {f"{workers} workers h/s":>18} {"h/s per core":>14} {"ms/hash":>9}')
+
+        for name in profiles:
+            profile = settings.AUTH_API_HASHER_PROFILES[name]
+            hasher = import_string(profile['HASHER'])(get_profile_params(name))
+            try:
+                _hash_with(hasher, 'warm-up password')
+            except ValueError as e:
+                self.stdout.write(f'{name:<10} skipped: {e}')
+                continue
+
+            count = options['hashes']
+            start = time.perf_counter()
+            for i in range(count):
+                _hash_with(hasher, f'benchmark password {i}')
+            single = count / (time.perf_counter() - start)
+
+            pool = HashingPool(kind=options['pool'], max_workers=workers, max_pending=count * workers)
+            try:
+                pool.run(_hash_with, hasher, 'warm-up password')
+                start = time.perf_counter()
+                futures = [pool.submit(_hash_with, hasher, f'benchmark password {i}') for i in range(count * workers)]
+                for future in futures:
+                    future.result()
+                parallel = count * workers / (time.perf_counter() - start)
+            finally:
+                pool.shutdown()
+
+            self.stdout.write(
+                f'{name:<10} {single:>12.2f} {parallel:>18.2f} {parallel / cores:>14.2f} {1000 / single:>9.1f}'
+            )
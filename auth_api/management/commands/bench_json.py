@@ -0,0 +1,102 @@
+import logging
+import time
+import timeit
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+from django.test import Client, RequestFactory
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+from rest_framework.request import Request
+
+from auth_api import responses
+from auth_api.benchmarking import benchmark_database, percentile
+from auth_api.models import User
+from auth_api.renderers import FastJSONParser, FastJSONRenderer, FirstRendererNegotiation
+from auth_api.serializers import UserSerializer
+
+PASSWORD = 'Bench-Passw0rd!'
+API = '/api/auth-api'
+
+ENDPOINTS = [
+    ('get_csrf_token', 'get', '/get-csrf-token/', None),
+    ('check_authenticated', 'get', '/check-authenticated/', None),
+    ('user_detail', 'get', '/user-detail/', None),
+    ('profile_get', 'get', '/profile/', None),
+    ('token_refresh_invalid', 'post', '/token/refresh/', {'refresh': 'not-a-token'}),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare DRF\'s JSON renderer, parser and content negotiation with the auth_api ones on the '
+        'small payloads this API returns, and report the latency of the small-payload endpoints.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=20000, help='Calls per micro benchmark.')
+        parser.add_argument('--requests', type=int, default=500, help='Requests per endpoint.')
+
+    def micro(self, label, func, number):
+        seconds = min(timeit.repeat(func, number=number, repeat=3))
+        self.stdout.write(f'  {label:<44} {seconds / number * 1e6:>8.2f} us')
+
+    def bench_renderers(self, user, number):
+        drf, fast = JSONRenderer(), FastJSONRenderer()
+        payloads = [
+            ('user detail', UserSerializer(user).data),
+            ('isAuthenticated', {'isAuthenticated': True}),
+            ('detail message', {'detail': 'Logged in successfully.'}),
+        ]
+        self.stdout.write('Rendering')
+        for name, data in payloads:
+            self.micro(f'{name}: DRF JSONRenderer', lambda: drf.render(data), number)
+            self.micro(f'{name}: FastJSONRenderer', lambda: fast.render(data), number)
+        self.micro('detail message: precomputed body', lambda: fast.render(responses.LOGGED_IN), number)
+
+        body = b'{"email": "bench@example.com", "password": "Bench-Passw0rd!"}'
+        self.stdout.write('Parsing')
+        self.micro('login body: DRF JSONParser', lambda: JSONParser().parse(BytesIO(body)), number)
+        self.micro('login body: FastJSONParser', lambda: FastJSONParser().parse(BytesIO(body)), number)
+
+        request = Request(RequestFactory().get(
+            '/', HTTP_ACCEPT='text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
+        ))
+        renderers = [JSONRenderer(), BrowsableAPIRenderer()]
+        self.stdout.write('Content negotiation')
+        self.micro('browser Accept: DefaultContentNegotiation',
+                   lambda: DefaultContentNegotiation().select_renderer(request, renderers), number)
+        self.micro('browser Accept: FirstRendererNegotiation',
+                   lambda: FirstRendererNegotiation().select_renderer(request, renderers), number)
+
+    def bench_endpoints(self, client, count):
+        # The expected 4xx responses would otherwise be logged on every request
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        self.stdout.write(f'Endpoints ({count} requests each)')
+        self.stdout.write(f'  {"endpoint":<24} {"status":>6} {"p50 us":>9} {"p95 us":>9} {"p99 us":>9}')
+        for name, method, path, data in ENDPOINTS:
+            call = getattr(client, method)
+            args = (f'{API}{path}',) if data is None else (f'{API}{path}', data)
+            kwargs = {} if data is None else {'content_type': 'application/json'}
+            # Warm the session and user caches first
+            status_code = call(*args, **kwargs).status_code
+            timings = []
+            for _ in range(count):
+                start = time.perf_counter()
+                call(*args, **kwargs)
+                timings.append(time.perf_counter() - start)
+            timings.sort()
+            self.stdout.write(
+                f'  {name:<24} {status_code:>6} {percentile(timings, 0.50) * 1e6:>9.1f} '
+                f'{percentile(timings, 0.95) * 1e6:>9.1f} {percentile(timings, 0.99) * 1e6:>9.1f}'
+            )
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            user = User.objects.create_user('bench@example.com', PASSWORD, is_active=True)
+            self.bench_renderers(User.objects.select_related('profile').get(pk=user.pk), options['number'])
+
+            client = Client()
+            client.login(email='bench@example.com', password=PASSWORD)
+            self.bench_endpoints(client, options['requests'])
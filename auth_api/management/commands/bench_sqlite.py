@@ -0,0 +1,111 @@
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client, override_settings
+
+from auth_api.benchmarking import benchmark_database, percentile, seed_users
+
+PASSWORD = 'Bench-Passw0rd!'
+API = '/api/auth-api'
+
+# (label, ENGINE, pragmas enabled)
+MODES = {
+    'stock': ('django.db.backends.sqlite3', False),
+    'tuned': ('auth_api.db_backends.sqlite3', True),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure write throughput of registration and login on a SQLite file with N concurrent threads, '
+        'with the stock backend (rollback journal, deferred transactions) and the tuned one '
+        '(WAL, synchronous=NORMAL, busy_timeout, mmap, BEGIN IMMEDIATE).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, nargs='+', default=[1, 4, 8], help='Concurrency levels to run.')
+        parser.add_argument('--iterations', type=int, default=25, help='Register + login pairs per thread.')
+        parser.add_argument('--modes', nargs='+', choices=sorted(MODES), default=['stock', 'tuned'])
+        parser.add_argument('--real-hasher', action='store_true',
+                            help='Hash passwords for real instead of with MD5 (measures hashing, not writes).')
+
+    def use_mode(self, mode):
+        engine, enabled = MODES[mode]
+        connections['default'].close()
+        connections.settings['default']['ENGINE'] = engine
+        # Threads create their wrappers from the settings; drop this thread's one
+        del connections['default']
+        return override_settings(AUTH_API_SQLITE=dict(settings.AUTH_API_SQLITE, ENABLED=enabled))
+
+    def run_level(self, threads, iterations, run_id):
+        lock = threading.Lock()
+        samples = []
+
+        def work(index):
+            client = Client(REMOTE_ADDR=f'10.1.{index // 250}.{index % 250 + 1}')
+            mine = []
+            try:
+                for i in range(iterations):
+                    email = f'{run_id}-{index}-{i}@bench.example.com'
+                    for kind, path, data, expected in (
+                        ('register', '/register/', {'email': email, 'password': PASSWORD, 'confirm_password': PASSWORD}, 201),
+                        ('login', '/login/', {'email': f'seed{index}@example.com', 'password': PASSWORD}, 200),
+                    ):
+                        start = time.perf_counter()
+                        response = client.post(f'{API}{path}', data, content_type='application/json')
+                        elapsed = time.perf_counter() - start
+                        locked = b'locked' in response.content
+                        mine.append((kind, elapsed, response.status_code == expected, locked))
+            finally:
+                connection.close()
+            with lock:
+                samples.extend(mine)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(work, range(threads)))
+        wall = time.perf_counter() - start
+
+        timings = sorted(elapsed for _, elapsed, _, _ in samples)
+        ok = sum(1 for _, _, success, _ in samples if success)
+        return {
+            'writes_per_sec': ok / wall if wall else 0.0,
+            'p95_ms': percentile(timings, 0.95) * 1000,
+            'errors': len(samples) - ok,
+            'locked': sum(1 for *_, locked in samples if locked),
+        }
+
+    def handle(self, *args, **options):
+        overrides = {}
+        if not options['real_hasher']:
+            overrides['PASSWORD_HASHERS'] = ['django.contrib.auth.hashers.MD5PasswordHasher']
+        rest_framework = deepcopy(settings.REST_FRAMEWORK)
+        rest_framework['DEFAULT_THROTTLE_RATES'] = {}
+        overrides['REST_FRAMEWORK'] = rest_framework
+        original_engine = connections.settings['default']['ENGINE']
+
+        self.stdout.write(f'{"mode":<6} {"threads":>7} {"writes/s":>9} {"p95 ms":>8} {"errors":>7} {"locked":>7}')
+        try:
+            for mode in options['modes']:
+                with tempfile.TemporaryDirectory() as tmp, override_settings(**overrides), self.use_mode(mode), \
+                        benchmark_database(test_db_name=os.path.join(tmp, 'bench.sqlite3')):
+                    seed_users(max(options['threads']), PASSWORD)
+                    for run_id, threads in enumerate(options['threads']):
+                        caches['default'].clear()
+                        result = self.run_level(threads, options['iterations'], f'{mode}{run_id}')
+                        self.stdout.write(
+                            f'{mode:<6} {threads:>7} {result["writes_per_sec"]:>9.1f} {result["p95_ms"]:>8.1f} '
+                            f'{result["errors"]:>7} {result["locked"]:>7}'
+                        )
+        finally:
+            connections['default'].close()
+            connections.settings['default']['ENGINE'] = original_engine
+            del connections['default']
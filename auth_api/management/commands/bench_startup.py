@@ -0,0 +1,115 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What a worker does before it can serve its first request
+STARTUP_SCRIPT = '''
+import django
+django.setup()
+from django.conf import settings
+from django.urls import get_resolver
+get_resolver().url_patterns
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+'''
+
+
+def parse_importtime(stderr):
+    """
+    Parse `python -X importtime` output into a list of (module, self_us, cumulative_us, depth).
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return modules
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the cold start of a worker (django.setup(), URLconf and WSGI application) with '
+        '`python -X importtime`, report the slowest packages and modules and optionally append '
+        'the result to a JSON Lines history file to track startup cost over time.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--settings-module', default=os.environ.get('DJANGO_SETTINGS_MODULE'),
+                            help='Settings module to start with, e.g. user_auth.settings_api.')
+        parser.add_argument('--runs', type=int, default=3,
+                            help='Fresh interpreters to start; the fastest run is reported.')
+        parser.add_argument('--top', type=int, default=15, help='Packages and modules to list.')
+        parser.add_argument('--history', help='Append the result to this JSON Lines file and compare with the last entry.')
+
+    def run_once(self, settings_module):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings_module, PYTHONDONTWRITEBYTECODE='')
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        wall = time.perf_counter() - start
+        if result.returncode != 0:
+            raise CommandError(f'Startup failed:\n{result.stderr[-2000:]}')
+        return wall, parse_importtime(result.stderr)
+
+    def handle(self, *args, **options):
+        settings_module = options['settings_module']
+        if not settings_module:
+            raise CommandError('Pass --settings-module or set DJANGO_SETTINGS_MODULE.')
+
+        runs = [self.run_once(settings_module) for _ in range(max(1, options['runs']))]
+        wall, modules = min(runs, key=lambda run: sum(m[1] for m in run[1]))
+
+        packages = defaultdict(int)
+        for name, self_us, _, _ in modules:
+            packages[name.split('.')[0]] += self_us
+        total_us = sum(packages.values())
+
+        report = {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'settings': settings_module,
+            'python': sys.version.split()[0],
+            'wall_ms': round(wall * 1000, 1),
+            'import_ms': round(total_us / 1000, 1),
+            'modules': len(modules),
+            'packages_ms': {
+                name: round(us / 1000, 1)
+                for name, us in sorted(packages.items(), key=lambda item: -item[1])[:options['top']]
+            },
+        }
+
+        self.stdout.write(
+            f'{settings_module}: {report["wall_ms"]} ms process start, {report["import_ms"]} ms importing '
+            f'{report["modules"]} modules (fastest of {len(runs)} runs)'
+        )
+        self.stdout.write(f'\n{"package":<32} {"self ms":>9}')
+        for name, ms in report['packages_ms'].items():
+            self.stdout.write(f'{name:<32} {ms:>9}')
+        self.stdout.write(f'\n{"module":<48} {"self ms":>9} {"cumulative ms":>14}')
+        for name, self_us, cumulative_us, _ in sorted(modules, key=lambda m: -m[1])[:options['top']]:
+            self.stdout.write(f'{name:<48} {self_us / 1000:>9.1f} {cumulative_us / 1000:>14.1f}')
+
+        if options['history']:
+            previous = None
+            if os.path.exists(options['history']):
+                with open(options['history']) as f:
+                    entries = [json.loads(line) for line in f if line.strip()]
+                previous = next((e for e in reversed(entries) if e['settings'] == settings_module), None)
+            with open(options['history'], 'a') as f:
+                f.write(json.dumps(report) + '\n')
+            if previous is not None:
+                self.stdout.write(
+                    f'\nSince {previous["timestamp"]}: import {report["import_ms"] - previous["import_ms"]:+.1f} ms, '
+                    f'modules {report["modules"] - previous["modules"]:+d}'
+                )
+            self.stderr.write(self.style.SUCCESS(f'Appended to {options["history"]}'))
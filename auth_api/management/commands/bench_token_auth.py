@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+from auth_api.benchmarking import benchmark_database, count_queries, percentile
+from auth_api.models import User
+
+
+class Command(BaseCommand):
+    help = 'Compare queries and latency of authenticated GETs with session auth and bearer access tokens.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Requests per scenario.')
+        parser.add_argument('--path', default='/api/auth-api/user-detail/', help='Authenticated endpoint to call.')
+
+    def run(self, client, path, count, **extra):
+        # Warm the session/user caches and the revocation denylist first
+        assert client.get(path, **extra).status_code == 200
+        timings, queries = [], 0
+        for _ in range(count):
+            start = time.perf_counter()
+            response, n = count_queries(client.get, path, **extra)
+            timings.append(time.perf_counter() - start)
+            queries += n
+            assert response.status_code == 200
+        return sorted(timings), queries
+
+    def handle(self, *args, **options):
+        count, path = options['requests'], options['path']
+        with benchmark_database():
+            User.objects.create_user('bench@example.com', 'Bench-Passw0rd!', is_active=True)
+
+            session_client = Client()
+            session_client.login(email='bench@example.com', password='Bench-Passw0rd!')
+
+            token_client = Client()
+            tokens = token_client.post(
+                '/api/auth-api/token/',
+                {'email': 'bench@example.com', 'password': 'Bench-Passw0rd!'},
+                content_type='application/json',
+            ).json()
+
+            results = [
+                ('session', self.run(session_client, path, count)),
+                ('bearer token', self.run(token_client, path, count, HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}')),
+            ]
+
+        self.stdout.write(f'{"mode":<14} {"queries/req":>12} {"p50 us":>9} {"p95 us":>9} {"p99 us":>9}')
+        for label, (timings, queries) in results:
+            self.stdout.write(
+                f'{label:<14} {queries / count:>12.2f} {percentile(timings, 0.50) * 1e6:>9.1f} '
+                f'{percentile(timings, 0.95) * 1e6:>9.1f} {percentile(timings, 0.99) * 1e6:>9.1f}'
+            )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from auth_api import schema
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate the OpenAPI schema at build time and write it as versioned JSON/YAML files '
+        '(openapi-<version>.json/.yaml) that the schema endpoints serve instead of introspecting the API.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', help="Defaults to AUTH_API_SCHEMA['ARTIFACT_DIR'].")
+        parser.add_argument('--format', nargs='+', choices=sorted(schema.CONTENT_TYPES), default=['json', 'yaml'],
+                            dest='formats', help='Formats to write.')
+
+    def handle(self, *args, **options):
+        try:
+            paths = schema.write_artifacts(options['output_dir'], options['formats'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        for path in paths:
+            self.stdout.write(self.style.SUCCESS(f'Wrote {path} ({path.stat().st_size} bytes)'))
@@ -0,0 +1,71 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from auth_api.bulk_import import import_users
+
+
+class Command(BaseCommand):
+    help = 'Bulk import users from a CSV or JSON Lines file (columns: email, password or password_hash, is_active, is_admin).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' to read from stdin.")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], default=None,
+                            help='Input format. Inferred from the file extension when omitted.')
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help='Rows validated and inserted per transaction.')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Password hashing processes (0 hashes in this process).')
+        parser.add_argument('--inactive', action='store_true',
+                            help='Create accounts inactive unless the row sets is_active.')
+        parser.add_argument('--skip-password-validation', action='store_true',
+                            help='Do not run AUTH_PASSWORD_VALIDATORS on raw passwords.')
+        parser.add_argument('--errors', default=None,
+                            help='Write rejected rows as JSON Lines to this file.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format']
+        if fmt is None:
+            if path.endswith('.csv'):
+                fmt = 'csv'
+            elif path.endswith(('.jsonl', '.ndjson')):
+                fmt = 'jsonl'
+            else:
+                raise CommandError('Cannot infer the input format, pass --format.')
+
+        started = time.monotonic()
+
+        def progress(report):
+            elapsed = time.monotonic() - started or 1e-9
+            self.stdout.write(
+                f'{report.rows} rows read, {report.created} created, {report.skipped} skipped '
+                f'({report.rows / elapsed:.0f} rows/s)'
+            )
+
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            report = import_users(
+                stream,
+                fmt,
+                chunk_size=options['chunk_size'],
+                workers=options['workers'],
+                default_active=not options['inactive'],
+                check_passwords=not options['skip_password_validation'],
+                progress=progress,
+            )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        if options['errors'] and report.errors:
+            with open(options['errors'], 'w', encoding='utf-8') as errors_file:
+                for error in report.errors:
+                    errors_file.write(json.dumps(error) + '\n')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {report.created} of {report.rows} rows in {time.monotonic() - started:.1f}s, '
+            f'{report.skipped} skipped.'
+        ))
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from auth_api import outbox
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued activation and password reset emails from the outbox.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Number of messages sent over one mail connection.')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep polling the queue instead of exiting once it is empty.')
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Seconds to sleep between polls when --loop is given.')
+
+    def handle(self, *args, **options):
+        while True:
+            released = outbox.release_stale()
+            if released:
+                self.stdout.write(f'Released {released} stale message(s) back to the queue.')
+
+            sent, failed = outbox.drain(batch_size=options['batch_size'])
+            if sent or failed or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f'Sent {sent} message(s), {failed} failed.'))
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from auth_api.access_tokens import prune_revoked
+
+
+class Command(BaseCommand):
+    help = 'Delete the revocations of tokens that have expired anyway from auth_api_revokedtoken.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows deleted per statement.')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep pruning instead of exiting after one pass.')
+        parser.add_argument('--interval', type=float, default=3600.0,
+                            help='Seconds to sleep between passes when --loop is given.')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            total = sum(prune_revoked(batch_size=options['batch_size']))
+            self.stdout.write(self.style.SUCCESS(
+                f'Deleted {total} expired revocation(s) in {time.monotonic() - started:.2f}s.'
+            ))
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from auth_api.purge import get_purge_setting, purge_unactivated
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete accounts that were never activated once they are older than a given age, '
+        'in keyset-paginated chunks with one raw DELETE per table.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=float, default=None,
+                            help="Minimum account age in days (default: AUTH_API_PURGE['MAX_AGE_DAYS']).")
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Users deleted per transaction.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Count the rows that would be deleted without deleting them.')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between batches to limit lock pressure.')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep purging instead of exiting after one pass.')
+        parser.add_argument('--interval', type=float, default=3600.0,
+                            help='Seconds to sleep between passes when --loop is given.')
+
+    def handle(self, *args, **options):
+        max_age_days = options['older_than_days']
+        if max_age_days is None:
+            max_age_days = get_purge_setting('MAX_AGE_DAYS', 7)
+        if max_age_days < 0:
+            raise CommandError('--older-than-days must not be negative.')
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+
+        while True:
+            started = time.monotonic()
+            users = rows = 0
+            for batch in purge_unactivated(max_age_days, options['batch_size'], dry_run=options['dry_run']):
+                users += batch.users
+                rows += sum(batch.rows.values())
+                elapsed = time.monotonic() - started or 1e-9
+                self.stdout.write(
+                    f'{verb} {users} user(s), {rows} row(s) so far ({rows / elapsed:.0f} rows/s): '
+                    + ', '.join(f'{table}={count}' for table, count in sorted(batch.rows.items()))
+                )
+                if options['pause']:
+                    time.sleep(options['pause'])
+            self.stdout.write(self.style.SUCCESS(
+                f'{verb} {users} unactivated account(s) older than {max_age_days:g} day(s), '
+                f'{rows} row(s) in total, in {time.monotonic() - started:.2f}s.'
+            ))
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
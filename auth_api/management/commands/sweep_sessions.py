@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from auth_api.session_store import metrics, sweep_expired_sessions
+
+
+class Command(BaseCommand):
+    help = 'Delete expired sessions from django_session in indexed batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Sessions deleted per statement.')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep sweeping instead of exiting after one pass.')
+        parser.add_argument('--interval', type=float, default=300.0,
+                            help='Seconds to sleep between passes when --loop is given.')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between batches to limit lock pressure.')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            total = 0
+            for deleted in sweep_expired_sessions(batch_size=options['batch_size']):
+                total += deleted
+                if options['pause']:
+                    time.sleep(options['pause'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Deleted {total} expired session(s) in {time.monotonic() - started:.2f}s.'
+            ))
+            self.stdout.write(f'Session metrics for this process: {metrics.snapshot()}')
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
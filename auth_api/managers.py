@@ -1,7 +1,12 @@
 from django.contrib.auth.base_user import BaseUserManager
 from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Lower
+from django.utils import timezone
 from django.core.validators import validate_email
 from django.contrib.auth.password_validation import validate_password
+from .hashing import set_user_password
 
 class UserManager(BaseUserManager):
     """Define a model manager for User model with no username field."""
@@ -18,8 +23,10 @@ class UserManager(BaseUserManager):
             # Normalize email and create user
             email = self.normalize_email(email)
             user = self.model(email=email, **extra_fields)
-            user.set_password(password)
-            user.save(using=self._db)
+            set_user_password(user, password)
+            # The post_save provisioning (profile + group) commits with the user
+            with transaction.atomic(using=self._db):
+                user.save(using=self._db)
             return user
         except ValidationError as e:
             error_msg = ""
@@ -32,6 +39,65 @@ class UserManager(BaseUserManager):
 
             raise ValueError(f'Failed to create user: {error_msg}')
 
+    def filter_email(self, email):
+        """
+        Match `email` ignoring case; served by the unique Lower(email) index.
+        """
+        # Lowered by the database on both sides, so that its case folding applies
+        return self.alias(email_lower=Lower('email')).filter(email_lower=Lower(Value(email)))
+
+    def get_by_email(self, email):
+        """
+        Return the user with the given email, ignoring case, or None; one query.
+        """
+        if not isinstance(email, str):
+            return None
+        return self.filter_email(email).first()
+
+    async def aget_by_email(self, email):
+        if not isinstance(email, str):
+            return None
+        return await self.filter_email(email).afirst()
+
+    def get_by_natural_key(self, email):
+        """
+        Look users up by email ignoring case, for authentication and createsuperuser.
+        """
+        user = self.get_by_email(email)
+        if user is None:
+            raise self.model.DoesNotExist(f'No user with email {email!r}.')
+        return user
+
+    def set_fields(self, pk, **values):
+        """
+        Write the given columns of one user with a single UPDATE.
+
+        Skips loading the row and the post_save handlers; the cached copy of
+        the user is invalidated. Returns True when the user exists.
+        """
+        from .user_cache import invalidate_user
+
+        updated = self.filter(pk=pk).update(updated_at=timezone.now(), **values) == 1
+        if updated:
+            invalidate_user(pk)
+        return updated
+
+    def transition(self, pk, field, from_value, to_value):
+        """
+        Move one column from `from_value` to `to_value` with a conditional UPDATE.
+
+        Returns False when the column did not hold `from_value`, e.g. because a
+        concurrent request made the same transition first.
+        """
+        from .user_cache import invalidate_user
+
+        updated = self.filter(pk=pk, **{field: from_value}).update(
+            updated_at=timezone.now(), **{field: to_value}
+        ) == 1
+        if updated:
+            invalidate_user(pk)
+        return updated
+
     def create_user(self, email, password=None, **extra_fields):
         extra_fields.setdefault('is_staff', False)
         extra_fields.setdefault('is_superuser', False)
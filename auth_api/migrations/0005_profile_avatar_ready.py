@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_api', '0004_revokedtoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_ready',
+            field=models.BooleanField(default=False),
+        ),
+    ]
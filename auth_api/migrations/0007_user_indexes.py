@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:13
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_api', '0006_profile_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='auth_api_user_email_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['created_at', 'id'], name='auth_api_user_inactive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_admin', True)), fields=['email', 'id'], name='auth_api_user_admin_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_api', '0009_revokedtoken_created_at_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='outboundemail',
+            name='url',
+            field=models.URLField(blank=True, max_length=1024),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:44
+
+from django.db import migrations, models
+import django.db.models.functions.text
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def check_case_duplicates(apps, schema_editor):
+    """
+    Stop before adding the constraint if accounts differ only in the case of
+    their email; which of them to keep is for an operator to decide.
+    """
+    User = apps.get_model('auth_api', 'User')
+    users = User.objects.using(schema_editor.connection.alias)
+    duplicates = list(
+        users.values(email_lower=Lower('email')).annotate(count=Count('id')).filter(count__gt=1)
+        .values_list('email_lower', flat=True).order_by('email_lower')
+    )
+    if duplicates:
+        accounts = users.alias(email_lower=Lower('email')).filter(email_lower__in=duplicates).order_by('email_lower', 'id')
+        listing = '\n'.join(f'  {user.pk}: {user.email}' for user in accounts)
+        raise ValueError(
+            'Cannot add a case-insensitive unique constraint on User.email; '
+            f'merge or rename these accounts first:\n{listing}'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_api', '0010_outboundemail_url_blank'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_case_duplicates, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='user',
+            name='auth_api_user_email_lower_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='auth_api_user_email_lower_uniq', violation_error_message='A user with this email already exists.'),
+        ),
+    ]
@@ -1,11 +1,16 @@
+from datetime import datetime, timezone as dt_timezone
+
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractBaseUser,PermissionsMixin
 from django.urls import reverse
+from django.utils import timezone
+from .dirty import DirtyFieldsMixin
 from .managers import UserManager
 
 
 
-class User(AbstractBaseUser, PermissionsMixin):
+class User(DirtyFieldsMixin, AbstractBaseUser, PermissionsMixin):
     """
     Custom User model that extends AbstractBaseUser.
     """
@@ -25,18 +30,36 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
 
+    class Meta:
+        constraints = [
+            # One account per address whatever its case; also serves the
+            # case-insensitive lookups (UserManager.filter_email)
+            models.UniqueConstraint(
+                Lower('email'), name='auth_api_user_email_lower_uniq',
+                violation_error_message='A user with this email already exists.',
+            ),
+        ]
+        indexes = [
+            # Cleanup and reminder jobs walking unactivated accounts by age
+            models.Index(
+                fields=['created_at', 'id'], name='auth_api_user_inactive_idx', condition=models.Q(is_active=False),
+            ),
+            # Admins in the changelist ordering (email, id); the unfiltered list
+            # and the non-admin filter walk the unique email index instead
+            models.Index(fields=['email', 'id'], name='auth_api_user_admin_idx', condition=models.Q(is_admin=True)),
+        ]
+
     def get_full_name(self):
         '''
-        Returns the full name of the user.
+        Returns the full name of the user; users have no name fields, so the email.
         '''
-        full_name = '%s %s' % (self.first_name, self.last_name)
-        return full_name.strip()
+        return self.email
 
     def get_short_name(self):
         '''
-        Returns the short name for the user.
+        Returns the short name for the user: the local part of the email.
         '''
-        return self.first_name
+        return self.email.split('@', 1)[0]
 
     def get_absolute_url(self):
         """
@@ -75,7 +98,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     
 
 
-class Profile(models.Model):
+class Profile(DirtyFieldsMixin, models.Model):
     """
     Profile model associated with the User model.
     """
@@ -91,9 +114,97 @@ class Profile(models.Model):
     bio = models.TextField(max_length=500, blank=True)
     gender = models.CharField(max_length=1, choices=GENDER_CHOICES)
     avatar = models.ImageField(upload_to='avatars/', null=True, blank=True)
+    # Set once the thumbnails of the current avatar are rendered (see auth_api.avatars)
+    avatar_ready = models.BooleanField(default=False)
+    # Bumped on every change; the profile ETag is derived from it
+    version = models.PositiveIntegerField(default=1)
+
+    def save(self, *args, **kwargs):
+        """
+        Bump the version whenever an existing profile actually changes.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            dirty = self.get_dirty_fields()
+            if dirty is None or dirty:
+                self.version += 1
+        super().save(*args, **kwargs)
 
     def __str__(self) -> str:
         """
         Returns a string representation of the Profile instance.
+
+        Uses the user only when it is already loaded, to avoid a query per row.
+        """
+        if Profile.user.is_cached(self):
+            return f'Profile of {self.user.email}'
+        return f'Profile of user {self.user_id}'
+
+
+
+class OutboundEmail(models.Model):
+    """
+    Queued transactional email waiting to be delivered by the outbox worker.
+    """
+
+    KIND_ACTIVATION = 'activation'
+    KIND_RESET_PASSWORD = 'reset_password'
+    KIND_CHOICES = [
+        (KIND_ACTIVATION, 'Account activation'),
+        (KIND_RESET_PASSWORD, 'Password reset'),
+    ]
+
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENDING, 'Sending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=32, choices=KIND_CHOICES)
+    recipient = models.EmailField(max_length=255)
+    # Cleared once the message is sent or has failed for good
+    url = models.URLField(max_length=1024, blank=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    # Set by the worker that claimed the message (see auth_api.outbox.claim_batch)
+    claim_token = models.CharField(max_length=32, blank=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='auth_api_outbox_due_idx'),
+        ]
+
+    def __str__(self) -> str:
+        """
+        Returns a string representation of the OutboundEmail instance.
+        """
+        return f'{self.kind} -> {self.recipient} ({self.status})'
+
+
+class RevokedToken(models.Model):
+    """
+    Revoked signed token, kept until the token would have expired anyway.
+    """
+
+    jti = models.CharField(max_length=64, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    # The denylist syncs on it (see auth_api.access_tokens.Denylist)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    @staticmethod
+    def expiry_from_timestamp(timestamp):
+        return datetime.fromtimestamp(timestamp, tz=dt_timezone.utc)
+
+    def __str__(self) -> str:
+        """
+        Returns a string representation of the RevokedToken instance.
         """
-        return self.user.get_full_name()
+        return f'{self.jti} (until {self.expires_at})'
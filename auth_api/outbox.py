@@ -0,0 +1,179 @@
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from auth_api import instrumentation
+from auth_api.models import OutboundEmail
+from auth_api.utils import EMAIL_TEMPLATES, build_email_batch
+
+
+def get_outbox_setting(name, default):
+    """
+    Read a value from the optional AUTH_API_EMAIL_OUTBOX settings dict.
+    """
+    return getattr(settings, 'AUTH_API_EMAIL_OUTBOX', {}).get(name, default)
+
+
+def enqueue_email(kind, recipient_email, url):
+    """
+    Queue an email for delivery by the outbox worker and return the queued row.
+    """
+    if kind not in EMAIL_TEMPLATES:
+        raise ValueError(f'Unknown email kind: {kind}')
+    instrumentation.incr('email_queued')
+    return OutboundEmail.objects.create(kind=kind, recipient=recipient_email, url=url)
+
+
+def enqueue_activation_email(recipient_email, activation_url):
+    return enqueue_email(OutboundEmail.KIND_ACTIVATION, recipient_email, activation_url)
+
+
+def enqueue_reset_password_email(recipient_email, reset_url):
+    return enqueue_email(OutboundEmail.KIND_RESET_PASSWORD, recipient_email, reset_url)
+
+
+def retry_delay(attempts):
+    """
+    Exponential backoff delay for a message that has failed `attempts` times.
+    """
+    base = get_outbox_setting('RETRY_BASE_SECONDS', 30)
+    ceiling = get_outbox_setting('RETRY_MAX_SECONDS', 3600)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), ceiling))
+
+
+def due_ids(batch_size, now, lock=False):
+    """
+    Return the ids of up to `batch_size` pending messages that are due.
+
+    With `lock` (inside a transaction) the rows are locked and rows locked by
+    another worker are skipped, on backends that support SKIP LOCKED.
+    """
+    due = OutboundEmail.objects.filter(
+        status=OutboundEmail.STATUS_PENDING,
+        available_at__lte=now,
+    ).order_by('available_at', 'id')
+    if lock and connections[router.db_for_write(OutboundEmail)].features.has_select_for_update_skip_locked:
+        due = due.select_for_update(skip_locked=True)
+    return list(due.values_list('id', flat=True)[:batch_size])
+
+
+def claim_batch(batch_size):
+    """
+    Atomically mark up to `batch_size` due messages as sending and return them.
+
+    Every call claims with its own token and only returns the rows carrying
+    it: a worker that read the same ids as another one but lost the race to
+    the conditional UPDATE gets nothing back, so no message is delivered
+    twice. The claim time is kept in `available_at` so that stale claims can
+    be released later.
+    """
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    with transaction.atomic(using=router.db_for_write(OutboundEmail)):
+        ids = due_ids(batch_size, now, lock=True)
+        OutboundEmail.objects.filter(
+            id__in=ids,
+            status=OutboundEmail.STATUS_PENDING,
+        ).update(status=OutboundEmail.STATUS_SENDING, available_at=now, claim_token=token)
+    return list(OutboundEmail.objects.filter(
+        claim_token=token, status=OutboundEmail.STATUS_SENDING,
+    ).order_by('id'))
+
+
+def _mark_failed(message, error):
+    max_attempts = get_outbox_setting('MAX_ATTEMPTS', 5)
+    message.attempts += 1
+    message.last_error = str(error)
+    if message.attempts >= max_attempts:
+        message.status = OutboundEmail.STATUS_FAILED
+        # The link carries a live token; drop it once the message is given up on
+        message.url = ''
+    else:
+        message.status = OutboundEmail.STATUS_PENDING
+        message.available_at = timezone.now() + retry_delay(message.attempts)
+    message.save(update_fields=['attempts', 'last_error', 'status', 'available_at', 'url'])
+
+
+def deliver(messages, connection=None):
+    """
+    Deliver the claimed messages over a single mail connection.
+
+    Returns a (sent, failed) tuple of counts.
+    """
+    sent = failed = 0
+    connection = connection or get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        for message in messages:
+            _mark_failed(message, e)
+        return sent, len(messages)
+
+    try:
+        # Render each kind in one batch, then send message by message so that a
+        # rejected recipient only fails its own row. When a batch fails to
+        # render, its messages are rendered one by one below and only the ones
+        # that still fail are marked failed.
+        emails = {}
+        for kind in {message.kind for message in messages}:
+            batch = [message for message in messages if message.kind == kind]
+            try:
+                rendered = build_email_batch(kind, [(m.recipient, m.url) for m in batch], connection=connection)
+            except Exception:
+                continue
+            emails.update(zip((m.pk for m in batch), rendered))
+
+        for message in messages:
+            try:
+                email = emails.get(message.pk)
+                if email is None:
+                    email = build_email_batch(message.kind, [(message.recipient, message.url)], connection=connection)[0]
+                connection.send_messages([email])
+            except Exception as e:
+                _mark_failed(message, e)
+                failed += 1
+            else:
+                message.status = OutboundEmail.STATUS_SENT
+                message.attempts += 1
+                message.sent_at = timezone.now()
+                message.last_error = ''
+                message.url = ''
+                message.save(update_fields=['status', 'attempts', 'sent_at', 'last_error', 'url'])
+                sent += 1
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def release_stale(timeout=None):
+    """
+    Return messages stuck in the sending state (e.g. after a worker crash) to the queue.
+    """
+    timeout = timeout or get_outbox_setting('STALE_SENDING_SECONDS', 600)
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    return OutboundEmail.objects.filter(
+        status=OutboundEmail.STATUS_SENDING,
+        available_at__lte=cutoff,
+    ).update(status=OutboundEmail.STATUS_PENDING)
+
+
+def drain(batch_size=None, connection=None):
+    """
+    Deliver every message that is currently due, one batch per connection.
+
+    Returns a (sent, failed) tuple of counts.
+    """
+    batch_size = batch_size or get_outbox_setting('BATCH_SIZE', 50)
+    total_sent = total_failed = 0
+    while True:
+        messages = claim_batch(batch_size)
+        if not messages:
+            break
+        sent, failed = deliver(messages, connection=connection)
+        total_sent += sent
+        total_failed += failed
+    return total_sent, total_failed
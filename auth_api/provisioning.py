@@ -0,0 +1,82 @@
+"""
+Profile and default group provisioning for new users.
+
+The well-known groups are looked up once per process and cached by name;
+provisioning then costs two INSERTs per user (or per batch of users) instead of
+a get_or_create, a groups.add() and a Profile.objects.create().
+"""
+import threading
+
+from django.contrib.auth.models import Group
+from django.db import transaction
+
+from auth_api.models import User, Profile
+from auth_api.user_cache import invalidate_users
+
+# Choose unique names for the groups to avoid conflicts
+ADMIN_GROUP = 'AdminProfile'
+USER_GROUP = 'UserProfile'
+
+_group_ids = {}
+_group_lock = threading.RLock()
+
+
+def get_group_id(name):
+    """
+    Return the primary key of a well-known group, creating the group if needed.
+    """
+    group_id = _group_ids.get(name)
+    if group_id is None:
+        with _group_lock:
+            group_id = _group_ids.get(name)
+            if group_id is None:
+                group_id = Group.objects.get_or_create(name=name)[0].pk
+                _group_ids[name] = group_id
+    return group_id
+
+
+def clear_group_cache():
+    """
+    Forget the cached group ids (after groups were renamed or deleted).
+    """
+    with _group_lock:
+        _group_ids.clear()
+
+
+def default_group_name(user):
+    return ADMIN_GROUP if user.is_admin else USER_GROUP
+
+
+def provision_users(users, using=None, invalidate=True):
+    """
+    Create the Profile rows and default group memberships for the given users.
+
+    Set-based: one INSERT for all memberships and one for all profiles, inside a
+    single transaction. Safe to call again for already provisioned users, and
+    usable after bulk_create, which does not send post_save. Pass
+    invalidate=False for users inserted in the same transaction, which nobody
+    can have cached yet; otherwise their cached copies are dropped in one call.
+    """
+    users = [user for user in users if user.pk is not None]
+    if not users:
+        return
+    Membership = User.groups.through
+    group_ids = {name: get_group_id(name) for name in (ADMIN_GROUP, USER_GROUP)}
+    with transaction.atomic(using=using):
+        Membership.objects.using(using).bulk_create(
+            [Membership(user_id=user.pk, group_id=group_ids[default_group_name(user)]) for user in users],
+            ignore_conflicts=True,
+        )
+        Profile.objects.using(using).bulk_create(
+            [Profile(user_id=user.pk) for user in users],
+            ignore_conflicts=True,
+        )
+    if invalidate:
+        invalidate_users([user.pk for user in users])
+
+
+def provision_user(user, using=None, invalidate=True):
+    """
+    Provision a single newly created user.
+    """
+    provision_users([user], using=using, invalidate=invalidate)
@@ -0,0 +1,129 @@
+"""
+Purge of accounts that were never activated.
+
+RegistrationView creates users inactive, and accounts whose activation link is
+never used (typically bot sign-ups) stay in auth_api_user, auth_api_profile and
+the group membership table forever. `manage.py purge_unactivated` deletes them
+once they are older than AUTH_API_PURGE['MAX_AGE_DAYS'].
+
+Candidates are walked in (created_at, id) keyset order through the partial
+index on inactive users, and each chunk is deleted with one raw DELETE per
+table holding rows that reference the users (found from the model metadata, so
+the admin log is covered when the admin is installed). Django's delete()
+collector would load every user, profile and membership, and send signals for
+each of them. No signals are sent here: an unactivated user has no session and
+cannot be in the user cache as a logged-in user.
+"""
+from collections import Counter, namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, models, router, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from auth_api.models import User
+
+
+def get_purge_setting(name, default):
+    """
+    Read a value from the optional AUTH_API_PURGE settings dict.
+    """
+    return getattr(settings, 'AUTH_API_PURGE', {}).get(name, default)
+
+
+PurgeBatch = namedtuple('PurgeBatch', ['users', 'rows'])
+
+
+def dependent_tables(model=User):
+    """
+    Return (table, column) pairs of the rows deleted along with a user: every
+    foreign key to it, which must cascade, including many-to-many link tables.
+    """
+    tables = []
+    # Hidden relations include the foreign keys of many-to-many link tables
+    for field in model._meta.get_fields(include_hidden=True):
+        if not (field.auto_created and not field.concrete and (field.one_to_many or field.one_to_one)):
+            continue
+        related = field.related_model
+        if field.on_delete is not models.CASCADE:
+            raise ValueError(f'{related._meta.label}.{field.field.name} does not cascade; users cannot be raw deleted.')
+        if any(f.auto_created and not f.concrete and (f.one_to_many or f.one_to_one)
+               for f in related._meta.get_fields(include_hidden=True)):
+            raise ValueError(f'{related._meta.label} has dependent rows of its own; users cannot be raw deleted.')
+        tables.append((related._meta.db_table, field.field.column))
+    return tables
+
+
+def stale_users(max_age_days=None, now=None):
+    """
+    Accounts created more than `max_age_days` ago that were never activated.
+
+    A user who never logged in, is not staff and is still inactive never used
+    the activation link; accounts deactivated later have a last_login.
+    """
+    if max_age_days is None:
+        max_age_days = get_purge_setting('MAX_AGE_DAYS', 7)
+    cutoff = (now or timezone.now()) - timedelta(days=max_age_days)
+    return User.objects.filter(
+        is_active=False, created_at__lt=cutoff, last_login__isnull=True, is_admin=False, is_superuser=False,
+    )
+
+
+def _count_rows(cursor, table, column, ids, quote_name):
+    placeholders = ', '.join(['%s'] * len(ids))
+    cursor.execute(f'SELECT COUNT(*) FROM {quote_name(table)} WHERE {quote_name(column)} IN ({placeholders})', ids)
+    return cursor.fetchone()[0]
+
+
+def _delete_rows(cursor, table, column, ids, quote_name):
+    placeholders = ', '.join(['%s'] * len(ids))
+    cursor.execute(f'DELETE FROM {quote_name(table)} WHERE {quote_name(column)} IN ({placeholders})', ids)
+    return cursor.rowcount
+
+
+def purge_unactivated(max_age_days=None, batch_size=None, dry_run=False, now=None):
+    """
+    Delete stale unactivated accounts in keyset-paginated chunks.
+
+    Yields a PurgeBatch per chunk: the number of users and a Counter of rows
+    per table deleted (or, with `dry_run`, that would be deleted).
+    """
+    batch_size = batch_size or get_purge_setting('BATCH_SIZE', 1000)
+    # One cutoff for the whole pass, so that pages and re-checks agree
+    now = now or timezone.now()
+    candidates = stale_users(max_age_days, now).order_by('created_at', 'id')
+    using = router.db_for_write(User)
+    quote_name = connections[using].ops.quote_name
+    tables = dependent_tables()
+    user_table, user_pk = User._meta.db_table, User._meta.pk.column
+
+    last = None
+    while True:
+        page = candidates
+        if last is not None:
+            page = page.filter(Q(created_at__gt=last[0]) | Q(created_at=last[0], id__gt=last[1]))
+        keys = list(page.using(using).values_list('created_at', 'id')[:batch_size])
+        if not keys:
+            return
+        last = keys[-1]
+        ids = [pk for _, pk in keys]
+
+        rows = Counter()
+        with transaction.atomic(using=using), connections[using].cursor() as cursor:
+            # Skip the users activated (or logged in) since the page was read
+            current = stale_users(max_age_days, now).using(using).filter(pk__in=ids)
+            if not dry_run:
+                current = current.select_for_update()
+            ids = list(current.values_list('id', flat=True))
+            if not ids:
+                continue
+            if dry_run:
+                for table, column in tables:
+                    rows[table] = _count_rows(cursor, table, column, ids, quote_name)
+                rows[user_table] = len(ids)
+            else:
+                for table, column in tables:
+                    rows[table] = _delete_rows(cursor, table, column, ids, quote_name)
+                rows[user_table] = _delete_rows(cursor, user_table, user_pk, ids, quote_name)
+        yield PurgeBatch(rows[user_table], rows)
@@ -0,0 +1,119 @@
+"""
+JSON renderer, parser and content negotiation for the auth API.
+
+orjson is used when it is installed and the standard library json module
+otherwise. Bodies that never change are encoded once with `static_body()` and
+passed through the renderer untouched.
+"""
+import json
+
+from rest_framework.exceptions import ParseError
+from rest_framework.negotiation import BaseContentNegotiation, DefaultContentNegotiation
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+_fallback_encoder = JSONEncoder()
+
+
+def _default(obj):
+    # Types orjson does not know (Decimal, lazy strings, querysets, ...)
+    return _fallback_encoder.default(obj)
+
+
+if orjson is not None:
+    def dumps(data):
+        return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+    loads = orjson.loads
+    DecodeError = orjson.JSONDecodeError
+else:
+    _encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+    def dumps(data):
+        return _encoder.encode(data).encode()
+
+    def loads(data):
+        return json.loads(data)
+
+    DecodeError = ValueError
+
+
+class EncodedJSON(bytes):
+    """
+    A response body that is already encoded JSON.
+    """
+
+
+def static_body(data):
+    """
+    Encode a constant response body once, at import time.
+    """
+    return EncodedJSON(dumps(data))
+
+
+class FastJSONRenderer(BaseRenderer):
+    """
+    Compact UTF-8 JSON renderer backed by orjson when available.
+    """
+
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if isinstance(data, EncodedJSON):
+            return data
+        return dumps(data)
+
+
+class FastJSONParser(BaseParser):
+    """
+    JSON parser backed by orjson when available.
+    """
+
+    media_type = 'application/json'
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if stream is None:
+            return {}
+        body = stream.read()
+        if not body:
+            return {}
+        try:
+            return loads(body)
+        except (DecodeError, UnicodeDecodeError) as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+class FirstRendererNegotiation(BaseContentNegotiation):
+    """
+    Pick a renderer without parsing the Accept header.
+
+    An explicit format one of the renderers provides (the schema's .json/.yaml
+    suffix, ?format=openapi) selects that renderer; anything else gets the
+    view's first renderer, so other `format` query values do not turn into a
+    404. Parser selection is DRF's default.
+    """
+
+    def __init__(self):
+        self._default = DefaultContentNegotiation()
+
+    def select_parser(self, request, parsers):
+        return self._default.select_parser(request, parsers)
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        fmt = format_suffix or request.query_params.get(api_settings.URL_FORMAT_OVERRIDE or '')
+        renderer = renderers[0]
+        if fmt:
+            renderer = next((candidate for candidate in renderers if candidate.format == fmt), renderer)
+        return renderer, renderer.media_type
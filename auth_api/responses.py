@@ -0,0 +1,45 @@
+"""
+Response bodies that never change, encoded once at import time.
+
+`json_response()` wraps one in a plain HttpResponse for the code paths that
+bypass DRF (the auth status short circuit and the async views).
+"""
+from django.http import HttpResponse
+
+from auth_api.renderers import static_body
+
+
+def json_response(body, status=200, **kwargs):
+    return HttpResponse(body, content_type='application/json', status=status, **kwargs)
+
+
+AUTHENTICATED = static_body({'isAuthenticated': True})
+NOT_AUTHENTICATED = static_body({'isAuthenticated': False})
+CREDENTIALS_NOT_PROVIDED = static_body({'detail': 'Authentication credentials were not provided.'})
+JSON_PARSE_ERROR = static_body({'detail': 'JSON parse error.'})
+PROFILE_DOES_NOT_EXIST = static_body({'detail': 'Profile does not exist.'})
+MISSING_UID_OR_TOKEN = static_body({'detail': 'Missing uid or token.'})
+INVALID_CREDENTIALS = static_body({'detail': 'Email or Password is incorrect.'})
+AVATAR_TOO_LARGE = static_body({'detail': 'Avatar file is too large.'})
+ACCOUNT_NOT_ACTIVATED = static_body({'detail': 'Account is not activated.'})
+UNKNOWN_EMAIL = static_body({'detail': 'User with this email does not exist.'})
+TOKEN_REVOKED = static_body({'detail': 'Token revoked successfully.'})
+TOKEN_NO_LONGER_VALID = static_body({'detail': 'Token is no longer valid.'})
+REGISTERED = static_body({'detail': 'Registration successful. Please Cheak your email Activation email sent.'})
+PROFILE_DELETED = static_body({'detail': 'Profile deleted successfully.'})
+PASSWORD_RESET = static_body({'detail': 'Password reset successful.'})
+RESET_EMAIL_SENT = static_body({'detail': 'Password reset email sent successfully.'})
+PASSWORD_CHANGED = static_body({'detail': 'Password changed successfully.'})
+NO_FILE_UPLOADED = static_body({'detail': 'No file uploaded.'})
+NEW_PASSWORD_REQUIRED = static_body({'detail': 'New password is required.'})
+LOGGED_OUT = static_body({'detail': 'Logged out successfully.'})
+LOGGED_IN = static_body({'detail': 'Logged in successfully.'})
+INVALID_RESET_LINK = static_body({'detail': 'Invalid reset password link.'})
+INVALID_OLD_PASSWORD = static_body({'detail': 'Invalid old password.'})
+INVALID_ACTIVATION_LINK = static_body({'detail': 'Invalid activation link.'})
+INVALID_IMPORT_FORMAT = static_body({'detail': 'Format must be csv or jsonl.'})
+INVALID_CURSOR = static_body({'detail': 'Invalid cursor.'})
+CSRF_COOKIE_SET = static_body({'success': 'CSRF Cookie set Successfully'})
+ALREADY_ACTIVATED = static_body({'detail': 'Account is already activated.'})
+ACCOUNT_DELETED = static_body({'detail': 'Account deleted successfully.'})
+ACTIVATED = static_body({'detail': 'Account activated successfully.'})
@@ -0,0 +1,185 @@
+"""
+Primary/replica database routing.
+
+Writes always go to the primary ('default'). Reads go to one of the aliases
+listed in AUTH_API_DB_ROUTING['REPLICAS'] unless one of these holds:
+
+- the model is listed in PRIMARY_MODELS (sessions, token revocations, the
+  email outbox), or the read belongs to an object loaded from the primary;
+- the primary has an open transaction in this thread (e.g. select_for_update);
+- the request is pinned to the primary: it uses an unsafe HTTP method, it
+  already wrote something, or the client wrote something in the last
+  PIN_SECONDS (tracked with a cookie by PrimaryPinningMiddleware), so that a
+  client always reads its own writes despite replication lag;
+- the code runs inside `use_primary()`.
+
+`use_replica()` sends the reads of a block to a replica even in a pinned
+request, for reads that tolerate lag (e.g. reports). Uniqueness checks must not
+use it: a row that has not replicated yet would pass them.
+Without replicas configured every query goes to the primary.
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PRIMARY = DEFAULT_DB_ALIAS
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_FORCE_PRIMARY = 'primary'
+_FORCE_REPLICA = 'replica'
+
+_state = ContextVar('auth_api_db_routing', default=None)
+_forced = ContextVar('auth_api_db_forced', default=None)
+
+
+def get_routing_setting(name, default):
+    """
+    Read a value from the optional AUTH_API_DB_ROUTING settings dict.
+    """
+    return getattr(settings, 'AUTH_API_DB_ROUTING', {}).get(name, default)
+
+
+def replica_aliases():
+    return [alias for alias in get_routing_setting('REPLICAS', []) if alias in connections.settings]
+
+
+def primary_models():
+    return set(get_routing_setting('PRIMARY_MODELS', ['sessions.Session']))
+
+
+class RoutingState:
+    """
+    Per-request routing flags; mutable so that writes made in other contexts
+    (e.g. sync_to_async threads) still pin the request.
+    """
+
+    __slots__ = ('pinned', 'wrote')
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+@contextmanager
+def use_primary():
+    """
+    Send every read in the block to the primary.
+    """
+    token = _forced.set(_FORCE_PRIMARY)
+    try:
+        yield
+    finally:
+        _forced.reset(token)
+
+
+@contextmanager
+def use_replica():
+    """
+    Send the reads in the block to a replica, even in a pinned request.
+    """
+    token = _forced.set(_FORCE_REPLICA)
+    try:
+        yield
+    finally:
+        _forced.reset(token)
+
+
+class PrimaryReplicaRouter:
+
+    def _pick_replica(self):
+        replicas = replica_aliases()
+        return random.choice(replicas) if replicas else PRIMARY
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        if model._meta.label in primary_models() or connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        forced = _forced.get()
+        if forced == _FORCE_PRIMARY:
+            return PRIMARY
+        if forced is None:
+            state = _state.get()
+            if state is not None and state.pinned:
+                return PRIMARY
+        return self._pick_replica()
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None and model._meta.label not in primary_models():
+            # Read your own writes for the rest of the request, and the next ones
+            state.pinned = state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {PRIMARY, *replica_aliases()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication
+        if db in replica_aliases():
+            return get_routing_setting('MIGRATE_REPLICAS', False)
+        return None
+
+
+class PrimaryPinningMiddleware:
+    """
+    Pin unsafe requests, and the requests following a write, to the primary.
+
+    Place it before SessionMiddleware so that it wraps everything that may query.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.cookie_name = get_routing_setting('PIN_COOKIE', 'db_pin')
+        self.pin_seconds = get_routing_setting('PIN_SECONDS', 5)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def start(self, request):
+        pinned = request.method not in SAFE_METHODS
+        if not pinned:
+            try:
+                pinned = float(request.COOKIES.get(self.cookie_name, 0)) > time.time()
+            except ValueError:
+                pass
+        return RoutingState(pinned)
+
+    def finish(self, response, state):
+        if state.wrote and self.pin_seconds:
+            response.set_cookie(
+                self.cookie_name, str(time.time() + self.pin_seconds), max_age=self.pin_seconds,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = self.start(request)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(response, state)
+
+    async def __acall__(self, request):
+        state = self.start(request)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(response, state)
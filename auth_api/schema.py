@@ -0,0 +1,215 @@
+"""
+OpenAPI schema documents and the views serving them.
+
+The schema is normally generated at build time by `manage.py generate_schema`
+into AUTH_API_SCHEMA['ARTIFACT_DIR']. When that file is missing it is
+generated on the first request instead (and written to CACHE_DIR, keyed by a
+fingerprint of the API source files). Either way each process loads it once
+and serves it with an ETag and a long max-age. drf_yasg (and pkg_resources,
+which it imports) is only imported when a schema has to be generated or the
+Swagger UI page is requested.
+"""
+import hashlib
+import logging
+import os
+import threading
+from collections import namedtuple
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_safe
+from rest_framework import permissions
+
+from auth_api import etags
+
+logger = logging.getLogger(__name__)
+
+TITLE = 'Django Authentication API'
+VERSION = 'v1'
+DESCRIPTION = 'This API provides user authentication, profile management, and more.'
+CONTACT_EMAIL = 'contact@authapi.com'
+
+CONTENT_TYPES = {
+    'json': 'application/json',
+    'yaml': 'application/yaml',
+}
+
+
+def get_schema_setting(name, default):
+    """
+    Read a value from the optional AUTH_API_SCHEMA settings dict.
+    """
+    return getattr(settings, 'AUTH_API_SCHEMA', {}).get(name, default)
+
+
+@lru_cache(maxsize=None)
+def get_info():
+    from drf_yasg import openapi
+
+    return openapi.Info(
+        title=TITLE,
+        default_version=VERSION,
+        description=DESCRIPTION,
+        contact=openapi.Contact(email=CONTACT_EMAIL),
+    )
+
+
+@lru_cache(maxsize=None)
+def get_schema_view_class():
+    """
+    Build the drf_yasg SchemaView class on first use.
+    """
+    from drf_yasg.views import get_schema_view
+
+    return get_schema_view(get_info(), public=True, permission_classes=(permissions.AllowAny,))
+
+
+@lru_cache(maxsize=None)
+def fingerprint():
+    """
+    Hash of everything the generated schema depends on: the drf_yasg version,
+    the URLconf and the API package's source files.
+    """
+    import drf_yasg
+
+    digest = hashlib.sha256(f'{drf_yasg.__version__}:{settings.ROOT_URLCONF}:{VERSION}'.encode())
+    package = Path(__file__).resolve().parent
+    for path in sorted(package.glob('*.py')):
+        stat = path.stat()
+        digest.update(f'{path.name}:{stat.st_mtime_ns}:{stat.st_size}'.encode())
+    return digest.hexdigest()[:16]
+
+
+def generate_schema(fmt):
+    """
+    Introspect every view and serializer and encode the schema as JSON or YAML.
+    """
+    from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+
+    generator = get_schema_view_class().generator_class(get_info(), VERSION)
+    schema = generator.get_schema(request=None, public=True)
+    codec = OpenAPICodecJson([]) if fmt == 'json' else OpenAPICodecYaml([])
+    return codec.encode(schema)
+
+
+def artifact_path(fmt, directory=None):
+    directory = directory or get_schema_setting('ARTIFACT_DIR', None)
+    if not directory:
+        return None
+    return Path(directory) / f'openapi-{VERSION}.{fmt}'
+
+
+def cache_path(fmt):
+    cache_dir = get_schema_setting('CACHE_DIR', None)
+    if not cache_dir:
+        return None
+    return Path(cache_dir) / f'openapi-{VERSION}-{fingerprint()}.{fmt}'
+
+
+def write_atomic(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write and rename so that concurrent workers never read half a file
+    tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+    tmp.write_bytes(content)
+    os.replace(tmp, path)
+
+
+def write_artifacts(directory=None, formats=('json', 'yaml')):
+    """
+    Generate the schema and write the build artifacts; returns the written paths.
+    """
+    paths = []
+    for fmt in formats:
+        path = artifact_path(fmt, directory)
+        if path is None:
+            raise ValueError('No output directory given and AUTH_API_SCHEMA has no ARTIFACT_DIR.')
+        write_atomic(path, generate_schema(fmt))
+        paths.append(path)
+    return paths
+
+
+def load_schema(fmt):
+    """
+    Read the build artifact, else the disk cache, else generate (and cache) the schema.
+    """
+    for path in (artifact_path(fmt), cache_path(fmt)):
+        if path is not None:
+            try:
+                return path.read_bytes()
+            except FileNotFoundError:
+                pass
+
+    content = generate_schema(fmt)
+    path = cache_path(fmt)
+    if path is not None:
+        try:
+            write_atomic(path, content)
+        except OSError:
+            logger.warning('Could not cache the OpenAPI schema in %s', path, exc_info=True)
+    return content
+
+
+SchemaDocument = namedtuple('SchemaDocument', ['content', 'etag'])
+
+_documents = {}
+_documents_lock = threading.Lock()
+
+
+def get_schema(fmt):
+    """
+    Return the encoded schema and its ETag, loaded once per process.
+    """
+    document = _documents.get(fmt)
+    if document is None:
+        with _documents_lock:
+            document = _documents.get(fmt)
+            if document is None:
+                content = load_schema(fmt)
+                document = _documents[fmt] = SchemaDocument(content, f'"{hashlib.sha256(content).hexdigest()[:32]}"')
+    return document
+
+
+def clear_schema_cache():
+    """
+    Forget the in-process copies, e.g. after regenerating the artifacts.
+    """
+    with _documents_lock:
+        _documents.clear()
+
+
+def schema_response(request, fmt, content_type):
+    document = get_schema(fmt)
+    if etags.if_none_match(request, document.etag):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(document.content, content_type=content_type)
+    response['ETag'] = document.etag
+    patch_cache_control(response, public=True, max_age=get_schema_setting('MAX_AGE', 86400))
+    return response
+
+
+@require_safe
+def schema_document(request, format):
+    """
+    Serve /swagger.json and /swagger.yaml.
+    """
+    fmt = format.lstrip('.')
+    return schema_response(request, fmt, CONTENT_TYPES[fmt])
+
+
+@lru_cache(maxsize=None)
+def get_swagger_ui_view():
+    return get_schema_view_class().with_ui('swagger', cache_timeout=0)
+
+
+@require_safe
+def swagger_ui(request):
+    """
+    Serve the Swagger UI page, and the schema it loads from ?format=openapi.
+    """
+    if request.GET.get('format') == 'openapi':
+        return schema_response(request, 'json', 'application/openapi+json')
+    return get_swagger_ui_view()(request)
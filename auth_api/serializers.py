@@ -2,6 +2,7 @@ from django.core.exceptions import ValidationError
 from django.core.validators import validate_email
 from rest_framework import serializers
 from auth_api.models import User, Profile
+from auth_api import avatars, routers
 import re
 
 class UserSerializer(serializers.ModelSerializer):
@@ -17,6 +18,8 @@ class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ["email", "password", "confirm_password"]
+        # validate_email checks uniqueness (ignoring case); skip the UniqueValidator's second query
+        extra_kwargs = {"email": {"validators": []}}
 
     def validate(self, attrs):
         """
@@ -31,15 +34,23 @@ class UserSerializer(serializers.ModelSerializer):
     
     def validate_email(self, value):
         """
-        Custom validation to check if a user with the given email already exists.
-        Also, checks if the email format is valid.
+        Custom validation to check if a user with the given email already exists,
+        ignoring case. Also, checks if the email format is valid.
         """
         try:
             validate_email(value)
         except ValidationError:
             raise serializers.ValidationError('Enter a valid email address.')
 
-        if User.objects.filter(email=value).exists():
+        # Checked on the primary: a duplicate that has not reached a replica
+        # yet would otherwise only be caught by the unique constraint, as an
+        # IntegrityError instead of a validation error
+        others = User.objects.filter_email(value)
+        if self.instance is not None:
+            others = others.exclude(pk=self.instance.pk)
+        with routers.use_primary():
+            taken = others.exists()
+        if taken:
             raise serializers.ValidationError('A user with this email already exists.')
         
         return value
@@ -51,14 +62,15 @@ class UserSerializer(serializers.ModelSerializer):
         user = User.objects.create_user(
             email=validated_data['email'],
             password=validated_data['password'],
+            is_active=False,
         )
-        user.is_active = False
-        user.save()
         return user
     
     def update(self, instance, validated_data):
         """
         Custom update method to handle user updates.
+
+        Only changed columns are written (see DirtyFieldsMixin).
         """
         instance.email = validated_data.get('email', instance.email)
         instance.save()
@@ -72,9 +84,69 @@ class ProfileSerializer(serializers.ModelSerializer):
     Handles profile creation, update, and validation.
     """
 
+    avatar_url = serializers.SerializerMethodField()
+    avatar_thumbnails = serializers.SerializerMethodField()
+
     class Meta:
         model = Profile
-        fields = ['mobile', 'location', 'dob', 'bio', 'gender', 'avatar']
+        fields = ['mobile', 'location', 'dob', 'bio', 'gender', 'avatar', 'avatar_url', 'avatar_thumbnails']
+
+    # The validated upload, stored by create/update together with the profile
+    _avatar_upload = None
+
+    def validate_avatar(self, value):
+        """
+        Check the uploaded avatar and return the storage name of its content hash.
+        """
+        if value is None:
+            return None
+        try:
+            name = avatars.avatar_name(value)
+        except avatars.AvatarError as e:
+            raise serializers.ValidationError(str(e))
+        self._avatar_upload = value
+        return name
+
+    def get_avatar_thumbnails(self, obj):
+        """
+        URLs of every thumbnail size and format, or None while they are rendered.
+        """
+        thumbnails = avatars.avatar_urls(obj)
+        if thumbnails is None:
+            return None
+        return {size: {fmt: self._absolute(url) for fmt, url in urls.items()} for size, urls in thumbnails.items()}
+
+    def _absolute(self, url):
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
+
+    def get_avatar_url(self, obj):
+        """
+        URL of the size and format asked for with `avatar_size` and `avatar_format`.
+
+        Falls back to the original image until the thumbnails are ready.
+        """
+        if not obj.avatar:
+            return None
+        thumbnails = avatars.avatar_urls(obj)
+        if thumbnails is None:
+            return self._absolute(obj.avatar.url)
+        request = self.context.get('request')
+        # GET rather than query_params: the async views pass a plain HttpRequest
+        params = request.GET if request is not None else {}
+        sizes = thumbnails.get(params.get('avatar_size'), thumbnails.get('medium') or next(iter(thumbnails.values())))
+        return self._absolute(sizes.get(params.get('avatar_format'), next(iter(sizes.values()))))
+
+    def _set_avatar(self, profile, validated_data):
+        """
+        Point the profile at a newly stored avatar; returns True when it changed.
+        """
+        name = validated_data.get('avatar', profile.avatar.name or None)
+        if name == (profile.avatar.name or None):
+            return False
+        profile.avatar = name
+        profile.avatar_ready = False
+        return True
 
     def validate_mobile(self, value):
         """
@@ -91,18 +163,26 @@ class ProfileSerializer(serializers.ModelSerializer):
         Custom create method to handle profile creation.
         """
         user = self.context['request'].user
-        profile = Profile.objects.create(user=user, **validated_data)
+        with avatars.storing_avatar(self._avatar_upload, validated_data.get('avatar')):
+            profile = Profile.objects.create(user=user, **validated_data)
+        if profile.avatar:
+            avatars.schedule_thumbnails(profile)
         return profile
 
     def update(self, instance, validated_data):
         """
         Custom update method to handle profile updates.
+
+        Only changed columns are written (see DirtyFieldsMixin).
         """
         instance.mobile = validated_data.get('mobile', instance.mobile)
         instance.location = validated_data.get('location', instance.location)
         instance.dob = validated_data.get('dob', instance.dob)
         instance.bio = validated_data.get('bio', instance.bio)
         instance.gender = validated_data.get('gender', instance.gender)
-        instance.avatar = validated_data.get('avatar', instance.avatar)
-        instance.save()
+        avatar_changed = self._set_avatar(instance, validated_data)
+        with avatars.storing_avatar(self._avatar_upload if avatar_changed else None, instance.avatar.name):
+            instance.save()
+        if avatar_changed and instance.avatar:
+            avatars.schedule_thumbnails(instance)
         return instance
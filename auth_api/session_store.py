@@ -0,0 +1,153 @@
+"""
+Write-behind cached database session engine.
+
+Set SESSION_ENGINE = 'auth_api.session_store'. Sessions are read from the cache
+(falling back to django_session) and are written to the database only when
+their data changed or when a sliding expiry moved further than
+AUTH_API_SESSIONS['EXPIRY_REFRESH_SECONDS'] past the stored one. Use a cache
+shared by all workers (Redis, Memcached) in production, otherwise a worker can
+serve data another worker has already changed.
+"""
+import hashlib
+import threading
+
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.contrib.sessions.models import Session
+from django.utils import timezone
+
+KEY_PREFIX = 'auth_api.session_store'
+
+
+def get_session_setting(name, default):
+    """
+    Read a value from the optional AUTH_API_SESSIONS settings dict.
+    """
+    return getattr(settings, 'AUTH_API_SESSIONS', {}).get(name, default)
+
+
+class SessionMetrics:
+    """
+    Process-wide counters of session cache and database traffic.
+    """
+
+    FIELDS = ('cache_hits', 'db_reads', 'db_writes', 'writes_skipped', 'deletes')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def incr(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def reset(self):
+        with self._lock:
+            self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+
+metrics = SessionMetrics()
+
+
+class SessionStore(CachedDBStore):
+    """
+    cached_db session store that skips redundant database writes.
+
+    The cache entry remembers the expiry stored in the database, so a save with
+    unchanged data only touches the database once the sliding expiry has moved
+    far enough to matter.
+    """
+
+    cache_key_prefix = KEY_PREFIX
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        self._loaded_digest = None
+        self._db_expire = None
+
+    def _digest(self, data):
+        return hashlib.sha256(self.serializer().dumps(data)).hexdigest()
+
+    def load(self):
+        try:
+            entry = self._cache.get(self.cache_key)
+        except Exception:
+            # Some backends (e.g. memcache) raise an exception on invalid
+            # cache keys. If this happens, reset the session.
+            entry = None
+
+        if entry is not None:
+            metrics.incr('cache_hits')
+            data, self._db_expire = entry['data'], entry['expire']
+        else:
+            metrics.incr('db_reads')
+            s = self._get_session_from_db()
+            if s:
+                data = self.decode(s.session_data)
+                self._db_expire = s.expire_date.timestamp()
+                self._set_cache_entry(data, s.expire_date)
+            else:
+                data = {}
+                self._db_expire = None
+
+        self._loaded_digest = self._digest(data)
+        return data
+
+    def _set_cache_entry(self, data, expire_date):
+        self._cache.set(
+            self.cache_key,
+            {'data': data, 'expire': expire_date.timestamp()},
+            self.get_expiry_age(expiry=expire_date),
+        )
+
+    def _needs_write(self, data):
+        if self._loaded_digest is None or self._db_expire is None:
+            return True
+        if self._digest(data) != self._loaded_digest:
+            return True
+        threshold = get_session_setting('EXPIRY_REFRESH_SECONDS', 300)
+        return self.get_expiry_date().timestamp() - self._db_expire > threshold
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        data = self._get_session(no_load=must_create)
+        if not must_create and not self._needs_write(data):
+            metrics.incr('writes_skipped')
+            return
+
+        DBStore.save(self, must_create)
+        metrics.incr('db_writes')
+        expire_date = self.get_expiry_date()
+        self._db_expire = expire_date.timestamp()
+        self._loaded_digest = self._digest(data)
+        self._set_cache_entry(data, expire_date)
+
+    def delete(self, session_key=None):
+        super().delete(session_key)
+        metrics.incr('deletes')
+
+
+def sweep_expired_sessions(batch_size=None, now=None):
+    """
+    Delete expired sessions in primary-key batches found through the expire_date index.
+
+    Yields the number of rows deleted per batch, so callers can report progress.
+    """
+    batch_size = batch_size or get_session_setting('SWEEP_BATCH_SIZE', 1000)
+    now = now or timezone.now()
+    while True:
+        keys = list(
+            Session.objects.filter(expire_date__lt=now)
+            .order_by('expire_date')
+            .values_list('session_key', flat=True)[:batch_size]
+        )
+        if not keys:
+            return
+        deleted, _ = Session.objects.filter(session_key__in=keys).delete()
+        yield deleted
@@ -1,16 +1,19 @@
 # Import necessary modules and classes
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.contrib.auth.models import Group
 from django.dispatch import receiver
 from .models import Profile
+from .provisioning import clear_group_cache, provision_user
+from .user_cache import invalidate_user
 from django.contrib.auth import get_user_model
 
 # Get the User model
 User = get_user_model()
 
-# Define a signal receiver function for post-save
-@receiver(post_save, sender=User)
-def User_Profile_group_Creation(sender, instance, created, **kwargs):
+# Define a signal receiver function for post-save. The dispatch_uid keeps the
+# handler registered exactly once, however often this module is imported.
+@receiver(post_save, sender=User, dispatch_uid='auth_api.user_profile_group_creation')
+def User_Profile_group_Creation(sender, instance, created, raw=False, using=None, **kwargs):
     """
     Signal receiver function to create a user profile and assign them to a custom group based on their role.
 
@@ -18,26 +21,41 @@ def User_Profile_group_Creation(sender, instance, created, **kwargs):
         sender: The model class that sent the signal (User in this case).
         instance: The actual instance of the model that was saved.
         created: A boolean indicating whether the instance was created.
+        raw: True when the instance is loaded from a fixture.
+        using: The database alias the instance was saved to.
         **kwargs: Additional keyword arguments.
 
     Returns:
         None
     """
-    # Check if a new user instance was created
-    if created:
-        # Choose unique names for the groups to avoid conflicts
-        admin_group_name = 'AdminProfile'
-        user_group_name = 'UserProfile'
-        
-        # Check if the user is an admin
-        if instance.is_admin:
-            # Get or create the admin group and add the user to it
-            admin_group, created = Group.objects.get_or_create(name=admin_group_name)
-            instance.groups.add(admin_group)
-        else:
-            # Get or create the user profile group and add the user to it
-            user_group, created = Group.objects.get_or_create(name=user_group_name)
-            instance.groups.add(user_group)
-        
-        # Create a profile for the user
-        Profile.objects.create(user=instance)
+    # Check if a new user instance was created (fixtures bring their own rows);
+    # invalidate_cached_user below already bumps the new user's version
+    if created and not raw:
+        provision_user(instance, using=using, invalidate=False)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def reset_group_cache(sender, **kwargs):
+    """
+    Drop the cached group ids whenever a group changes.
+    """
+    clear_group_cache()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """
+    Invalidate the cached copy of a user whenever the user row changes.
+    """
+    invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_cached_profile(sender, instance, **kwargs):
+    """
+    Invalidate the cached user (which carries the profile) whenever the profile changes.
+    """
+    invalidate_user(instance.user_id)
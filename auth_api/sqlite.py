@@ -0,0 +1,49 @@
+"""
+SQLite tuning for single-node deployments.
+
+The connection_created receiver below applies AUTH_API_SQLITE['PRAGMAS'] to
+every new SQLite connection: WAL lets readers run alongside the single writer,
+synchronous=NORMAL is durable in WAL mode except for the last transactions on
+power loss, busy_timeout makes writers wait for the lock instead of failing
+with "database is locked", and mmap_size serves reads from the page cache.
+
+The 'auth_api.db_backends.sqlite3' backend additionally starts transactions
+with BEGIN IMMEDIATE: a deferred transaction that reads before it writes
+cannot wait for the write lock (SQLite fails it at once to avoid a deadlock),
+while an immediate one takes the lock up front and honours busy_timeout.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 128 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+def get_sqlite_setting(name, default):
+    """
+    Read a value from the optional AUTH_API_SQLITE settings dict.
+    """
+    return getattr(settings, 'AUTH_API_SQLITE', {}).get(name, default)
+
+
+def apply_pragmas(cursor, pragmas):
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(connection_created, dispatch_uid='auth_api.sqlite.configure_connection')
+def configure_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite' or not get_sqlite_setting('ENABLED', False):
+        return
+    pragmas = dict(get_sqlite_setting('PRAGMAS', DEFAULT_PRAGMAS))
+    if connection.is_in_memory_db():
+        # In-memory databases have no journal file to switch to WAL
+        pragmas.pop('journal_mode', None)
+    # Straight on the DB-API connection: no query logging or instrumentation
+    apply_pragmas(connection.connection, pragmas)
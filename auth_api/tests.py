@@ -1,3 +1,1483 @@
-from django.test import TestCase
+import csv
+import importlib
+import io
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from copy import deepcopy
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.contrib.admin.models import DELETION, LogEntry
+from django.contrib.auth.models import Group
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.tokens import default_token_generator
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.sessions.models import Session
+from django.core import mail
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed, ValidationError
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections, router, transaction
+from django.db.models import F
+from django.db.utils import DatabaseError, IntegrityError, OperationalError
+from django.http import HttpResponse
+from django.test import (
+    AsyncClient, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings,
+)
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import urlsafe_base64_encode
+from django.utils.translation import gettext_lazy
+
+from auth_api import (
+    access_tokens, avatars, bulk_import, etags, hashing, instrumentation, outbox, provisioning, renderers, responses,
+    schema, session_store, user_cache, user_listing, utils, verification,
+)
+from auth_api.backends import EmailBackend
+from auth_api.checks import check_auth_status_cache_is_shared, check_user_cache_is_shared
+from auth_api.db_backends.sqlite3.base import DatabaseWrapper as SQLiteWrapper
+from auth_api.db_pool import ConnectionPool
+from auth_api.hashing import HashingPool, HashingPoolBusy
+from auth_api.models import OutboundEmail, Profile, RevokedToken, User
+from auth_api.provisioning import clear_group_cache
+from auth_api.purge import purge_unactivated, stale_users
+from auth_api.routers import PrimaryPinningMiddleware, use_primary, use_replica
+from auth_api.session_store import SessionStore, sweep_expired_sessions
+
+PASSWORD = 'Bench-Passw0rd!'
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class QueryCountTestCase(TestCase):
+    """
+    Base class that starts every test with empty caches (sessions, user cache,
+    throttle counters, group ids) so query counts do not depend on test order.
+    """
+
+    def setUp(self):
+        caches['default'].clear()
+        clear_group_cache()
+
+    def create_active_user(self, email='user@example.com'):
+        return User.objects.create_user(email, PASSWORD, is_active=True)
+
+    def link(self, user):
+        user = User.objects.get(pk=user.pk)
+        return urlsafe_base64_encode(str(user.pk).encode()), default_token_generator.make_token(user)
+
+    def post(self, url, data, **extra):
+        return self.client.post(url, data, content_type='application/json', **extra)
+
+
+class DirtyFieldsTests(QueryCountTestCase):
+
+    def test_unchanged_save_is_skipped(self):
+        user = User.objects.get(pk=self.create_active_user().pk)
+        with self.assertNumQueries(0):
+            user.save()
+
+    def test_save_writes_only_changed_columns(self):
+        user = User.objects.get(pk=self.create_active_user().pk)
+        user.is_admin = True
+        with CaptureQueriesContext(connection) as ctx:
+            user.save()
+        self.assertEqual(len(ctx), 1)
+        sql = ctx.captured_queries[0]['sql']
+        self.assertIn('"is_admin"', sql)
+        self.assertIn('"updated_at"', sql)
+        self.assertNotIn('"email"', sql)
+        self.assertNotIn('"password"', sql)
+
+    def test_profile_save_writes_only_changed_columns(self):
+        profile = Profile.objects.get(user=self.create_active_user())
+        profile.bio = 'Hello'
+        with CaptureQueriesContext(connection) as ctx:
+            profile.save()
+        self.assertEqual(len(ctx), 1)
+        self.assertNotIn('"mobile"', ctx.captured_queries[0]['sql'])
+
+    def test_transition_is_conditional(self):
+        user = User.objects.create_user('new@example.com', PASSWORD)
+        with self.assertNumQueries(1):
+            self.assertTrue(User.objects.transition(user.pk, 'is_active', False, True))
+        self.assertFalse(User.objects.transition(user.pk, 'is_active', False, True))
+        self.assertTrue(User.objects.get(pk=user.pk).is_active)
+
+
+class EndpointQueryCountTests(QueryCountTestCase):
+
+    def login(self, user):
+        response = self.post('/api/auth-api/login/', {'email': user.email, 'password': PASSWORD})
+        self.assertEqual(response.status_code, 200)
+
+    def test_register(self):
+        data = {'email': 'new@example.com', 'password': PASSWORD, 'confirm_password': PASSWORD}
+        # uniqueness check, user, 2 group lookups, membership, profile, outbox email + savepoints
+        with self.assertNumQueries(11):
+            response = self.post('/api/auth-api/register/', data)
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(User.objects.get(email='new@example.com').is_active)
+
+    def test_activate(self):
+        user = User.objects.create_user('new@example.com', PASSWORD)
+        uid, token = self.link(user)
+        with self.assertNumQueries(2):
+            response = self.post('/api/auth-api/activate/confirm/', {'uid': uid, 'token': token})
+        self.assertEqual(response.json(), {'detail': 'Account activated successfully.'})
+        with self.assertNumQueries(1):
+            response = self.post('/api/auth-api/activate/confirm/', {'uid': uid, 'token': token})
+        self.assertEqual(response.json(), {'detail': 'Account is already activated.'})
+
+    def test_activate_rejects_malformed_link_without_queries(self):
+        with self.assertNumQueries(0):
+            response = self.post('/api/auth-api/activate/confirm/', {'uid': 'not-a-uid', 'token': '1-abc'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_user_detail(self):
+        self.login(self.create_active_user())
+        self.client.get('/api/auth-api/user-detail/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/auth-api/user-detail/')
+        self.assertEqual(response.json()['email'], 'user@example.com')
+
+    def test_user_detail_patch(self):
+        self.login(self.create_active_user())
+        self.client.get('/api/auth-api/user-detail/')
+        # uniqueness check + 1 UPDATE of email/updated_at
+        with self.assertNumQueries(2):
+            response = self.client.patch(
+                '/api/auth-api/user-detail/', {'email': 'other@example.com'}, content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_profile_put(self):
+        self.login(self.create_active_user())
+        self.client.get('/api/auth-api/profile/')
+        data = {'mobile': '9876543210', 'bio': 'Hello', 'gender': 'M'}
+        with self.assertNumQueries(1):
+            response = self.client.put('/api/auth-api/profile/', data, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Profile.objects.get().bio, 'Hello')
+
+    def test_change_password(self):
+        self.login(self.create_active_user())
+        self.client.get('/api/auth-api/user-detail/')
+        data = {'old_password': PASSWORD, 'new_password': 'Other-Passw0rd!'}
+        with self.assertNumQueries(1):
+            response = self.post('/api/auth-api/change-password/', data)
+        self.assertEqual(response.status_code, 200)
+
+    def test_reset_password_confirm(self):
+        user = self.create_active_user()
+        uid, token = self.link(user)
+        data = {'uid': uid, 'token': token, 'new_password': 'Other-Passw0rd!'}
+        # SELECT of the token columns + UPDATE of password/updated_at
+        with self.assertNumQueries(2):
+            response = self.post('/api/auth-api/reset-password/confirm/', data)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(User.objects.get(pk=user.pk).check_password('Other-Passw0rd!'))
+
+    def test_register_rejects_email_differing_in_case(self):
+        self.create_active_user('User@example.com')
+        data = {'email': 'user@EXAMPLE.com', 'password': PASSWORD, 'confirm_password': PASSWORD}
+        response = self.post('/api/auth-api/register/', data)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_reset_password_email(self):
+        self.create_active_user('User@example.com')
+        # One user lookup (ignoring case) + outbox email
+        with self.assertNumQueries(2):
+            response = self.post('/api/auth-api/reset-password-email/', {'email': 'user@example.com'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_conditional_profile_get(self):
+        self.login(self.create_active_user())
+        etag = self.client.get('/api/auth-api/profile/')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/auth-api/profile/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_stale_if_match_is_rejected(self):
+        self.login(self.create_active_user())
+        etag = self.client.get('/api/auth-api/profile/')['ETag']
+        data = {'mobile': '9876543210', 'bio': 'Hello', 'gender': 'M'}
+        response = self.client.put('/api/auth-api/profile/', data, content_type='application/json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        data['bio'] = 'Lost update'
+        response = self.client.put('/api/auth-api/profile/', data, content_type='application/json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(Profile.objects.get().bio, 'Hello')
+
+    def test_if_match_put_bumps_the_stored_version(self):
+        self.login(self.create_active_user())
+        self.client.get('/api/auth-api/profile/')
+        # Another worker saved the profile; this worker's cached copy is behind
+        Profile.objects.update(version=F('version') + 1)
+        etag = etags.profile_etag(Profile.objects.get())
+        data = {'mobile': '9876543210', 'bio': 'Hello', 'gender': 'M'}
+        response = self.client.put('/api/auth-api/profile/', data, content_type='application/json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Profile.objects.get().version, 3)
+
+    def test_stale_if_match_on_user_patch_is_rejected(self):
+        self.login(self.create_active_user())
+        etag = self.client.get('/api/auth-api/user-detail/')['ETag']
+        User.objects.update(updated_at=timezone.now() + timedelta(seconds=1))
+        response = self.client.patch(
+            '/api/auth-api/user-detail/', {'email': 'other@example.com'}, content_type='application/json',
+            HTTP_IF_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(User.objects.get().email, 'user@example.com')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'The expected plans are SQLite EXPLAIN QUERY PLAN output.')
+class QueryPlanTests(TestCase):
+    """
+    Guard the hot user lookups against falling back to full table scans.
+    """
+
+    def assertUsesIndex(self, queryset, index):
+        plan = queryset.explain()
+        self.assertIn(f'USING INDEX {index}', plan)
+
+    def test_email_lookup_ignores_case(self):
+        self.assertUsesIndex(User.objects.filter_email('User@Example.com'), 'auth_api_user_email_lower_uniq')
+
+    def test_inactive_users_by_age(self):
+        queryset = User.objects.filter(is_active=False, created_at__lt=timezone.now()).order_by('created_at', 'id')
+        self.assertUsesIndex(queryset, 'auth_api_user_inactive_idx')
+
+    def test_admin_changelist_filter(self):
+        self.assertUsesIndex(User.objects.filter(is_admin=True).order_by('email', 'id'), 'auth_api_user_admin_idx')
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    A second SQLite file stands in for the read replica. Nothing replicates
+    between the two, so which rows a query sees shows where it was sent.
+
+    The alias is added after the test runner set up its databases, so that
+    the replica file is neither created nor flushed by the runner.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmp = tempfile.TemporaryDirectory()
+        connections.settings['replica'] = dict(
+            connections['default'].settings_dict, NAME=os.path.join(cls.tmp.name, 'replica.sqlite3'),
+        )
+        cls.routing = override_settings(AUTH_API_DB_ROUTING=dict(
+            settings.AUTH_API_DB_ROUTING, REPLICAS=['replica'], MIGRATE_REPLICAS=True,
+        ))
+        cls.routing.enable()
+        call_command('migrate', database='replica', verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.routing.disable()
+        connections['replica'].close()
+        del connections.settings['replica']
+        del connections._connections.replica
+        cls.tmp.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        caches['default'].clear()
+        clear_group_cache()
+        self.addCleanup(call_command, 'flush', database='replica', interactive=False, verbosity=0)
+
+    def add_replica_only_user(self, email):
+        User.objects.using('replica').bulk_create([User(email=email, password='!')])
+
+    def test_reads_use_the_replica_and_writes_the_primary(self):
+        self.add_replica_only_user('replica@example.com')
+        User.objects.create_user('primary@example.com', PASSWORD)
+        self.assertTrue(User.objects.filter(email='replica@example.com').exists())
+        self.assertFalse(User.objects.filter(email='primary@example.com').exists())
+        self.assertTrue(User.objects.using('default').filter(email='primary@example.com').exists())
+
+    def test_primary_reads(self):
+        User.objects.create_user('primary@example.com', PASSWORD)
+        with transaction.atomic():
+            self.assertTrue(User.objects.filter(email='primary@example.com').exists())
+        with use_primary():
+            self.assertTrue(User.objects.filter(email='primary@example.com').exists())
+        self.assertEqual(router.db_for_read(Session), 'default')
+
+    def test_unsafe_requests_and_writes_pin_to_the_primary(self):
+        User.objects.create_user('primary@example.com', PASSWORD)
+        factory = RequestFactory()
+
+        def read(request):
+            if request.GET.get('write'):
+                User.objects.set_fields(User.objects.using('default').get().pk, is_admin=True)
+            return HttpResponse(str(User.objects.filter(email='primary@example.com').exists()))
+
+        middleware = PrimaryPinningMiddleware(read)
+        self.assertEqual(middleware(factory.get('/')).content, b'False')
+        self.assertEqual(middleware(factory.post('/')).content, b'True')
+
+        response = middleware(factory.get('/', {'write': '1'}))
+        self.assertEqual(response.content, b'True')
+        request = factory.get('/')
+        request.COOKIES['db_pin'] = response.cookies['db_pin'].value
+        self.assertEqual(middleware(request).content, b'True')
+        request.COOKIES['db_pin'] = str(time.time() - 1)
+        self.assertEqual(middleware(request).content, b'False')
+
+    def test_registration_checks_the_email_on_the_primary(self):
+        # Not replicated yet, and differing in case
+        User.objects.create_user('Taken@example.com', PASSWORD)
+        data = {'email': 'taken@example.com', 'password': PASSWORD, 'confirm_password': PASSWORD}
+        with use_replica():
+            response = self.client.post('/api/auth-api/register/', data, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(User.objects.using('default').count(), 1)
+
+
+class ConnectionPoolTests(SimpleTestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        path = os.path.join(self.tmp.name, 'pool.sqlite3')
+        self.pool = ConnectionPool(lambda: sqlite3.connect(path, check_same_thread=False), max_size=2, timeout=0.05)
+        self.addCleanup(self.pool.close_idle)
+
+    def test_released_connections_are_reused(self):
+        first = self.pool.acquire()
+        self.pool.release(first)
+        self.assertIs(self.pool.acquire(), first)
+
+    def test_acquire_times_out_when_the_pool_is_exhausted(self):
+        held = [self.pool.acquire(), self.pool.acquire()]
+        with self.assertRaises(OperationalError):
+            self.pool.acquire()
+        self.pool.release(held[0])
+        self.assertIs(self.pool.acquire(), held[0])
+
+    def test_broken_and_discarded_connections_are_replaced(self):
+        broken = self.pool.acquire()
+        self.pool.release(broken)
+        broken.close()
+        self.pool.check_after = 0
+        replacement = self.pool.acquire()
+        self.assertIsNot(replacement, broken)
+        self.pool.release(replacement, discard=True)
+        self.assertEqual(self.pool.idle_count, 0)
+
+
+class OutboxTests(TestCase):
+
+    def setUp(self):
+        for i in range(3):
+            outbox.enqueue_activation_email(f'user{i}@example.com', f'http://testserver/activate/{i}/')
+        outbox.enqueue_reset_password_email('reset@example.com', 'http://testserver/reset/')
+
+    def test_racing_claimers_claim_each_message_once(self):
+        # Worker B reads the due ids, then worker A claims them first
+        stale_ids = outbox.due_ids(10, timezone.now())
+        first = outbox.claim_batch(10)
+        with mock.patch('auth_api.outbox.due_ids', return_value=stale_ids):
+            second = outbox.claim_batch(10)
+        self.assertEqual(len(first), 4)
+        self.assertEqual(second, [])
+        self.assertEqual(len({message.claim_token for message in first}), 1)
+
+    def test_drain_sends_every_message_once(self):
+        self.assertEqual(outbox.drain(batch_size=3), (4, 0))
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertEqual(outbox.drain(), (0, 0))
+        self.assertFalse(OutboundEmail.objects.exclude(status=OutboundEmail.STATUS_SENT).exists())
+        self.assertFalse(OutboundEmail.objects.exclude(url='').exists())
+
+    def test_url_is_cleared_once_delivery_is_abandoned(self):
+        with self.settings(AUTH_API_EMAIL_OUTBOX={'MAX_ATTEMPTS': 1}), \
+                mock.patch('auth_api.outbox.build_email_batch', side_effect=ValueError('Broken template')):
+            self.assertEqual(outbox.drain(), (0, 4))
+        self.assertEqual(set(OutboundEmail.objects.values_list('status', 'url')), {(OutboundEmail.STATUS_FAILED, '')})
+
+    def test_render_failure_only_fails_its_own_messages(self):
+        build = outbox.build_email_batch
+
+        def build_email_batch(kind, recipients, connection=None):
+            if kind == OutboundEmail.KIND_RESET_PASSWORD:
+                raise ValueError('Broken template')
+            return build(kind, recipients, connection=connection)
+
+        with mock.patch('auth_api.outbox.build_email_batch', side_effect=build_email_batch):
+            self.assertEqual(outbox.drain(), (3, 1))
+        failed = OutboundEmail.objects.get(kind=OutboundEmail.KIND_RESET_PASSWORD)
+        self.assertEqual(failed.status, OutboundEmail.STATUS_PENDING)
+        self.assertEqual((failed.attempts, failed.last_error), (1, 'Broken template'))
+        self.assertFalse(OutboundEmail.objects.filter(status=OutboundEmail.STATUS_SENDING).exists())
+
+    def test_stale_claims_are_released(self):
+        outbox.claim_batch(10)
+        self.assertEqual(outbox.release_stale(timeout=3600), 0)
+        OutboundEmail.objects.update(available_at=timezone.now() - timedelta(hours=2))
+        self.assertEqual(outbox.release_stale(timeout=3600), 4)
+        self.assertEqual(len(outbox.claim_batch(10)), 4)
+
+
+def throttle_rates(**rates):
+    rest_framework = deepcopy(settings.REST_FRAMEWORK)
+    rest_framework['DEFAULT_THROTTLE_RATES'] = {key.replace('_', '.', 1): rate for key, rate in rates.items()}
+    return rest_framework
+
+
+class ThrottlingTests(QueryCountTestCase):
+
+    def attempt(self, email='user@example.com', url='/api/auth-api/login/', **extra):
+        data = {'email': email, 'password': 'Wrong-Passw0rd!'}
+        return self.client.post(url, data, content_type='application/json', **extra)
+
+    def statuses(self, attempts):
+        return [response.status_code for response in attempts]
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(login_ip='3/min'))
+    def test_ip_limit(self):
+        statuses = self.statuses(self.attempt(f'user{i}@example.com', REMOTE_ADDR='203.0.113.7') for i in range(5))
+        self.assertEqual(statuses, [400, 400, 400, 429, 429])
+        self.assertEqual(self.attempt(REMOTE_ADDR='203.0.113.8').status_code, 400)
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(login_ip='3/min'))
+    def test_forwarded_for_is_ignored_without_trusted_proxies(self):
+        statuses = self.statuses(
+            self.attempt(f'user{i}@example.com', REMOTE_ADDR='203.0.113.7', HTTP_X_FORWARDED_FOR=f'198.51.100.{i}')
+            for i in range(5)
+        )
+        self.assertEqual(statuses.count(429), 2)
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(login_ip='3/min'))
+    def test_async_login_ignores_forwarded_for(self):
+        statuses = self.statuses(
+            self.attempt(f'user{i}@example.com', url='/api/async/auth-api/login/', REMOTE_ADDR='203.0.113.7',
+                         HTTP_X_FORWARDED_FOR=f'198.51.100.{i}')
+            for i in range(5)
+        )
+        self.assertEqual(statuses.count(429), 2)
+
+    @override_settings(REST_FRAMEWORK=dict(throttle_rates(login_ip='3/min'), NUM_PROXIES=1))
+    def test_forwarded_for_from_a_trusted_proxy(self):
+        # The proxy appends the real client; anything before it is client supplied
+        statuses = self.statuses(
+            self.attempt(f'user{i}@example.com', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=f'1.2.3.{i}, 203.0.113.7')
+            for i in range(5)
+        )
+        self.assertEqual(statuses.count(429), 2)
+        response = self.attempt(REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='203.0.113.8')
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(login_email='2/min'))
+    def test_email_limit_across_addresses(self):
+        statuses = self.statuses(self.attempt('User@Example.com ', REMOTE_ADDR=f'203.0.113.{i}') for i in range(4))
+        self.assertEqual(statuses, [400, 400, 429, 429])
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(login_ip='1/min'))
+    def test_throttled_response_has_retry_after(self):
+        self.attempt()
+        response = self.attempt()
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+
+
+class AccessTokenTests(QueryCountTestCase):
+
+    def setUp(self):
+        super().setUp()
+        access_tokens.denylist.clear()
+        self.addCleanup(access_tokens.denylist.clear)
+        self.user = self.create_active_user()
+
+    def obtain(self):
+        response = self.post('/api/auth-api/token/', {'email': self.user.email, 'password': PASSWORD})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def refresh(self, token):
+        return self.post('/api/auth-api/token/refresh/', {'refresh': token})
+
+    def test_access_token_authenticates_without_queries(self):
+        access = self.obtain()['access']
+        self.client.get('/api/auth-api/user-detail/', HTTP_AUTHORIZATION=f'Bearer {access}')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/auth-api/user-detail/', HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(response.json()['email'], self.user.email)
+
+    def test_refresh_token_is_single_use(self):
+        refresh = self.obtain()['refresh']
+        self.assertEqual(self.refresh(refresh).status_code, 200)
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+
+    def test_concurrent_refreshes_get_one_pair(self):
+        refresh = self.obtain()['refresh']
+        # The second worker has not seen the first revocation in its denylist yet
+        with mock.patch.object(access_tokens.denylist, 'contains', return_value=False):
+            self.assertEqual(self.refresh(refresh).status_code, 200)
+            self.assertEqual(self.refresh(refresh).status_code, 401)
+
+    def test_password_change_kills_refresh_tokens(self):
+        refresh = self.obtain()['refresh']
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('Other-Passw0rd!')
+        user.save()
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+
+    def test_revoked_access_token_is_rejected(self):
+        tokens = self.obtain()
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {tokens["access"]}'}
+        self.assertEqual(self.post('/api/auth-api/token/revoke/', {'refresh': tokens['refresh']}, **auth).status_code, 200)
+        self.assertEqual(self.client.get('/api/auth-api/user-detail/', **auth).status_code, 401)
+
+    def test_sync_picks_up_revocations_committed_out_of_order(self):
+        expires_at = RevokedToken.expiry_from_timestamp(time.time() + 600)
+        RevokedToken.objects.create(id=10, jti='later', expires_at=expires_at)
+        self.assertTrue(access_tokens.denylist.contains('later'))
+        # A revocation with a lower id becomes visible after id 10 was synced
+        RevokedToken.objects.create(id=5, jti='earlier', expires_at=expires_at)
+        access_tokens.denylist.sync(force=True)
+        self.assertTrue(access_tokens.denylist.contains('earlier'))
+
+    def test_expired_revocations_are_pruned(self):
+        now = time.time()
+        RevokedToken.objects.create(jti='expired', expires_at=RevokedToken.expiry_from_timestamp(now - 1))
+        RevokedToken.objects.create(jti='live', expires_at=RevokedToken.expiry_from_timestamp(now + 600))
+        self.assertEqual(sum(access_tokens.prune_revoked(batch_size=1)), 1)
+        self.assertEqual(list(RevokedToken.objects.values_list('jti', flat=True)), ['live'])
+
+
+class UserCacheTests(QueryCountTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_active_user()
+        self.backend = EmailBackend()
+
+    def test_warm_lookup_runs_no_queries(self):
+        self.backend.get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            user = self.backend.get_user(self.user.pk)
+        self.assertEqual(user.profile.user_id, self.user.pk)
+
+    def test_deactivation_invalidates_the_cached_user(self):
+        self.assertIsNotNone(self.backend.get_user(self.user.pk))
+        user = User.objects.get(pk=self.user.pk)
+        user.is_active = False
+        user.save()
+        self.assertIsNone(self.backend.get_user(self.user.pk))
+
+    def test_password_change_invalidates_the_cached_user(self):
+        self.backend.get_user(self.user.pk)
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('Other-Passw0rd!')
+        user.save()
+        self.assertEqual(self.backend.get_user(self.user.pk).password, user.password)
+
+    def test_profile_change_invalidates_the_cached_user(self):
+        self.backend.get_user(self.user.pk)
+        profile = Profile.objects.get(user=self.user)
+        profile.location = 'Pune'
+        profile.save()
+        self.assertEqual(self.backend.get_user(self.user.pk).profile.location, 'Pune')
+
+
+class UserCacheCheckTests(SimpleTestCase):
+    LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    SHARED = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache'}}
+
+    def ids(self):
+        return [error.id for error in check_user_cache_is_shared(None)]
+
+    def test_process_local_cache_is_rejected(self):
+        with self.settings(CACHES=self.LOCMEM, AUTH_API_USER_CACHE={'CACHE_ALIAS': 'default'}):
+            self.assertEqual(self.ids(), ['auth_api.E001'])
+
+    def test_single_process_opt_in(self):
+        with self.settings(CACHES=self.LOCMEM, AUTH_API_USER_CACHE={'ALLOW_PROCESS_LOCAL': True}):
+            self.assertEqual(self.ids(), [])
+
+    def test_shared_cache_passes(self):
+        with self.settings(CACHES=self.SHARED, AUTH_API_USER_CACHE={}):
+            self.assertEqual(self.ids(), [])
+
+
+class BulkImportTests(QueryCountTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser('admin@example.com', PASSWORD, is_active=True)
+
+    def upload(self, name, content, **params):
+        self.client.force_login(self.admin)
+        query = '&'.join(f'{key}={value}' for key, value in params.items())
+        return self.client.post(
+            f'/api/auth-api/users/import/?{query}', {'file': SimpleUploadedFile(name, content.encode())},
+        )
+
+    def test_csv_upload(self):
+        response = self.upload('users.csv', f'email,password\nnew@example.com,{PASSWORD}\n')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 1)
+        user = User.objects.get(email='new@example.com')
+        self.assertTrue(user.is_active)
+        self.assertTrue(user.check_password(PASSWORD))
+        self.assertTrue(Profile.objects.filter(user=user).exists())
+
+    def test_type_parameter_overrides_the_extension(self):
+        response = self.upload('users.txt', '{"email": "new@example.com", "password": "%s"}\n' % PASSWORD, type='jsonl')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 1)
+
+    def test_unknown_type_is_rejected(self):
+        self.assertEqual(self.upload('users.csv', 'email\n', type='xml').status_code, 400)
+
+    def test_duplicates_are_reported_ignoring_case(self):
+        self.create_active_user('taken@example.com')
+        content = (
+            f'email,password\nTaken@Example.com,{PASSWORD}\n'
+            f'twice@example.com,{PASSWORD}\nTWICE@example.com,{PASSWORD}\n'
+        )
+        report = self.upload('users.csv', content).json()
+        self.assertEqual((report['rows'], report['created'], report['skipped']), (3, 1, 2))
+        self.assertEqual(
+            [error['error'] for error in report['errors']],
+            ['Duplicate email in import.', 'A user with this email already exists.'],
+        )
+
+    def import_racing_registration(self):
+        validate = bulk_import.validate_chunk
+
+        def validate_chunk(*args, **kwargs):
+            candidates = validate(*args, **kwargs)
+            # Registered after the chunk was checked against existing accounts
+            User.objects.create_user('Race@example.com', PASSWORD)
+            return candidates
+
+        content = f'email,password\nrace@example.com,{PASSWORD}\nnew@example.com,{PASSWORD}\n'
+        with mock.patch('auth_api.bulk_import.validate_chunk', side_effect=validate_chunk), \
+                mock.patch('auth_api.bulk_import.provision_users', wraps=provisioning.provision_users) as provision:
+            report = bulk_import.import_users(io.StringIO(content), 'csv', workers=0)
+        self.assertEqual((report.rows, report.created, report.skipped), (2, 1, 1))
+        self.assertEqual(report.errors, [
+            {'line': 2, 'email': 'race@example.com', 'error': 'A user with this email already exists.'},
+        ])
+        self.assertEqual([user.email for user in provision.call_args.args[0]], ['new@example.com'])
+        self.assertEqual(User.objects.filter_email('race@example.com').get().email, 'Race@example.com')
+
+    def test_conflicts_since_validation_are_skipped(self):
+        self.import_racing_registration()
+
+    def test_conflicts_since_validation_are_skipped_without_returning_inserts(self):
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            self.import_racing_registration()
+
+    def test_pre_hashed_passwords_are_kept(self):
+        encoded = make_password(PASSWORD)
+        self.upload('users.jsonl', '{"email": "hashed@example.com", "password_hash": "%s"}\n' % encoded)
+        self.assertEqual(User.objects.get(email='hashed@example.com').password, encoded)
+
+    def test_non_admins_are_forbidden(self):
+        self.client.force_login(self.create_active_user())
+        response = self.client.post('/api/auth-api/users/import/', {'file': SimpleUploadedFile('u.csv', b'email\n')})
+        self.assertEqual(response.status_code, 403)
+
+    def test_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as source:
+            source.write(f'email,password,is_admin\ncmd@example.com,{PASSWORD},yes\nbad,{PASSWORD},no\n')
+        self.addCleanup(os.unlink, source.name)
+        call_command('import_users', source.name, workers=0, inactive=True, stdout=io.StringIO())
+        user = User.objects.get(email='cmd@example.com')
+        self.assertEqual((user.is_active, user.is_admin), (False, True))
+        self.assertEqual(User.objects.count(), 2)
+
+
+class VerificationTests(QueryCountTestCase):
+
+    def setUp(self):
+        super().setUp()
+        verification.metrics.reset()
+        self.user = User.objects.create_user('new@example.com', PASSWORD)
+
+    def activate(self, uid, token):
+        return self.post('/api/auth-api/activate/confirm/', {'uid': uid, 'token': token})
+
+    def test_activation(self):
+        uid, token = self.link(self.user)
+        # SELECT of the token columns + conditional UPDATE
+        with self.assertNumQueries(2):
+            response = self.activate(uid, token)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(User.objects.get(pk=self.user.pk).is_active)
+        self.assertEqual(self.activate(uid, token).json(), {'detail': 'Account is already activated.'})
+
+    def test_malformed_uids_are_rejected_without_queries(self):
+        _, token = self.link(self.user)
+        for raw in ('²', '١', '-1', 'abc', str(2 ** 64)):
+            uid = urlsafe_base64_encode(raw.encode())
+            with self.subTest(raw=raw), self.assertNumQueries(0):
+                self.assertEqual(self.activate(uid, token).status_code, 400)
+        self.assertEqual(self.activate('%%%', token).status_code, 400)
+        self.assertEqual(verification.metrics.snapshot()['rejected_cheap'], 6)
+
+    def test_expired_token_is_rejected_without_queries(self):
+        uid, token = self.link(self.user)
+        with self.settings(PASSWORD_RESET_TIMEOUT=-1), self.assertNumQueries(0):
+            self.assertEqual(self.activate(uid, token).status_code, 400)
+
+    def test_forged_token_is_rejected(self):
+        uid, token = self.link(self.user)
+        self.assertEqual(self.activate(uid, token[:-1] + ('0' if token[-1] != '0' else '1')).status_code, 400)
+        self.assertEqual(verification.metrics.snapshot()['rejected_expensive'], 1)
+        self.assertFalse(User.objects.get(pk=self.user.pk).is_active)
+
+
+class PurgeUnactivatedTests(QueryCountTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser('admin@example.com', PASSWORD, is_active=True)
+        self.stale = [self.create_user(f'stale{i}@example.com', days=30) for i in range(3)]
+        self.recent = self.create_user('recent@example.com', days=1)
+        self.activated = self.create_user('activated@example.com', days=30, is_active=True)
+        self.deactivated = self.create_user('deactivated@example.com', days=30, last_login=timezone.now())
+        # Admin log rows reference their author
+        LogEntry.objects.log_action(
+            self.stale[0].pk, ContentType.objects.get_for_model(User).pk, self.admin.pk, 'admin', DELETION,
+        )
+
+    def create_user(self, email, days, **fields):
+        user = User.objects.create_user(email, PASSWORD, **fields)
+        User.objects.filter(pk=user.pk).update(created_at=timezone.now() - timedelta(days=days))
+        return user
+
+    def remaining(self):
+        return set(User.objects.values_list('email', flat=True))
+
+    def test_dependent_rows_are_deleted(self):
+        ids = [user.pk for user in self.stale]
+        self.assertTrue(User.groups.through.objects.filter(user_id__in=ids).exists())
+        self.assertTrue(LogEntry.objects.filter(user_id__in=ids).exists())
+        batches = list(purge_unactivated(batch_size=2))
+        self.assertEqual([batch.users for batch in batches], [2, 1])
+        self.assertEqual(self.remaining(), {
+            'admin@example.com', 'recent@example.com', 'activated@example.com', 'deactivated@example.com',
+        })
+        self.assertFalse(Profile.objects.filter(user_id__in=ids).exists())
+        self.assertFalse(User.groups.through.objects.filter(user_id__in=ids).exists())
+        self.assertFalse(LogEntry.objects.filter(user_id__in=ids).exists())
+        self.assertEqual(sum(batch.rows[Profile._meta.db_table] for batch in batches), 3)
+
+    def test_dry_run_counts_without_deleting(self):
+        before = self.remaining()
+        (batch,) = purge_unactivated(dry_run=True)
+        self.assertEqual(batch.users, 3)
+        self.assertEqual(batch.rows[User._meta.db_table], 3)
+        self.assertEqual(batch.rows[Profile._meta.db_table], 3)
+        self.assertEqual(self.remaining(), before)
+
+    def test_users_activated_during_the_run_are_kept(self):
+        original = stale_users
+
+        def activate_first(*args, **kwargs):
+            if activate_first.calls == 1:
+                # The page was read; the user activates before the chunk is locked
+                User.objects.filter(pk=self.stale[0].pk).update(is_active=True)
+            activate_first.calls += 1
+            return original(*args, **kwargs)
+        activate_first.calls = 0
+
+        with mock.patch('auth_api.purge.stale_users', side_effect=activate_first):
+            (batch,) = purge_unactivated()
+        self.assertEqual(batch.users, 2)
+        self.assertIn(self.stale[0].email, self.remaining())
+
+    def test_command(self):
+        out = io.StringIO()
+        # Without the zero guard an instant first batch divided by zero
+        with mock.patch('auth_api.management.commands.purge_unactivated.time.monotonic', return_value=0.0):
+            call_command('purge_unactivated', older_than_days=7, stdout=out)
+        self.assertIn('Deleted 3 unactivated account(s) older than 7 day(s)', out.getvalue())
+        self.assertNotIn('stale0@example.com', self.remaining())
+
+
+class StaffUserListingTests(QueryCountTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser('admin@example.com', PASSWORD, is_active=True)
+        for i in range(5):
+            User.objects.create_user(f'user{i}@example.com', PASSWORD, is_active=i % 2 == 0)
+        self.client.force_login(self.admin)
+
+    def test_cursor_round_trip(self):
+        emails, url = [], '/api/auth-api/users/?page_size=2'
+        while url:
+            page = self.client.get(url).json()
+            self.assertLessEqual(len(page['results']), 2)
+            emails += [row['email'] for row in page['results']]
+            url = page['next']
+        self.assertEqual(emails, sorted(User.objects.values_list('email', flat=True)))
+        self.assertEqual(page['count'], 6)
+        self.assertTrue(page['count_is_exact'])
+
+    def test_filters(self):
+        page = self.client.get('/api/auth-api/users/?is_active=false').json()
+        self.assertEqual([row['email'] for row in page['results']], ['user1@example.com', 'user3@example.com'])
+        self.assertEqual(page['count'], 2)
+
+    def test_invalid_cursor(self):
+        for cursor in ('garbage', user_listing.encode_cursor(User(email=None, pk=1))):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get(f'/api/auth-api/users/?cursor={cursor}').status_code, 400)
+
+    def test_staff_only(self):
+        self.client.force_login(User.objects.get(email='user0@example.com'))
+        self.assertEqual(self.client.get('/api/auth-api/users/').status_code, 403)
+        self.assertEqual(self.client.get('/api/auth-api/users/export/').status_code, 403)
+
+    def test_csv_export(self):
+        response = self.client.get('/api/auth-api/users/export/?is_active=true')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(
+            [row['email'] for row in rows],
+            ['admin@example.com', 'user0@example.com', 'user2@example.com', 'user4@example.com'],
+        )
+        self.assertEqual(list(rows[0]), user_listing.FIELDS)
+
+    def test_jsonl_export(self):
+        response = self.client.get('/api/auth-api/users/export/?type=jsonl')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[0]['email'], 'admin@example.com')
+        self.assertEqual(self.client.get('/api/auth-api/users/export/?type=xml').status_code, 400)
+
+    def test_large_counts_are_estimated(self):
+        User.objects.bulk_create([User(email=f'bulk{i}@example.com', is_active=True) for i in range(20)])
+        estimate = user_listing.table_row_estimate(User, 'default')
+        with self.settings(AUTH_API_USER_LISTING={'EXACT_COUNT_LIMIT': 4}):
+            self.assertEqual(user_listing.estimated_count(User.objects.all()), (estimate, False))
+            # The first four users (admin, user0, user1, user2) sampled: three are active
+            count, exact = user_listing.estimated_count(User.objects.filter(is_active=True))
+        self.assertFalse(exact)
+        self.assertEqual(count, int(estimate * 0.75))
+        self.assertGreater(count, 4)
+
+
+def hasher_profiles(iterations):
+    return {'pbkdf2': {'HASHER': 'auth_api.hashers.ProfiledPBKDF2PasswordHasher', 'PARAMS': {'iterations': iterations}}}
+
+
+class HashingTests(TestCase):
+
+    def test_saturated_pool_fails_fast(self):
+        pool = HashingPool(max_workers=1, max_pending=0, queue_timeout=0.01)
+        self.addCleanup(pool.shutdown)
+        release = threading.Event()
+        running = pool.submit(release.wait)
+        with self.assertRaises(HashingPoolBusy):
+            pool.submit(release.wait)
+        release.set()
+        running.result()
+        # The slot is released once the hash finished
+        self.assertEqual(pool.run(sum, [1, 2]), 3)
+
+    @override_settings(
+        PASSWORD_HASHERS=['auth_api.hashers.ProfiledPBKDF2PasswordHasher'], AUTH_API_HASHER_PROFILES=hasher_profiles(1000),
+    )
+    def test_profile_parameters_are_used(self):
+        self.assertTrue(hashing.hash_password(PASSWORD).startswith('pbkdf2_sha256$1000$'))
+
+    def test_outdated_hashes_are_upgraded_on_login(self):
+        hashers = ['auth_api.hashers.ProfiledPBKDF2PasswordHasher', 'django.contrib.auth.hashers.MD5PasswordHasher']
+        with self.settings(PASSWORD_HASHERS=hashers[::-1]):
+            user = User.objects.create_user('user@example.com', PASSWORD, is_active=True)
+        with self.settings(PASSWORD_HASHERS=hashers, AUTH_API_HASHER_PROFILES=hasher_profiles(1000)):
+            self.assertTrue(hashing.verify_user_password(user, PASSWORD))
+            self.assertTrue(User.objects.get(pk=user.pk).password.startswith('pbkdf2_sha256$1000$'))
+        with self.settings(PASSWORD_HASHERS=hashers, AUTH_API_HASHER_PROFILES=hasher_profiles(2000)):
+            self.assertTrue(async_to_sync(hashing.averify_user_password)(user, PASSWORD))
+            self.assertTrue(User.objects.get(pk=user.pk).password.startswith('pbkdf2_sha256$2000$'))
+            self.assertFalse(hashing.verify_user_password(user, 'wrong'))
+
+
+class AsyncViewTests(QueryCountTestCase):
+    async_client_class = AsyncClient
+
+    async def apost(self, path, data):
+        return await self.async_client.post(f'/api/async/auth-api/{path}/', data, content_type='application/json')
+
+    async def aget(self, path, headers=None):
+        return await self.async_client.get(f'/api/async/auth-api/{path}/', headers=headers)
+
+    async def test_session_round_trip(self):
+        user = await sync_to_async(self.create_active_user)()
+        self.assertEqual((await self.aget('check-authenticated')).json(), {'isAuthenticated': False})
+        response = await self.apost('login', {'email': 'USER@example.com', 'password': PASSWORD})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((await self.aget('check-authenticated')).json(), {'isAuthenticated': True})
+
+        response = await self.aget('user-detail')
+        self.assertEqual(response.json()['email'], user.email)
+        self.assertEqual((await self.aget('user-detail', {'If-None-Match': response['ETag']})).status_code, 304)
+        self.assertEqual((await self.aget('profile')).status_code, 200)
+
+        self.assertEqual((await self.apost('logout', {})).status_code, 200)
+        self.assertEqual((await self.aget('user-detail')).status_code, 403)
+
+    async def test_rejected_logins(self):
+        await sync_to_async(self.create_active_user)()
+        await sync_to_async(User.objects.create_user)('inactive@example.com', PASSWORD)
+        for email, password in (('user@example.com', 'wrong'), ('inactive@example.com', PASSWORD),
+                                ('missing@example.com', PASSWORD)):
+            with self.subTest(email=email):
+                response = await self.apost('login', {'email': email, 'password': password})
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual((await self.aget('check-authenticated')).json(), {'isAuthenticated': False})
+
+    async def test_writes_are_delegated_to_the_sync_view(self):
+        await sync_to_async(self.create_active_user)()
+        await self.apost('login', {'email': 'user@example.com', 'password': PASSWORD})
+        response = await self.async_client.patch(
+            '/api/async/auth-api/user-detail/', {'email': 'renamed@example.com'}, content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((await self.aget('user-detail')).json()['email'], 'renamed@example.com')
+
+    async def test_profile_avatar_urls_are_absolute(self):
+        user = await sync_to_async(self.create_active_user)()
+        name = 'avatars/ab/abcd/original.png'
+        await Profile.objects.filter(user=user).aupdate(avatar=name)
+        await self.apost('login', {'email': 'user@example.com', 'password': PASSWORD})
+        self.assertEqual((await self.aget('profile')).json()['avatar_url'], f'http://testserver/media/{name}')
+
+        await Profile.objects.filter(user=user).aupdate(avatar_ready=True, version=F('version') + 1)
+        user_cache.invalidate_user(user.pk)
+        response = await self.async_client.get('/api/async/auth-api/profile/', {'avatar_size': 'small', 'avatar_format': 'jpeg'})
+        expected = default_storage.url(avatars.thumbnail_name(name, 'small', 'jpeg'))
+        self.assertEqual(response.json()['avatar_url'], f'http://testserver{expected}')
+
+
+class AuthStatusTests(QueryCountTestCase):
+    URL = '/api/auth-api/check-authenticated/'
+
+    def login(self):
+        self.create_active_user()
+        self.assertEqual(self.post('/api/auth-api/login/', {'email': 'user@example.com', 'password': PASSWORD}).status_code, 200)
+
+    def check(self):
+        return self.client.get(self.URL).json()['isAuthenticated']
+
+    def test_anonymous_poll_runs_no_queries(self):
+        with self.assertNumQueries(0):
+            self.assertFalse(self.check())
+
+    def test_repeated_poll_is_answered_from_the_cache(self):
+        self.login()
+        self.assertTrue(self.check())
+        with self.assertNumQueries(0):
+            self.assertTrue(self.check())
+
+    def test_logout_forgets_the_status(self):
+        self.login()
+        self.assertTrue(self.check())
+        self.post('/api/auth-api/logout/', {})
+        self.assertFalse(self.check())
+
+    def test_signed_cookie_mode(self):
+        with self.settings(AUTH_API_AUTH_STATUS=dict(settings.AUTH_API_AUTH_STATUS, MODE='signed_cookie')):
+            self.login()
+            self.assertTrue(self.check())
+            self.assertIn('auth_status', self.client.cookies)
+            with self.assertNumQueries(0):
+                self.assertTrue(self.check())
+            # The cookie is bound to the session it was issued for
+            self.client.cookies[settings.SESSION_COOKIE_NAME] = 'another-session'
+            self.assertFalse(self.check())
+
+
+class SessionStoreTests(QueryCountTestCase):
+
+    def setUp(self):
+        super().setUp()
+        session_store.metrics.reset()
+        store = SessionStore()
+        store['user'] = 1
+        store.save()
+        self.key = store.session_key
+
+    def test_unchanged_session_is_not_written(self):
+        store = SessionStore(self.key)
+        with self.assertNumQueries(0):
+            self.assertEqual(store['user'], 1)
+            store.save()
+        self.assertEqual(session_store.metrics.snapshot()['writes_skipped'], 1)
+
+    def test_changed_session_is_written(self):
+        store = SessionStore(self.key)
+        store['user'] = 2
+        store.save()
+        self.assertEqual(SessionStore().decode(Session.objects.get(pk=self.key).session_data), {'user': 2})
+
+    def test_sliding_expiry_is_written_past_the_threshold(self):
+        with self.settings(AUTH_API_SESSIONS={'EXPIRY_REFRESH_SECONDS': -1}):
+            store = SessionStore(self.key)
+            store.load()
+            store.save()
+        self.assertEqual(session_store.metrics.snapshot()['writes_skipped'], 0)
+
+    def test_cache_miss_falls_back_to_the_database(self):
+        caches['default'].clear()
+        self.assertEqual(SessionStore(self.key)['user'], 1)
+        self.assertEqual(session_store.metrics.snapshot()['db_reads'], 1)
+
+    def test_sweep_deletes_expired_sessions_in_batches(self):
+        past = timezone.now() - timedelta(days=1)
+        Session.objects.bulk_create([Session(session_key=f'expired{i}', session_data='', expire_date=past) for i in range(3)])
+        self.assertEqual(list(sweep_expired_sessions(batch_size=2)), [2, 1])
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), [self.key])
+
+
+class ProvisioningTests(QueryCountTestCase):
+
+    def memberships(self, user):
+        return list(User.groups.through.objects.filter(user=user).values_list('group__name', flat=True))
+
+    def test_new_user_is_provisioned_once(self):
+        # Running ready() again must not connect the receiver twice
+        apps.get_app_config('auth_api').ready()
+        user = User.objects.create_user('user@example.com', PASSWORD)
+        self.assertEqual(Profile.objects.filter(user=user).count(), 1)
+        self.assertEqual(self.memberships(user), [provisioning.USER_GROUP])
+        admin = User.objects.create_superuser('admin@example.com', PASSWORD, is_active=True)
+        self.assertEqual(self.memberships(admin), [provisioning.ADMIN_GROUP])
+
+    def test_bulk_provisioning_is_set_based_and_idempotent(self):
+        User.objects.bulk_create([User(email=f'user{i}@example.com') for i in range(10)])
+        users = list(User.objects.all())
+        provisioning.get_group_id(provisioning.USER_GROUP)
+        provisioning.get_group_id(provisioning.ADMIN_GROUP)
+        # SAVEPOINT, membership INSERT, profile INSERT, RELEASE
+        with self.assertNumQueries(4):
+            provisioning.provision_users(users)
+        provisioning.provision_users(users)
+        self.assertEqual(Profile.objects.count(), 10)
+        self.assertEqual(User.groups.through.objects.count(), 10)
+
+    def test_fresh_users_skip_the_cache_round_trips(self):
+        cache = caches['default']
+        with mock.patch.object(cache, 'set_many', wraps=cache.set_many) as set_many:
+            user = User.objects.create_user('user@example.com', PASSWORD)
+        set_many.assert_not_called()
+        self.assertEqual(user_cache.get_cached_user(user.pk).profile.pk, user.profile.pk)
+
+    def test_reprovisioning_invalidates_in_one_call(self):
+        users = [User.objects.create_user(f'user{i}@example.com', PASSWORD) for i in range(3)]
+        versions = [user_cache.get_version(user.pk) for user in users]
+        cache = caches['default']
+        with mock.patch.object(cache, 'set_many', wraps=cache.set_many) as set_many, \
+                mock.patch.object(cache, 'incr', wraps=cache.incr) as incr:
+            provisioning.provision_users(users)
+        self.assertEqual(set_many.call_count, 1)
+        incr.assert_not_called()
+        for user, version in zip(users, versions):
+            self.assertNotEqual(user_cache.get_version(user.pk), version)
+
+    def test_deleted_group_is_recreated(self):
+        User.objects.create_user('first@example.com', PASSWORD)
+        Group.objects.filter(name=provisioning.USER_GROUP).delete()
+        user = User.objects.create_user('second@example.com', PASSWORD)
+        self.assertEqual(self.memberships(user), [provisioning.USER_GROUP])
+
+
+@override_settings(AUTH_API_INSTRUMENTATION={'ENABLED': True, 'SERVER_TIMING': True})
+class InstrumentationTests(QueryCountTestCase):
+
+    def setUp(self):
+        super().setUp()
+        instrumentation.registry.reset()
+        self.addCleanup(instrumentation.registry.reset)
+
+    def test_requests_are_recorded_per_view(self):
+        self.create_active_user()
+        response = self.post('/api/auth-api/login/', {'email': 'user@example.com', 'password': PASSWORD})
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", hash;dur=[\d.]+, total;dur=')
+        histograms = instrumentation.registry._histograms
+        self.assertEqual(histograms['auth_api_request_duration_seconds'][('login', 'POST')].count, 1)
+        self.assertGreater(histograms['auth_api_request_queries'][('login', 'POST')].sum, 0)
+        self.assertGreater(histograms['auth_api_request_hash_seconds'][('login', 'POST')].sum, 0)
+
+    def test_metrics_endpoint(self):
+        self.client.get('/api/auth-api/check-authenticated/')
+        self.client.force_login(User.objects.create_superuser('admin@example.com', PASSWORD, is_active=True))
+        body = self.client.get('/api/auth-api/metrics/').content.decode()
+        self.assertIn('auth_api_request_duration_seconds_count{view="check_authenticated",method="GET"} 1', body)
+        self.assertIn('auth_api_outbox_emails{status="pending"} 0', body)
+
+    def test_metrics_are_admin_only(self):
+        self.client.force_login(self.create_active_user())
+        self.assertEqual(self.client.get('/api/auth-api/metrics/').status_code, 403)
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = instrumentation.Registry()
+        stats = instrumentation.RequestStats()
+        stats.queries = 3
+        stats.events = {'user_cache_hit': 2}
+        registry.observe_request(('view', 'GET'), 0.02, stats)
+        lines = registry.render()
+        self.assertIn('auth_api_request_queries_bucket{view="view",method="GET",le="2"} 0', lines)
+        self.assertIn('auth_api_request_queries_bucket{view="view",method="GET",le="3"} 1', lines)
+        self.assertIn('auth_api_request_queries_bucket{view="view",method="GET",le="+Inf"} 1', lines)
+        self.assertIn('auth_api_request_events_total{view="view",method="GET",event="user_cache_hit"} 2', lines)
+
+    def test_disabled_middleware_is_removed(self):
+        with self.settings(AUTH_API_INSTRUMENTATION={'ENABLED': False}):
+            with self.assertRaises(MiddlewareNotUsed):
+                instrumentation.InstrumentationMiddleware(lambda request: HttpResponse())
+
+    def test_unknown_paths_are_unmatched(self):
+        self.client.get('/api/auth-api/no-such-endpoint/')
+        self.assertIn(('unmatched', 'GET'), instrumentation.registry._histograms['auth_api_request_queries'])
+
+
+def image_bytes(size=(300, 200), fmt='PNG', color='red'):
+    from PIL import Image
+
+    out = io.BytesIO()
+    Image.new('RGB', size, color).save(out, fmt)
+    return out.getvalue()
+
+
+class AvatarTests(QueryCountTestCase):
+
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        overrides = self.settings(
+            MEDIA_ROOT=media.name, AUTH_API_AVATARS=dict(settings.AUTH_API_AVATARS, SYNC=True, MAX_UPLOAD_SIZE=50_000),
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.client.force_login(self.create_active_user())
+
+    def put_avatar(self, content, name='avatar.png'):
+        data = {'mobile': '9876543210', 'gender': 'M', 'avatar': SimpleUploadedFile(name, content)}
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.put(
+                '/api/auth-api/profile/', encode_multipart(BOUNDARY, data), content_type=MULTIPART_CONTENT,
+            )
+
+    def test_upload_renders_square_thumbnails(self):
+        response = self.put_avatar(image_bytes())
+        self.assertEqual(response.status_code, 200)
+        profile = Profile.objects.get()
+        self.assertTrue(profile.avatar_ready)
+        self.assertRegex(profile.avatar.name, r'^avatars/[0-9a-f]{2}/[0-9a-f]{64}/original\.png$')
+        from PIL import Image
+
+        for size_name, size in settings.AUTH_API_AVATARS['SIZES'].items():
+            for fmt in ('webp', 'jpeg'):
+                with default_storage.open(avatars.thumbnail_name(profile.avatar.name, size_name, fmt)) as f:
+                    self.assertEqual(Image.open(f).size, (size, size))
+        body = self.client.get('/api/auth-api/profile/?avatar_size=small&avatar_format=jpeg').json()
+        self.assertTrue(body['avatar_url'].endswith('/small.jpg'))
+        self.assertEqual(set(body['avatar_thumbnails']), {'small', 'medium', 'large'})
+
+    def test_identical_uploads_are_stored_once(self):
+        self.put_avatar(image_bytes())
+        first = Profile.objects.get().avatar.name
+        self.put_avatar(image_bytes(), name='copy.png')
+        self.assertEqual(Profile.objects.get().avatar.name, first)
+        # A second save of the same name would have been renamed original_<random>.png
+        self.assertEqual([n for n in default_storage.listdir(avatars.avatar_dir(first))[1] if n.startswith('original')], ['original.png'])
+
+    def test_invalid_image_is_rejected(self):
+        self.assertEqual(self.put_avatar(b'not an image').status_code, 400)
+        self.assertFalse(Profile.objects.get().avatar)
+
+    def test_oversized_upload_is_rejected(self):
+        self.assertEqual(self.put_avatar(os.urandom(60_000)).status_code, 413)
+
+    def stored_files(self):
+        return sorted(str(path.relative_to(settings.MEDIA_ROOT)) for path in Path(settings.MEDIA_ROOT).rglob('*.*'))
+
+    def test_failed_validation_stores_nothing(self):
+        data = {'mobile': '123', 'avatar': SimpleUploadedFile('avatar.png', image_bytes())}
+        response = self.client.put(
+            '/api/auth-api/profile/', encode_multipart(BOUNDARY, data), content_type=MULTIPART_CONTENT,
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.stored_files(), [])
+
+    def test_failed_save_removes_the_new_original(self):
+        self.put_avatar(image_bytes())
+        stored = self.stored_files()
+        for content in (image_bytes(color='blue'), image_bytes()):
+            # The second upload is content stored before, shared by hash and kept
+            with mock.patch.object(Profile, 'save', side_effect=DatabaseError('down')), \
+                    self.assertRaises(DatabaseError):
+                self.put_avatar(content, name='copy.png')
+        self.assertEqual(self.stored_files(), stored)
+
+
+class RendererTests(QueryCountTestCase):
+
+    def test_dumps_handles_django_types(self):
+        data = {'amount': Decimal('1.50'), 'when': datetime(2024, 1, 2, 3, 4, 5), 'label': gettext_lazy('Email'), 1: 'key'}
+        self.assertEqual(
+            renderers.loads(renderers.dumps(data)),
+            {'amount': 1.5, 'when': '2024-01-02T03:04:05', 'label': 'Email', '1': 'key'},
+        )
+
+    def test_static_bodies_are_passed_through(self):
+        renderer = renderers.FastJSONRenderer()
+        self.assertIs(renderer.render(responses.LOGGED_IN), responses.LOGGED_IN)
+        self.assertEqual(renderer.render(None), b'')
+
+    def test_malformed_json_is_a_parse_error(self):
+        response = self.client.post('/api/auth-api/login/', b'{"email": ', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.json()['detail'].startswith('JSON parse error'))
+
+    def test_negotiation_always_renders_json(self):
+        for extra in ({'HTTP_ACCEPT': 'text/html'}, {'QUERY_STRING': 'format=xml'}):
+            with self.subTest(extra=extra):
+                response = self.client.get('/api/auth-api/check-authenticated/', **extra)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response['Content-Type'], 'application/json')
+                self.assertEqual(response.json(), {'isAuthenticated': False})
+
+
+class StartupTests(SimpleTestCase):
+    """
+    Each check runs in a fresh interpreter, where nothing was imported yet.
+    """
+
+    def imported(self, settings_module, code, modules):
+        script = (
+            'import sys, django\n'
+            'django.setup()\n'
+            f'{code}\n'
+            f"print(','.join(m for m in {modules!r} if m in sys.modules))\n"
+        )
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings_module, SECRET_KEY='startup-test')
+        result = subprocess.run(
+            [sys.executable, '-c', script], cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+        )
+        return result.stdout.strip()
+
+    def test_api_profile_skips_optional_apps(self):
+        code = (
+            'from django.apps import apps\n'
+            'from django.urls import resolve\n'
+            "assert resolve('/api/auth-api/login/').url_name == 'login'\n"
+            "assert not apps.is_installed('django.contrib.admin') and not apps.is_installed('drf_yasg')\n"
+            'import user_auth.wsgi'
+        )
+        self.assertEqual(self.imported('user_auth.settings_api', code, ('drf_yasg', 'pkg_resources', 'PIL')), '')
+
+    def test_schema_and_pillow_are_imported_on_first_use(self):
+        code = "from django.urls import resolve\nresolve('/api/auth-api/swagger/')\nimport user_auth.wsgi"
+        self.assertEqual(self.imported('user_auth.settings', code, ('drf_yasg.views', 'drf_yasg.generators', 'PIL')), '')
+
+
+class SchemaTests(SimpleTestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.artifact_dir, self.cache_dir = Path(tmp.name, 'schema'), Path(tmp.name, 'cache')
+        overrides = self.settings(AUTH_API_SCHEMA=dict(
+            settings.AUTH_API_SCHEMA, ARTIFACT_DIR=self.artifact_dir, CACHE_DIR=self.cache_dir,
+        ))
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        schema.clear_schema_cache()
+        self.addCleanup(schema.clear_schema_cache)
+
+    def test_artifact_is_served_with_an_etag(self):
+        call_command('generate_schema', stdout=io.StringIO())
+        artifact = (self.artifact_dir / 'openapi-v1.json').read_bytes()
+        self.assertIn(b'"/login/"', artifact)
+        self.assertTrue((self.artifact_dir / 'openapi-v1.yaml').exists())
+
+        with mock.patch('auth_api.schema.generate_schema', side_effect=AssertionError('not generated')):
+            response = self.client.get('/api/swagger.json')
+            self.assertEqual(response.content, artifact)
+            self.assertIn('max-age=86400', response['Cache-Control'])
+            response = self.client.get('/api/swagger.json', HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, 304)
+            ui_schema = self.client.get('/api/auth-api/swagger/?format=openapi')
+            self.assertEqual(ui_schema['Content-Type'], 'application/openapi+json')
+
+    def test_missing_artifact_is_generated_once_and_cached_on_disk(self):
+        with mock.patch('auth_api.schema.generate_schema', return_value=b'{}') as generate:
+            self.assertEqual(self.client.get('/api/swagger.json').content, b'{}')
+            schema.clear_schema_cache()
+            self.client.get('/api/swagger.json')
+        self.assertEqual(generate.call_count, 1)
+        self.assertEqual([path.name for path in self.cache_dir.iterdir()], [f'openapi-v1-{schema.fingerprint()}.json'])
+
+
+class SQLiteTuningTests(SimpleTestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'tuned.sqlite3')
+
+    def wrapper(self, **options):
+        settings_dict = dict(connections['default'].settings_dict, NAME=self.path, **options)
+        wrapper = SQLiteWrapper(settings_dict, alias='tuned')
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_are_applied_to_new_connections(self):
+        wrapper = self.wrapper()
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(wrapper, 'busy_timeout'), 5000)
+        self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)  # NORMAL
+
+    def test_disabled_tuning_leaves_the_defaults(self):
+        with self.settings(AUTH_API_SQLITE={'ENABLED': False}):
+            self.assertEqual(self.pragma(self.wrapper(), 'journal_mode'), 'delete')
+
+    def test_transactions_take_the_write_lock_up_front(self):
+        wrapper = self.wrapper()
+        wrapper.ensure_connection()
+        wrapper._start_transaction_under_autocommit()
+        self.addCleanup(wrapper.connection.rollback)
+        other = sqlite3.connect(self.path, timeout=0)
+        self.addCleanup(other.close)
+        # Nothing was written yet, but another writer is already locked out
+        with self.assertRaisesMessage(sqlite3.OperationalError, 'database is locked'):
+            other.execute('BEGIN IMMEDIATE')
+
+    def test_deferred_mode(self):
+        wrapper = self.wrapper(TRANSACTION_MODE='DEFERRED')
+        wrapper.ensure_connection()
+        wrapper._start_transaction_under_autocommit()
+        self.addCleanup(wrapper.connection.rollback)
+        other = sqlite3.connect(self.path, timeout=0, isolation_level=None)
+        self.addCleanup(other.close)
+        other.execute('BEGIN IMMEDIATE')
+        other.execute('ROLLBACK')
+
+
+class AuthStatusCheckTests(SimpleTestCase):
+    LOCMEM = UserCacheCheckTests.LOCMEM
+    SHARED = UserCacheCheckTests.SHARED
+
+    def ids(self):
+        return [error.id for error in check_auth_status_cache_is_shared(None)]
+
+    def test_process_local_cache_is_rejected(self):
+        with self.settings(CACHES=self.LOCMEM, AUTH_API_AUTH_STATUS={'MODE': 'cache'}):
+            self.assertEqual(self.ids(), ['auth_api.E002'])
+
+    def test_signed_cookie_mode_needs_no_shared_cache(self):
+        with self.settings(CACHES=self.LOCMEM, AUTH_API_AUTH_STATUS={'MODE': 'signed_cookie'}):
+            self.assertEqual(self.ids(), [])
+
+    def test_single_process_opt_in(self):
+        with self.settings(CACHES=self.LOCMEM, AUTH_API_AUTH_STATUS={'ALLOW_PROCESS_LOCAL': True}):
+            self.assertEqual(self.ids(), [])
+
+    def test_shared_cache_passes(self):
+        with self.settings(CACHES=self.SHARED, AUTH_API_AUTH_STATUS={}):
+            self.assertEqual(self.ids(), [])
+
+
+class EmailUniquenessTests(TestCase):
+
+    def test_emails_differing_in_case_are_rejected(self):
+        User.objects.create_user('User@example.com', PASSWORD)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            User.objects.create_user('USER@example.com', PASSWORD)
+        with self.assertRaisesMessage(ValidationError, 'A user with this email already exists.'):
+            User(email='USER@example.com').validate_constraints()
+
+    def test_natural_key_ignores_case(self):
+        user = User.objects.create_user('User@example.com', PASSWORD)
+        self.assertEqual(User.objects.get_by_natural_key('user@example.COM'), user)
+        with self.assertRaises(User.DoesNotExist):
+            User.objects.get_by_natural_key('other@example.com')
+
+    def test_migration_lists_existing_case_duplicates(self):
+        migration = importlib.import_module('auth_api.migrations.0011_user_email_lower_unique')
+        User.objects.create_user('User@example.com', PASSWORD)
+        # Rows from before the constraint; the DROP is rolled back with the test
+        with connection.cursor() as cursor:
+            cursor.execute('DROP INDEX auth_api_user_email_lower_uniq')
+        duplicate = User.objects.create_user('USER@example.com', PASSWORD)
+        with self.assertRaisesMessage(ValueError, f'{duplicate.pk}: USER@example.com'):
+            migration.check_case_duplicates(apps, mock.Mock(connection=connection))
+
+
+@override_settings(SITE_NAME='Example', EMAIL_HOST_USER='noreply@example.com')
+class EmailRenderingTests(SimpleTestCase):
+
+    def setUp(self):
+        utils.clear_template_cache()
+        self.addCleanup(utils.clear_template_cache)
+
+    def test_each_kind_renders_text_and_html(self):
+        subjects = {
+            utils.ACTIVATION_EMAIL: 'Activate your account on Example',
+            utils.RESET_PASSWORD_EMAIL: 'Reset Your Password on Example',
+        }
+        for kind, subject in subjects.items():
+            with self.subTest(kind=kind):
+                url = f'http://testserver/{kind}/uid/token/?next=a&b'
+                email = utils.build_email(kind, 'user@example.com', url)
+                self.assertEqual(
+                    (email.subject, email.from_email, email.to), (subject, 'noreply@example.com', ['user@example.com']),
+                )
+                # The text part is not HTML-escaped
+                self.assertIn(f'\n{url}\n', email.body)
+                self.assertNotIn('<', email.body)
+                html, mimetype = email.alternatives[0]
+                self.assertEqual(mimetype, 'text/html')
+                self.assertIn(f'href="{url.replace("&", "&amp;")}"', html)
+
+    def test_batch_renders_each_recipient_url(self):
+        recipients = [(f'user{i}@example.com', f'http://testserver/activate/{i}/token{i}/') for i in range(3)]
+        with mock.patch('auth_api.utils.get_template', wraps=utils.get_template) as get_template:
+            emails = utils.build_email_batch(utils.ACTIVATION_EMAIL, recipients)
+            utils.build_email_batch(utils.ACTIVATION_EMAIL, recipients)
+        # Compiled once per template, then reused
+        self.assertEqual(get_template.call_count, 2)
+        self.assertEqual(len(emails), 3)
+        for email, (recipient, url) in zip(emails, recipients):
+            others = [other for _, other in recipients if other != url]
+            self.assertEqual(email.to, [recipient])
+            for part in (email.body, email.alternatives[0][0]):
+                self.assertIn(url, part)
+                for other in others:
+                    self.assertNotIn(other, part)
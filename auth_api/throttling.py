@@ -0,0 +1,173 @@
+"""
+Sliding-window rate limiting for the login, registration and reset endpoints.
+
+Counters live in Django's cache framework: the local-memory backend increments
+atomically within one process, a shared cache (Redis, Memcached) extends the
+limits to a cluster. Rates are configured per endpoint scope and dimension in
+REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], e.g. 'login.ip': '20/min'.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle, SimpleRateThrottle
+
+
+def get_throttle_setting(name, default):
+    """
+    Read a value from the optional AUTH_API_THROTTLING settings dict.
+    """
+    return getattr(settings, 'AUTH_API_THROTTLING', {}).get(name, default)
+
+
+class SlidingWindowLimiter:
+    """
+    Approximate sliding window counter over two fixed windows.
+
+    The hit count is the current window plus the previous window weighted by
+    how much of it still overlaps the sliding window, which needs only two
+    cache keys per identity and one atomic increment per hit.
+    """
+
+    def __init__(self, prefix, limit, window, cache=None):
+        self.prefix = prefix
+        self.limit = limit
+        self.window = window
+        self.cache = cache or caches[get_throttle_setting('CACHE_ALIAS', 'default')]
+
+    def _key(self, ident, index):
+        digest = hashlib.sha256(ident.encode()).hexdigest()[:32]
+        return f'auth_api:throttle:{self.prefix}:{digest}:{index}'
+
+    def hit(self, ident, now=None):
+        """
+        Record a hit and return 0 when it is allowed, else the seconds to wait.
+        """
+        now = time.time() if now is None else now
+        index, offset = divmod(now, self.window)
+        index = int(index)
+        current_key = self._key(ident, index)
+
+        self.cache.add(current_key, 0, self.window * 2)
+        try:
+            current = self.cache.incr(current_key)
+        except ValueError:
+            # The key expired between add() and incr()
+            self.cache.set(current_key, 1, self.window * 2)
+            current = 1
+        previous = self.cache.get(self._key(ident, index - 1), 0)
+
+        weight = 1 - offset / self.window
+        if previous * weight + current <= self.limit:
+            return 0
+        return self.window - offset
+
+
+def client_ip(request):
+    """
+    Return the address of the client that sent the request.
+
+    REMOTE_ADDR unless REST_FRAMEWORK['NUM_PROXIES'] says how many trusted
+    proxies append to X-Forwarded-For. Unlike DRF's get_ident, an unset
+    NUM_PROXIES does not trust the header: clients could otherwise pick a new
+    identity for every attempt by sending their own X-Forwarded-For.
+    """
+    if api_settings.NUM_PROXIES:
+        return BaseThrottle().get_ident(request)
+    return request.META.get('REMOTE_ADDR')
+
+
+def get_rate(scope, dimension):
+    """
+    Return (limit, window_seconds) for a scope dimension, or None when unlimited.
+    """
+    rate = api_settings.DEFAULT_THROTTLE_RATES.get(f'{scope}.{dimension}')
+    if rate is None:
+        return None
+    return SimpleRateThrottle.parse_rate(None, rate)
+
+
+def normalize_email(email):
+    return email.strip().lower() if isinstance(email, str) else None
+
+
+def check_limits(scope, ip, email=None):
+    """
+    Record one attempt against every configured dimension of a scope.
+
+    Returns the number of seconds to wait when any limit is exceeded, else 0.
+    Usable from views that are not DRF views (e.g. the async endpoints).
+    """
+    email = normalize_email(email)
+    idents = {'ip': ip}
+    if email:
+        idents['email'] = email
+        idents['ip_email'] = f'{ip}|{email}'
+
+    wait = 0
+    for dimension, ident in idents.items():
+        rate = get_rate(scope, dimension)
+        if rate is None or ident is None:
+            continue
+        limit, window = rate
+        wait = max(wait, SlidingWindowLimiter(f'{scope}.{dimension}', limit, window).hit(ident))
+    return wait
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Base DRF throttle that limits one dimension of the view's `throttle_scope`.
+    """
+
+    dimension = None
+
+    def get_ident_value(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        self.wait_seconds = 0
+        scope = getattr(view, 'throttle_scope', None)
+        rate = get_rate(scope, self.dimension) if scope else None
+        if rate is None:
+            return True
+        ident = self.get_ident_value(request)
+        if ident is None:
+            return True
+        limit, window = rate
+        self.wait_seconds = SlidingWindowLimiter(f'{scope}.{self.dimension}', limit, window).hit(ident)
+        return self.wait_seconds == 0
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class IPThrottle(SlidingWindowThrottle):
+    dimension = 'ip'
+
+    def get_ident_value(self, request):
+        return client_ip(request)
+
+
+def request_email(request):
+    data = request.data
+    return normalize_email(data.get('email')) if hasattr(data, 'get') else None
+
+
+class EmailThrottle(SlidingWindowThrottle):
+    dimension = 'email'
+
+    def get_ident_value(self, request):
+        return request_email(request)
+
+
+class IPEmailThrottle(SlidingWindowThrottle):
+    dimension = 'ip_email'
+
+    def get_ident_value(self, request):
+        email = request_email(request)
+        return f'{client_ip(request)}|{email}' if email else None
+
+
+AUTH_THROTTLE_CLASSES = [IPThrottle, EmailThrottle, IPEmailThrottle]
@@ -0,0 +1,118 @@
+"""
+Versioned cache of User rows joined with their Profile.
+
+Every user has a version stamp in the cache; entries are stored under a key
+that includes it, so bumping the stamp from the model signals invalidates the
+user and profile for all workers sharing the cache without deleting keys.
+A process-local cache (LocMemCache) would only see the bumps of its own
+process, so the auth_api.E001 system check rejects one unless
+AUTH_API_USER_CACHE['ALLOW_PROCESS_LOCAL'] declares a single-process server.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from auth_api import instrumentation, routers
+from auth_api.models import User
+
+
+def get_user_cache_setting(name, default):
+    """
+    Read a value from the optional AUTH_API_USER_CACHE settings dict.
+    """
+    return getattr(settings, 'AUTH_API_USER_CACHE', {}).get(name, default)
+
+
+def _cache():
+    return caches[get_user_cache_setting('CACHE_ALIAS', 'default')]
+
+
+def _version_key(pk):
+    return f'auth_api:user_version:{pk}'
+
+
+def _user_key(pk, version):
+    return f'auth_api:user:{pk}:{version}'
+
+
+def get_version(pk):
+    """
+    Return the current version stamp of a user, creating one if it is missing.
+
+    A fresh stamp is time based, so a stamp that was evicted never reuses the
+    key of an older, possibly stale entry.
+    """
+    cache = _cache()
+    version = cache.get(_version_key(pk))
+    if version is None:
+        cache.add(_version_key(pk), time.time_ns(), None)
+        version = cache.get(_version_key(pk))
+    return version
+
+
+def invalidate_user(pk):
+    """
+    Bump the version stamp of a user so that cached copies are no longer used.
+    """
+    cache = _cache()
+    try:
+        cache.incr(_version_key(pk))
+    except ValueError:
+        cache.set(_version_key(pk), time.time_ns(), None)
+
+
+def invalidate_users(pks):
+    """
+    Invalidate several users with a single cache round trip.
+
+    Sets fresh time based stamps instead of incrementing, since caches have no
+    multi-key increment; a fresh stamp is newer than any earlier one.
+    """
+    stamp = time.time_ns()
+    keys = {_version_key(pk): stamp for pk in pks}
+    if keys:
+        _cache().set_many(keys, None)
+
+
+def _load_queryset(pk):
+    return User.objects.select_related('profile').filter(pk=pk)
+
+
+def get_cached_user(pk):
+    """
+    Return the user with its profile joined in, from the cache when possible.
+
+    Returns None when the user does not exist.
+    """
+    key = _user_key(pk, get_version(pk))
+    cache = _cache()
+    user = cache.get(key)
+    if user is None:
+        instrumentation.incr('user_cache_miss')
+        # Never fill the cache from a lagging replica
+        with routers.use_primary():
+            user = _load_queryset(pk).first()
+        if user is not None:
+            cache.set(key, user, get_user_cache_setting('TTL', 300))
+    else:
+        instrumentation.incr('user_cache_hit')
+    return user
+
+
+async def aget_cached_user(pk):
+    """
+    Async variant of get_cached_user, loading misses with the async ORM.
+    """
+    key = _user_key(pk, get_version(pk))
+    cache = _cache()
+    user = cache.get(key)
+    if user is None:
+        instrumentation.incr('user_cache_miss')
+        with routers.use_primary():
+            user = await _load_queryset(pk).afirst()
+        if user is not None:
+            cache.set(key, user, get_user_cache_setting('TTL', 300))
+    else:
+        instrumentation.incr('user_cache_hit')
+    return user
@@ -0,0 +1,209 @@
+"""
+Staff listing and export of users for large tables.
+
+Pages are keyset (cursor) paginated over (email, id), which the unique email
+index serves at any depth, where OFFSET pagination reads and discards every
+row before the page. Totals are estimated: an exact COUNT(*) is only run up to
+AUTH_API_USER_LISTING['EXACT_COUNT_LIMIT'] rows, beyond that the planner's
+table statistics are used, scaled by the share of a sample the filters match
+(so filtered admin pages are not capped at the limit). Exports stream CSV or
+JSON Lines from a server-side cursor (QuerySet.iterator), so memory stays flat
+whatever the table size.
+"""
+import base64
+import csv
+import io
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.http import StreamingHttpResponse
+from django.utils.functional import cached_property
+
+from auth_api.models import Profile, User
+from auth_api.renderers import dumps, loads
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson',
+}
+
+USER_FIELDS = ['id', 'email', 'is_active', 'is_admin', 'created_at', 'last_login']
+PROFILE_FIELDS = ['mobile', 'location']
+FIELDS = USER_FIELDS + PROFILE_FIELDS
+
+
+def get_listing_setting(name, default):
+    """
+    Read a value from the optional AUTH_API_USER_LISTING settings dict.
+    """
+    return getattr(settings, 'AUTH_API_USER_LISTING', {}).get(name, default)
+
+
+def parse_flag(value):
+    if value is None or value == '':
+        return None
+    return value.lower() in ('1', 'true', 'yes')
+
+
+def staff_queryset(params=None):
+    """
+    Users with their profile columns, in (email, id) order, filtered by the
+    optional is_active / is_admin query parameters.
+    """
+    queryset = (
+        User.objects.select_related('profile')
+        .only(*USER_FIELDS, *(f'profile__{name}' for name in PROFILE_FIELDS))
+        .order_by('email', 'id')
+    )
+    for name in ('is_active', 'is_admin'):
+        flag = parse_flag((params or {}).get(name))
+        if flag is not None:
+            queryset = queryset.filter(**{name: flag})
+    return queryset
+
+
+def user_row(user):
+    """
+    The exported columns of a user loaded by staff_queryset().
+    """
+    try:
+        profile = user.profile
+    except Profile.DoesNotExist:
+        profile = None
+    row = {name: getattr(user, name) for name in USER_FIELDS}
+    for name in ('created_at', 'last_login'):
+        row[name] = row[name].isoformat() if row[name] else None
+    row.update({name: getattr(profile, name, None) for name in PROFILE_FIELDS})
+    return row
+
+
+def encode_cursor(user):
+    return base64.urlsafe_b64encode(dumps([user.email, user.pk])).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Return the (email, id) position encoded in a cursor; ValueError when malformed.
+    """
+    try:
+        email, pk = loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except Exception:
+        raise ValueError('Invalid cursor.')
+    if not isinstance(email, str) or not isinstance(pk, int):
+        raise ValueError('Invalid cursor.')
+    return email, pk
+
+
+def keyset_page(queryset, cursor, page_size):
+    """
+    Return the users after `cursor` and the cursor of the next page (None on the last one).
+    """
+    if cursor:
+        email, pk = decode_cursor(cursor)
+        # (email, id) > cursor, written so that the email index serves the range
+        queryset = queryset.filter(email__gte=email).exclude(email=email, id__lte=pk)
+    # One extra row tells whether there is a next page
+    users = list(queryset[:page_size + 1])
+    if len(users) > page_size:
+        return users[:page_size], encode_cursor(users[page_size - 1])
+    return users, None
+
+
+def table_row_estimate(model, using):
+    """
+    The number of rows of a table according to the database statistics.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+        elif connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s',
+                [table],
+            )
+        else:
+            # SQLite keeps no row count; the highest key is one read of the primary key
+            quote_name = connection.ops.quote_name
+            cursor.execute(f'SELECT MAX({quote_name(model._meta.pk.column)}) FROM {quote_name(table)}')
+        row = cursor.fetchone()
+    return int(row[0] or 0) if row else 0
+
+
+def filtered_share(queryset, sample_size):
+    """
+    The share of the first `sample_size` rows of the table, in primary key
+    order, that `queryset` matches. Both queries read at most `sample_size`
+    rows through the primary key index.
+    """
+    model = queryset.model
+    last = list(
+        model._default_manager.using(queryset.db).order_by('pk').values_list('pk', flat=True)[sample_size - 1:sample_size]
+    )
+    if not last:
+        return 1.0
+    return queryset.order_by().filter(pk__lte=last[0]).count() / sample_size
+
+
+def estimated_count(queryset):
+    """
+    Return (count, exact). Counting stops at EXACT_COUNT_LIMIT rows; larger
+    results report the table estimate, scaled for a filtered queryset by the
+    share of a sample of the table it matches (see filtered_share).
+    """
+    limit = get_listing_setting('EXACT_COUNT_LIMIT', 10000)
+    count = queryset.order_by()[:limit].count()
+    if count < limit:
+        return count, True
+    estimate = table_row_estimate(queryset.model, queryset.db)
+    if queryset.query.where:
+        estimate *= filtered_share(queryset, limit)
+    return max(int(estimate), limit), False
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for the admin changelist that never counts past EXACT_COUNT_LIMIT rows.
+    """
+
+    @cached_property
+    def count(self):
+        return estimated_count(self.object_list)[0]
+
+
+def _csv_rows(queryset, chunk_size):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(FIELDS)
+    for index, user in enumerate(queryset.iterator(chunk_size=chunk_size), 1):
+        row = user_row(user)
+        writer.writerow([row[name] for name in FIELDS])
+        if index % chunk_size == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def _jsonl_rows(queryset, chunk_size):
+    lines = []
+    for user in queryset.iterator(chunk_size=chunk_size):
+        lines.append(dumps(user_row(user)))
+        if len(lines) == chunk_size:
+            yield b'\n'.join(lines) + b'\n'
+            lines = []
+    if lines:
+        yield b'\n'.join(lines) + b'\n'
+
+
+def export_response(queryset, fmt, chunk_size=None):
+    """
+    Stream the users as CSV or JSON Lines, one write per chunk of rows.
+    """
+    chunk_size = chunk_size or get_listing_setting('EXPORT_CHUNK_SIZE', 2000)
+    rows = _csv_rows if fmt == 'csv' else _jsonl_rows
+    response = StreamingHttpResponse(rows(queryset, chunk_size), content_type=EXPORT_FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="users.{fmt}"'
+    return response
@@ -1,32 +1,83 @@
+from functools import lru_cache
+
 from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
+from django.template import Context
+from django.template.loader import get_template
 from django.conf import settings
 
-def send_activation_email(recipient_email, activation_url):
-    subject = 'Activate your account on '+settings.SITE_NAME
-    from_email = settings.EMAIL_HOST_USER
-    to = [recipient_email]
+# Email kinds understood by the rendering layer (shared with OutboundEmail.kind)
+ACTIVATION_EMAIL = 'activation'
+RESET_PASSWORD_EMAIL = 'reset_password'
 
-    # Load the HTML template
-    html_content = render_to_string('auth_api/activation_email.html', {'activation_url': activation_url})
+# Subject, templates and the context variable holding the link for every email kind.
+# The plain-text part comes from its own template instead of stripping the HTML body.
+EMAIL_TEMPLATES = {
+    ACTIVATION_EMAIL: {
+        'subject': 'Activate your account on {site_name}',
+        'html_template': 'auth_api/activation_email.html',
+        'text_template': 'auth_api/activation_email.txt',
+        'url_variable': 'activation_url',
+    },
+    RESET_PASSWORD_EMAIL: {
+        'subject': 'Reset Your Password on {site_name}',
+        'html_template': 'auth_api/reset_password_email.html',
+        'text_template': 'auth_api/reset_password_email.txt',
+        'url_variable': 'reset_url',
+    },
+}
 
-    # Create the email body with both HTML and plain text versions
-    text_content = strip_tags(html_content)
-    email = EmailMultiAlternatives(subject, text_content, from_email, to)
-    email.attach_alternative(html_content, "text/html")
-    email.send()
 
-def send_reset_password_email(recipient_email, reset_url):
-    subject = 'Reset Your Password on '+settings.SITE_NAME
+@lru_cache(maxsize=None)
+def get_compiled_template(template_name):
+    """
+    Load and compile a template once per process.
+
+    Returns the engine-level Template so that a single Context can be reused
+    across the renders of a batch.
+    """
+    return get_template(template_name).template
+
+
+def clear_template_cache():
+    """
+    Drop the compiled templates, e.g. after the template files changed.
+    """
+    get_compiled_template.cache_clear()
+
+
+def build_email_batch(kind, recipients, connection=None):
+    """
+    Render one multipart email per (recipient_email, url) pair of the given kind.
+    """
+    spec = EMAIL_TEMPLATES[kind]
+    subject = spec['subject'].format(site_name=settings.SITE_NAME)
     from_email = settings.EMAIL_HOST_USER
-    to = [recipient_email]
+    html_template = get_compiled_template(spec['html_template'])
+    text_template = get_compiled_template(spec['text_template'])
+
+    emails = []
+    context = Context()
+    for recipient_email, url in recipients:
+        with context.push({spec['url_variable']: url}):
+            html_content = html_template.render(context)
+            text_content = text_template.render(context)
+        email = EmailMultiAlternatives(subject, text_content, from_email, [recipient_email], connection=connection)
+        email.attach_alternative(html_content, "text/html")
+        emails.append(email)
+    return emails
+
+
+def build_email(kind, recipient_email, url, connection=None):
+    return build_email_batch(kind, [(recipient_email, url)], connection=connection)[0]
 
-    # Load the HTML template
-    html_content = render_to_string('auth_api/reset_password_email.html', {'reset_url': reset_url})
+def build_activation_email(recipient_email, activation_url, connection=None):
+    return build_email(ACTIVATION_EMAIL, recipient_email, activation_url, connection=connection)
 
-    # Create the email body with both HTML and plain text versions
-    text_content = strip_tags(html_content)
-    email = EmailMultiAlternatives(subject, text_content, from_email, to)
-    email.attach_alternative(html_content, "text/html")
-    email.send()
\ No newline at end of file
+def build_reset_password_email(recipient_email, reset_url, connection=None):
+    return build_email(RESET_PASSWORD_EMAIL, recipient_email, reset_url, connection=connection)
+
+def send_activation_email(recipient_email, activation_url):
+    build_activation_email(recipient_email, activation_url).send()
+
+def send_reset_password_email(recipient_email, reset_url):
+    build_reset_password_email(recipient_email, reset_url).send()
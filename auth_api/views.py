@@ -2,17 +2,31 @@ from django.contrib.auth import authenticate, login, logout
 from auth_api.models import User, Profile
 from django.contrib.auth.tokens import default_token_generator
 from django.urls import reverse
-from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
-from django.utils.encoding import force_bytes, force_str
+from django.utils.http import urlsafe_base64_encode
+from django.utils.encoding import force_bytes
 from rest_framework import status
 from rest_framework.views import APIView
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from auth_api.serializers import UserSerializer, ProfileSerializer
-from django.views.decorators.csrf import ensure_csrf_cookie, csrf_protect
+from django.views.decorators.csrf import ensure_csrf_cookie
 from django.utils.decorators import method_decorator
 from django.conf import settings
-from auth_api.utils import send_activation_email, send_reset_password_email
+from auth_api.outbox import enqueue_activation_email, enqueue_reset_password_email
+from auth_api.bulk_import import import_users, get_import_setting
+from auth_api.hashing import set_user_password, verify_user_password
+from auth_api import auth_status
+from auth_api.throttling import AUTH_THROTTLE_CLASSES
+from auth_api.authentication import AccessTokenAuthentication, csrf_protect_unless_bearer
+from auth_api import access_tokens, verification
+from auth_api import avatars, etags, instrumentation, responses, session_store, user_listing
+from auth_api.models import OutboundEmail
+from django.db import transaction
+from django.db.models import Count
+from django.http import HttpResponse
+import io
+from contextlib import nullcontext
 
 
 
@@ -26,12 +40,12 @@ class GetCSRFToken(APIView):
         Get CSRF token for the user.
         """
         try:
-            return Response({'success': 'CSRF Cookie set Successfully'})
+            return Response(responses.CSRF_COOKIE_SET)
         except Exception as e:
             return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-@method_decorator(csrf_protect, name='dispatch')
+@method_decorator(csrf_protect_unless_bearer, name='dispatch')
 class CheckAuthenticatedView(APIView):
     permission_classes = [AllowAny]
 
@@ -40,17 +54,22 @@ class CheckAuthenticatedView(APIView):
         Check if the user is authenticated.
         """
         try:
-            if request.user.is_authenticated:
-                return Response({'isAuthenticated': True})
+            is_authenticated = request.user.is_authenticated
+            if not isinstance(request.successful_authenticator, AccessTokenAuthentication):
+                auth_status.remember(request, is_authenticated)
+            if is_authenticated:
+                return Response(responses.AUTHENTICATED)
             else:
-                return Response({'isAuthenticated': False})
+                return Response(responses.NOT_AUTHENTICATED)
         except Exception as e:
             return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-@method_decorator(csrf_protect, name='dispatch')
+@method_decorator(csrf_protect_unless_bearer, name='dispatch')
 class RegistrationView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = AUTH_THROTTLE_CLASSES
+    throttle_scope = 'register'
 
     def post(self, request):
         """
@@ -66,15 +85,15 @@ class RegistrationView(APIView):
                 token = default_token_generator.make_token(user)
                 activation_link = reverse('activate', kwargs={'uid': uid, 'token': token})
                 activation_url = f'{settings.SITE_DOMAIN}{activation_link}'
-                send_activation_email(user.email, activation_url)
+                enqueue_activation_email(user.email, activation_url)
 
-                return Response({'detail': 'Registration successful. Please Cheak your email Activation email sent.'}, status=status.HTTP_201_CREATED)
+                return Response(responses.REGISTERED, status=status.HTTP_201_CREATED)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-@method_decorator(csrf_protect, name='dispatch')
+@method_decorator(csrf_protect_unless_bearer, name='dispatch')
 class ActivateView(APIView):
     permission_classes = [AllowAny]
 
@@ -86,61 +105,30 @@ class ActivateView(APIView):
             uid = request.data.get('uid')
             token = request.data.get('token')
             if not uid or not token:
-                return Response({'detail': 'Missing uid or token.'}, status=status.HTTP_400_BAD_REQUEST)
+                return Response(responses.MISSING_UID_OR_TOKEN, status=status.HTTP_400_BAD_REQUEST)
 
-            uid = force_str(urlsafe_base64_decode(uid))
-            user = User.objects.get(pk=uid)
+            user = verification.verify_link(uid, token)
+            if user is None:
+                return Response(responses.INVALID_ACTIVATION_LINK, status=status.HTTP_400_BAD_REQUEST)
 
-            if default_token_generator.check_token(user, token):
-                if user.is_active:
-                    return Response({'detail': 'Account is already activated.'}, status=status.HTTP_200_OK)
-
-                user.is_active = True
-                user.save()
-                return Response({'detail': 'Account activated successfully.'}, status=status.HTTP_200_OK)
-            else:
-                return Response({'detail': 'Invalid activation link.'}, status=status.HTTP_400_BAD_REQUEST)
-        except User.DoesNotExist:
-            return Response({'detail': 'Invalid activation link.'}, status=status.HTTP_400_BAD_REQUEST)
+            if not verification.activate(user):
+                return Response(responses.ALREADY_ACTIVATED, status=status.HTTP_200_OK)
+            return Response(responses.ACTIVATED, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-@method_decorator(csrf_protect, name='dispatch')
-class ActivationConfirm(APIView):
-    permission_classes = [AllowAny]
-
-    def post(self, request):
-        """
-        Confirm user activation.
-        """
-        try:
-            uid = request.data.get('uid')
-            token = request.data.get('token')
-            if not uid or not token:
-                return Response({'detail': 'Missing uid or token.'}, status=status.HTTP_400_BAD_REQUEST)
-
-            uid = force_str(urlsafe_base64_decode(uid))
-            user = User.objects.get(pk=uid)
-
-            if default_token_generator.check_token(user, token):
-                if user.is_active:
-                    return Response({'detail': 'Account is already activated.'}, status=status.HTTP_200_OK)
-
-                user.is_active = True
-                user.save()
-                return Response({'detail': 'Account activated successfully.'}, status=status.HTTP_200_OK)
-            else:
-                return Response({'detail': 'Invalid activation link.'}, status=status.HTTP_400_BAD_REQUEST)
-        except User.DoesNotExist:
-            return Response({'detail': 'Invalid activation link.'}, status=status.HTTP_400_BAD_REQUEST)
-        except Exception as e:
-            return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+class ActivationConfirm(ActivateView):
+    """
+    Confirm user activation (same behaviour as ActivateView).
+    """
 
 
-@method_decorator(csrf_protect, name='dispatch')
+@method_decorator(csrf_protect_unless_bearer, name='dispatch')
 class LoginView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = AUTH_THROTTLE_CLASSES
+    throttle_scope = 'login'
 
     def post(self, request):
         """
@@ -155,11 +143,11 @@ class LoginView(APIView):
             if user is not None:
                 if user.is_active:
                     login(request, user)
-                    return Response({'detail': 'Logged in successfully.'}, status=status.HTTP_200_OK)
+                    return Response(responses.LOGGED_IN, status=status.HTTP_200_OK)
                 else:
-                    return Response({'detail': 'Account is not activated.'}, status=status.HTTP_400_BAD_REQUEST)
+                    return Response(responses.ACCOUNT_NOT_ACTIVATED, status=status.HTTP_400_BAD_REQUEST)
             else:
-                return Response({'detail': 'Email or Password is incorrect.'}, status=status.HTTP_400_BAD_REQUEST)
+                return Response(responses.INVALID_CREDENTIALS, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -174,10 +162,14 @@ class UserDetailView(APIView):
         Get user details.
         """
         try:
+            etag = etags.user_etag(request.user)
+            response = etags.not_modified(request, etag)
+            if response is not None:
+                return response
             serializer = UserSerializer(request.user)
             data = serializer.data
             data['is_staff'] = request.user.is_staff
-            return Response(data)
+            return Response(data, headers={'ETag': etag})
         except Exception as e:
             return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -186,10 +178,17 @@ class UserDetailView(APIView):
         Update user details.
         """
         try:
-            serializer = UserSerializer(request.user, data=request.data, partial=True)
-            if serializer.is_valid():
-                serializer.save()
-                return Response(serializer.data)
+            conditional = 'HTTP_IF_MATCH' in request.META
+            # The If-Match check locks the row until the update is saved
+            with transaction.atomic() if conditional else nullcontext():
+                if conditional:
+                    response = etags.precondition_failed(request, etags.current_user_etag(request.user))
+                    if response is not None:
+                        return response
+                serializer = UserSerializer(request.user, data=request.data, partial=True)
+                if serializer.is_valid():
+                    serializer.save()
+                    return Response(serializer.data, headers={'ETag': etags.user_etag(serializer.instance)})
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -209,12 +208,12 @@ class ChangePasswordView(APIView):
             new_password = request.data.get('new_password')
             user = request.user
 
-            if not user.check_password(old_password):
-                return Response({'detail': 'Invalid old password.'}, status=status.HTTP_400_BAD_REQUEST)
+            if not verify_user_password(user, old_password):
+                return Response(responses.INVALID_OLD_PASSWORD, status=status.HTTP_400_BAD_REQUEST)
 
-            user.set_password(new_password)
+            set_user_password(user, new_password)
             user.save()
-            return Response({'detail': 'Password changed successfully.'}, status=status.HTTP_200_OK)
+            return Response(responses.PASSWORD_CHANGED, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -232,12 +231,12 @@ class DeleteAccountView(APIView):
             user = request.user
             user.delete()
             logout(request)
-            return Response({'detail': 'Account deleted successfully.'}, status=status.HTTP_204_NO_CONTENT)
+            return Response(responses.ACCOUNT_DELETED, status=status.HTTP_204_NO_CONTENT)
         except Exception as e:
             return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-@method_decorator(csrf_protect, name='dispatch')
+@method_decorator(csrf_protect_unless_bearer, name='dispatch')
 class LogoutView(APIView):
     """
     Logout user.
@@ -249,12 +248,12 @@ class LogoutView(APIView):
         """
         try:
             logout(request)
-            return Response({'detail': 'Logged out successfully.'}, status=status.HTTP_200_OK)
+            return Response(responses.LOGGED_OUT, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-@method_decorator(csrf_protect, name='dispatch')
+@method_decorator(csrf_protect_unless_bearer, name='dispatch')
 class ResetPasswordEmailView(APIView):
     """
     View to send a password reset email.
@@ -264,6 +263,8 @@ class ResetPasswordEmailView(APIView):
     """
 
     permission_classes = [AllowAny]
+    throttle_classes = AUTH_THROTTLE_CLASSES
+    throttle_scope = 'reset_password'
 
     def post(self, request):
         """
@@ -272,24 +273,24 @@ class ResetPasswordEmailView(APIView):
         try:
             email = request.data.get('email')
 
-            if not User.objects.filter(email=email).exists():
-                return Response({'detail': 'User with this email does not exist.'}, status=status.HTTP_400_BAD_REQUEST)
-
-            user = User.objects.get(email=email)
+            # One lookup on the primary: the token is derived from the password hash
+            user = User.objects.get_by_email(email)
+            if user is None:
+                return Response(responses.UNKNOWN_EMAIL, status=status.HTTP_400_BAD_REQUEST)
 
             # Generate password reset token
             uid = urlsafe_base64_encode(force_bytes(user.pk))
             token = default_token_generator.make_token(user)
             reset_link = reverse('reset_password', kwargs={'uid': uid, 'token': token})
             reset_url = f'{settings.SITE_DOMAIN}{reset_link}'
-            send_reset_password_email(user.email, reset_url)
+            enqueue_reset_password_email(user.email, reset_url)
 
-            return Response({'detail': 'Password reset email sent successfully.'}, status=status.HTTP_200_OK)
+            return Response(responses.RESET_EMAIL_SENT, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-@method_decorator(csrf_protect, name='dispatch')
+@method_decorator(csrf_protect_unless_bearer, name='dispatch')
 class ResetPasswordView(APIView):
     """
     Placeholder view for the password reset link.
@@ -298,7 +299,7 @@ class ResetPasswordView(APIView):
     permission_classes = [AllowAny]
 
 
-@method_decorator(csrf_protect, name='dispatch')
+@method_decorator(csrf_protect_unless_bearer, name='dispatch')
 class ResetPasswordConfirmView(APIView):
     """
     View to confirm a password reset.
@@ -316,28 +317,26 @@ class ResetPasswordConfirmView(APIView):
             uid = request.data.get('uid')
             token = request.data.get('token')
             if not uid or not token:
-                return Response({'detail': 'Missing uid or token.'}, status=status.HTTP_400_BAD_REQUEST)
-
-            uid = force_str(urlsafe_base64_decode(uid))
-            user = User.objects.get(pk=uid)
+                return Response(responses.MISSING_UID_OR_TOKEN, status=status.HTTP_400_BAD_REQUEST)
 
-            if default_token_generator.check_token(user, token):
-                new_password = request.data.get('new_password')
+            new_password = request.data.get('new_password')
+            if not new_password:
+                return Response(responses.NEW_PASSWORD_REQUIRED, status=status.HTTP_400_BAD_REQUEST)
 
-                if not new_password:
-                    return Response({'detail': 'New password is required.'}, status=status.HTTP_400_BAD_REQUEST)
+            user = verification.verify_link(uid, token)
+            if user is None:
+                return Response(responses.INVALID_RESET_LINK, status=status.HTTP_400_BAD_REQUEST)
 
-                user.set_password(new_password)
-                user.save()
-                return Response({'detail': 'Password reset successful.'}, status=status.HTTP_200_OK)
-            else:
-                return Response({'detail': 'Invalid reset password link.'}, status=status.HTTP_400_BAD_REQUEST)
-        except User.DoesNotExist:
-            return Response({'detail': 'Invalid reset password link.'}, status=status.HTTP_400_BAD_REQUEST)
+            set_user_password(user, new_password)
+            user.save()
+            return Response(responses.PASSWORD_RESET, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 
-@method_decorator(csrf_protect, name='dispatch')
+@method_decorator(avatars.avatar_upload_handler, name='dispatch')
+@method_decorator(csrf_protect_unless_bearer, name='dispatch')
 class ProfileView(APIView):
     """
     View to handle profile creation, retrieval, update, and deletion.
@@ -351,17 +350,23 @@ class ProfileView(APIView):
         Retrieve the profile of the authenticated user.
         """
         try:
-            profile = Profile.objects.get(user=request.user)
-            serializer = ProfileSerializer(profile)
-            return Response(serializer.data)
+            profile = request.user.profile
+            etag = etags.profile_etag(profile)
+            response = etags.not_modified(request, etag)
+            if response is not None:
+                return response
+            serializer = ProfileSerializer(profile, context={'request': request})
+            return Response(serializer.data, headers={'ETag': etag})
         except Profile.DoesNotExist:
-            return Response({'detail': 'Profile does not exist.'}, status=status.HTTP_404_NOT_FOUND)
+            return Response(responses.PROFILE_DOES_NOT_EXIST, status=status.HTTP_404_NOT_FOUND)
 
     def post(self, request):
         """
         Create a new profile for the authenticated user.
         """
         try:
+            if avatars.upload_too_large(request):
+                return Response(responses.AVATAR_TOO_LARGE, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
             serializer = ProfileSerializer(data=request.data, context={'request': request})
             if serializer.is_valid():
                 serializer.save()
@@ -375,14 +380,23 @@ class ProfileView(APIView):
         Update the profile of the authenticated user.
         """
         try:
-            profile = Profile.objects.get(user=request.user)
-            serializer = ProfileSerializer(profile, data=request.data)
-            if serializer.is_valid():
-                serializer.save()
-                return Response(serializer.data)
+            if avatars.upload_too_large(request):
+                return Response(responses.AVATAR_TOO_LARGE, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+            profile = request.user.profile
+            conditional = 'HTTP_IF_MATCH' in request.META
+            # The If-Match check locks the row until the update is saved
+            with transaction.atomic() if conditional else nullcontext():
+                if conditional:
+                    response = etags.precondition_failed(request, etags.current_profile_etag(profile))
+                    if response is not None:
+                        return response
+                serializer = ProfileSerializer(profile, data=request.data, context={'request': request})
+                if serializer.is_valid():
+                    serializer.save()
+                    return Response(serializer.data, headers={'ETag': etags.profile_etag(serializer.instance)})
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         except Profile.DoesNotExist:
-            return Response({'detail': 'Profile does not exist.'}, status=status.HTTP_404_NOT_FOUND)
+            return Response(responses.PROFILE_DOES_NOT_EXIST, status=status.HTTP_404_NOT_FOUND)
         
 
     def delete(self, request):
@@ -390,9 +404,230 @@ class ProfileView(APIView):
         Delete the profile of the authenticated user.
         """
         try:
-            profile = Profile.objects.get(user=request.user)
+            profile = request.user.profile
             profile.delete()
-            return Response({'detail': 'Profile deleted successfully.'}, status=status.HTTP_204_NO_CONTENT)
+            return Response(responses.PROFILE_DELETED, status=status.HTTP_204_NO_CONTENT)
         except Profile.DoesNotExist:
-            return Response({'detail': 'Profile does not exist.'}, status=status.HTTP_404_NOT_FOUND)
-        
+            return Response(responses.PROFILE_DOES_NOT_EXIST, status=status.HTTP_404_NOT_FOUND)
+
+
+@method_decorator(csrf_protect_unless_bearer, name='dispatch')
+class BulkUserImportView(APIView):
+    """
+    Bulk import users from an uploaded CSV or JSON Lines file.
+
+    Admin only. Expects a multipart POST with the file in `file`; the format is
+    taken from the `type` query parameter or the file extension (`format` is
+    DRF's format suffix override). Rows are streamed from the upload,
+    validated and inserted in chunks.
+    """
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        """
+        Import the uploaded users and return the import report.
+        """
+        try:
+            upload = request.FILES.get('file')
+            if upload is None:
+                return Response(responses.NO_FILE_UPLOADED, status=status.HTTP_400_BAD_REQUEST)
+
+            fmt = request.query_params.get('type')
+            if fmt is None:
+                fmt = 'csv' if upload.name.endswith('.csv') else 'jsonl'
+            if fmt not in ('csv', 'jsonl'):
+                return Response(responses.INVALID_IMPORT_FORMAT, status=status.HTTP_400_BAD_REQUEST)
+
+            stream = io.TextIOWrapper(upload.file, encoding='utf-8', newline='')
+            report = import_users(
+                stream,
+                fmt,
+                workers=get_import_setting('REQUEST_HASH_WORKERS', 0),
+                default_active=request.query_params.get('is_active', 'true').lower() != 'false',
+            )
+            return Response(report.as_dict(), status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class StaffUserListView(APIView):
+    """
+    List users for staff, one keyset page at a time.
+
+    Admin only. Query parameters: `cursor` (the `next` value of the previous
+    page), `page_size`, and the `is_active` / `is_admin` filters. `count` is
+    exact up to AUTH_API_USER_LISTING['EXACT_COUNT_LIMIT'] and an estimate
+    beyond (see `count_is_exact`).
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """
+        Return a page of users in (email, id) order.
+        """
+        try:
+            try:
+                page_size = int(request.query_params.get('page_size') or user_listing.get_listing_setting('PAGE_SIZE', 100))
+            except ValueError:
+                page_size = user_listing.get_listing_setting('PAGE_SIZE', 100)
+            page_size = max(1, min(page_size, user_listing.get_listing_setting('MAX_PAGE_SIZE', 1000)))
+
+            queryset = user_listing.staff_queryset(request.query_params)
+            try:
+                users, cursor = user_listing.keyset_page(queryset, request.query_params.get('cursor'), page_size)
+            except ValueError:
+                return Response(responses.INVALID_CURSOR, status=status.HTTP_400_BAD_REQUEST)
+
+            count, exact = user_listing.estimated_count(queryset)
+            next_url = None
+            if cursor is not None:
+                params = request.query_params.copy()
+                params['cursor'] = cursor
+                next_url = request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
+            return Response({
+                'count': count,
+                'count_is_exact': exact,
+                'next': next_url,
+                'results': [user_listing.user_row(user) for user in users],
+            }, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class StaffUserExportView(APIView):
+    """
+    Stream every user matching the `is_active` / `is_admin` filters as CSV or JSON Lines.
+
+    Admin only. The format comes from the `type` query parameter (default csv);
+    `format` is DRF's format suffix override.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """
+        Return a streaming attachment with the users.
+        """
+        try:
+            fmt = request.query_params.get('type', 'csv')
+            if fmt not in user_listing.EXPORT_FORMATS:
+                return Response(responses.INVALID_IMPORT_FORMAT, status=status.HTTP_400_BAD_REQUEST)
+            return user_listing.export_response(user_listing.staff_queryset(request.query_params), fmt)
+        except Exception as e:
+            return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class TokenObtainView(APIView):
+    """
+    Issue an access/refresh token pair for the given credentials.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    throttle_classes = AUTH_THROTTLE_CLASSES
+    throttle_scope = 'login'
+
+    def post(self, request):
+        """
+        Handle token login.
+        """
+        try:
+            email = request.data.get('email')
+            password = request.data.get('password')
+
+            user = authenticate(request, email=email, password=password)
+
+            if user is None:
+                return Response(responses.INVALID_CREDENTIALS, status=status.HTTP_400_BAD_REQUEST)
+            if not user.is_active:
+                return Response(responses.ACCOUNT_NOT_ACTIVATED, status=status.HTTP_400_BAD_REQUEST)
+            return Response(access_tokens.issue_token_pair(user), status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class TokenRefreshView(APIView):
+    """
+    Exchange a refresh token for a new token pair.
+
+    Refresh tokens are single use: the presented token is revoked, and it stops
+    working anyway once the password of the user changes.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def post(self, request):
+        """
+        Rotate the refresh token.
+        """
+        try:
+            try:
+                claims = access_tokens.decode_token(request.data.get('refresh'), access_tokens.REFRESH)
+            except access_tokens.TokenError as e:
+                return Response({'detail': str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+
+            # Revoke before issuing: of concurrent refreshes with one token, only
+            # the one that created the revocation gets a new pair
+            if not access_tokens.revoke(claims):
+                return Response(responses.TOKEN_NO_LONGER_VALID, status=status.HTTP_401_UNAUTHORIZED)
+
+            user = User.objects.filter(pk=claims['sub'], is_active=True).only('id', 'password').first()
+            if user is None or claims.get('pwd') != access_tokens.password_fingerprint(user):
+                return Response(responses.TOKEN_NO_LONGER_VALID, status=status.HTTP_401_UNAUTHORIZED)
+
+            return Response(access_tokens.issue_token_pair(user), status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class TokenRevokeView(APIView):
+    """
+    Revoke a refresh token, and the access token used to authenticate, if any.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = [AccessTokenAuthentication]
+
+    def post(self, request):
+        """
+        Handle token logout.
+        """
+        try:
+            try:
+                claims = access_tokens.decode_token(request.data.get('refresh'), access_tokens.REFRESH)
+            except access_tokens.TokenError as e:
+                return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            access_tokens.revoke(claims)
+            if request.auth is not None:
+                access_tokens.revoke(request.auth)
+            return Response(responses.TOKEN_REVOKED, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class MetricsView(APIView):
+    """
+    Expose request histograms and subsystem counters in the Prometheus text format.
+
+    Admin only. Request histograms are filled by InstrumentationMiddleware
+    (see AUTH_API_INSTRUMENTATION); the session, link verification and outbox
+    numbers are always available.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """
+        Render the metrics of this process.
+        """
+        lines = instrumentation.registry.render()
+        lines += instrumentation.render_counters(
+            'auth_api_session_operations_total', 'Session cache and database operations.',
+            session_store.metrics.snapshot(),
+        )
+        lines += instrumentation.render_counters(
+            'auth_api_link_verifications_total', 'Activation and reset link verifications by outcome.',
+            verification.metrics.snapshot(), label='outcome',
+        )
+        outbox = dict(OutboundEmail.objects.values_list('status').annotate(Count('id')).order_by())
+        lines += ['# HELP auth_api_outbox_emails Queued emails by status.', '# TYPE auth_api_outbox_emails gauge']
+        lines += [f'auth_api_outbox_emails{{status="{status_}"}} {outbox.get(status_, 0)}' for status_, _ in OutboundEmail.STATUS_CHOICES]
+        return HttpResponse('\n'.join(lines) + '\n', content_type='text/plain; version=0.0.4; charset=utf-8')
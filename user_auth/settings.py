@@ -45,9 +45,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'auth_api.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'auth_api.routers.PrimaryPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'auth_api.auth_status.AuthStatusMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -81,27 +84,74 @@ AUTH_USER_MODEL = 'auth_api.User'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# SQLite for development and single-node deployments: the auth_api backend
+# takes the write lock with BEGIN IMMEDIATE, AUTH_API_SQLITE sets WAL and the
+# other pragmas on every connection (see auth_api.sqlite)
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'auth_api.db_backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'TRANSACTION_MODE': 'IMMEDIATE',
+        'CONN_MAX_AGE': 60,
     }
 }
+AUTH_API_SQLITE = {
+    'ENABLED': True,
+    'PRAGMAS': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,            # ms a writer waits for the lock
+        'mmap_size': 128 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+    },
+}
 
-# For MySQL Database Config
-# DATABASES = {
-#     'default': {
-#         'ENGINE': 'django.db.backends.mysql',
-#         'NAME': os.environ.get('DB_NAME'),
-#         'USER': os.environ.get('DB_USER'),
-#         'PASSWORD': os.environ.get('DB_PASS'),
-#         'HOST':'127.0.0.1',
-#         'PORT':'3306',
-#         'OPTIONS':{
-#             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'"
-#         }
-#     }
-# }
+# Production database profile: set DB_ENGINE to mysql or postgresql and the
+# DB_* variables. Connections persist for DB_CONN_MAX_AGE seconds and are
+# health-checked before reuse; with DB_POOL=1 threads instead share a bounded
+# per-process pool (auth_api.db_pool). DB_REPLICA_HOSTS (comma separated)
+# adds read replicas 'replica', 'replica2', ... (see auth_api.routers).
+if os.environ.get('DB_ENGINE'):
+    _pooled = os.environ.get('DB_POOL', '') == '1'
+    _engine = os.environ['DB_ENGINE']
+
+    def production_database(host):
+        database = {
+            'ENGINE': f'auth_api.db_backends.{_engine}' if _pooled else f'django.db.backends.{_engine}',
+            'NAME': os.environ.get('DB_NAME'),
+            'USER': os.environ.get('DB_USER'),
+            'PASSWORD': os.environ.get('DB_PASS'),
+            'HOST': host,
+            'PORT': os.environ.get('DB_PORT', ''),
+            # The pool hands connections back at the end of every request
+            'CONN_MAX_AGE': 0 if _pooled else int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'POOL': {
+                'MAX_SIZE': int(os.environ.get('DB_POOL_SIZE', 10)),
+                'TIMEOUT': 5,
+                'MAX_LIFETIME': 1800,
+                'CHECK_AFTER': 30,
+            },
+        }
+        if _engine == 'mysql':
+            database['OPTIONS'] = {'init_command': "SET sql_mode='STRICT_TRANS_TABLES'"}
+        return database
+
+    DATABASES = {'default': production_database(os.environ.get('DB_HOST', '127.0.0.1'))}
+    for _index, _host in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(','))):
+        DATABASES['replica' if _index == 0 else f'replica{_index + 1}'] = dict(
+            production_database(_host.strip()), TEST={'MIRROR': 'default'},
+        )
+
+# Reads go to the replicas unless the request wrote (or the client wrote in the
+# last PIN_SECONDS); PRIMARY_MODELS are always read from the primary
+DATABASE_ROUTERS = ['auth_api.routers.PrimaryReplicaRouter']
+AUTH_API_DB_ROUTING = {
+    'REPLICAS': [alias for alias in DATABASES if alias.startswith('replica')],
+    'PRIMARY_MODELS': ['sessions.Session', 'auth_api.RevokedToken', 'auth_api.OutboundEmail'],
+    'PIN_SECONDS': 5,
+    'PIN_COOKIE': 'db_pin',
+}
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -121,6 +171,45 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing profiles - cost parameters per deployment. Hashes made with
+# other parameters are re-hashed with the active profile on the next login.
+AUTH_API_HASHER_PROFILES = {
+    'pbkdf2': {
+        'HASHER': 'auth_api.hashers.ProfiledPBKDF2PasswordHasher',
+        'PARAMS': {'iterations': 600000},
+    },
+    'argon2': {  # requires argon2-cffi
+        'HASHER': 'auth_api.hashers.ProfiledArgon2PasswordHasher',
+        'PARAMS': {'time_cost': 2, 'memory_cost': 102400, 'parallelism': 8},
+    },
+    'scrypt': {
+        'HASHER': 'auth_api.hashers.ProfiledScryptPasswordHasher',
+        'PARAMS': {'work_factor': 2 ** 14, 'block_size': 8, 'parallelism': 1},
+    },
+}
+AUTH_API_HASHER_PROFILE = os.environ.get('HASHER_PROFILE', 'pbkdf2')
+
+# The active profile hashes new passwords, the others still verify old hashes
+PASSWORD_HASHERS = [AUTH_API_HASHER_PROFILES[AUTH_API_HASHER_PROFILE]['HASHER']] + [
+    profile['HASHER'] for name, profile in AUTH_API_HASHER_PROFILES.items() if name != AUTH_API_HASHER_PROFILE
+]
+
+# Bounded pool that runs password hashing and verification off the request thread
+AUTH_API_HASHING = {
+    'POOL': 'thread',        # 'thread' or 'process'
+    'MAX_WORKERS': None,     # None = one per CPU
+    'MAX_PENDING': None,     # queued hashes beyond the workers, None = 4 per worker
+    'QUEUE_TIMEOUT': 10,     # seconds to wait for a free slot before failing
+}
+
+AUTHENTICATION_BACKENDS = [
+    'auth_api.backends.EmailBackend',
+]
+
+# Serve login, check-authenticated, user-detail, logout and profile GET with the
+# async views on the regular /api/ URLs (they are always available under /api/async/)
+AUTH_API_ASYNC_VIEWS = os.environ.get('AUTH_API_ASYNC_VIEWS', '') == '1'
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
@@ -144,7 +233,29 @@ if DEBUG:
     STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 else:
     STATIC_ROOT = os.path.join(BASE_DIR, 'static')
-MEDIA_ROOT = [os.path.join(BASE_DIR, 'media')]
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# OpenAPI schema served at /api/swagger.json|.yaml. `manage.py generate_schema`
+# writes it to ARTIFACT_DIR at build time; without that file it is generated
+# on the first request and cached in CACHE_DIR until the API code changes.
+# Responses carry an ETag and are cacheable for MAX_AGE seconds.
+AUTH_API_SCHEMA = {
+    'ARTIFACT_DIR': BASE_DIR / 'schema',
+    'CACHE_DIR': BASE_DIR / 'var' / 'schema',
+    'MAX_AGE': 86400,
+}
+
+# Avatar uploads: size cap in bytes, square thumbnail sizes in pixels. SYNC
+# renders thumbnails in the request (tests), otherwise on WORKERS threads.
+AUTH_API_AVATARS = {
+    'MAX_UPLOAD_SIZE': 5 * 1024 * 1024,
+    'MAX_PIXELS': 40_000_000,
+    'SIZES': {'small': 64, 'medium': 256, 'large': 512},
+    'FORMATS': ('webp', 'jpeg'),
+    'QUALITY': 82,
+    'WORKERS': 2,
+    'SYNC': False,
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
@@ -167,14 +278,31 @@ EMAIL_HOST_USER = os.environ.get('EMAIL_USER')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_PASS')
 EMAIL_USE_TLS = True
 
+# Outbound email queue - views only enqueue, `manage.py process_email_queue` delivers
+AUTH_API_EMAIL_OUTBOX = {
+    'BATCH_SIZE': 50,            # messages sent over one SMTP connection
+    'MAX_ATTEMPTS': 5,           # give up (status=failed) after this many tries
+    'RETRY_BASE_SECONDS': 30,    # backoff doubles after every failed attempt
+    'RETRY_MAX_SECONDS': 3600,
+    'STALE_SENDING_SECONDS': 600,
+}
+
+# Bulk user import (`manage.py import_users` and /api/auth-api/users/import/)
+AUTH_API_BULK_IMPORT = {
+    'CHUNK_SIZE': 1000,          # rows validated and inserted per transaction
+    'HASH_WORKERS': None,        # password hashing processes, None = one per CPU
+    'REQUEST_HASH_WORKERS': 0,   # the API endpoint hashes in the request process
+}
+
 # Frontend/Backend Site Domain for Password Reset Link and Account Activation Link
 # If using ReactJS VueJS NextJS NuxtJS then you can replace with frontend domain
 SITE_DOMAIN = "http://localhost:8000"
 SITE_NAME = "Local Host"
 
 REST_FRAMEWORK = {
-    # Enable Session Authentication for App
+    # Enable Bearer access tokens and Session Authentication for App
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'auth_api.authentication.AccessTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     # Enable IsAuthenticated Permission
@@ -182,8 +310,112 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ),
     # Disable Browsable API and Render JSON
-    #'DEFAULT_RENDERER_CLASSES':('rest_framework.renderers.JSONRenderer',),
+    # orjson backed JSON in and out; the first renderer is used without parsing Accept
+    'DEFAULT_RENDERER_CLASSES': ['auth_api.renderers.FastJSONRenderer'],
+    'DEFAULT_PARSER_CLASSES': [
+        'auth_api.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'DEFAULT_CONTENT_NEGOTIATION_CLASS': 'auth_api.renderers.FirstRendererNegotiation',
+    # Trusted proxies in front of the app; the throttles read the client address
+    # they appended to X-Forwarded-For. 0 keys on REMOTE_ADDR and ignores the header
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', '0')),
+    # Sliding-window limits per endpoint scope and key (ip, email, ip_email),
+    # checked by auth_api.throttling before any password is hashed
+    'DEFAULT_THROTTLE_RATES': {
+        'login.ip': '30/min',
+        'login.email': '10/min',
+        'login.ip_email': '5/min',
+        'register.ip': '10/hour',
+        'reset_password.ip': '10/hour',
+        'reset_password.email': '3/hour',
+    },
+}
+
+# Per-view timings and query counts, served at /api/auth-api/metrics/.
+# The middleware removes itself when ENABLED is off.
+AUTH_API_INSTRUMENTATION = {
+    'ENABLED': os.environ.get('AUTH_API_INSTRUMENTATION', '0') == '1',
+    'SERVER_TIMING': os.environ.get('AUTH_API_SERVER_TIMING', '0') == '1',
+}
+
+# Stateless access/refresh tokens (seconds). SIGNING_KEY defaults to SECRET_KEY;
+# revocations from other workers are picked up every DENYLIST_REFRESH_SECONDS
+AUTH_API_TOKENS = {
+    'ACCESS_TTL': 300,
+    'REFRESH_TTL': 7 * 24 * 3600,
+    'SIGNING_KEY': os.environ.get('TOKEN_SIGNING_KEY'),
+    'DENYLIST_REFRESH_SECONDS': 5,
+    'DENYLIST_SYNC_OVERLAP_SECONDS': 60,   # re-read window for late-committed revocations
+}
+
+# Cache holding the throttle counters; use a shared cache when running several nodes
+AUTH_API_THROTTLING = {
+    'CACHE_ALIAS': 'default',
+}
+
+# Cache used by the auth-status short-circuit and the user cache. Set REDIS_URL
+# to share it between worker processes; the local memory default is only
+# consistent for a single process (runserver, tests).
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'auth-api',
+        }
+    }
+
+# Cached answer for GET /api/auth-api/check-authenticated/ (AuthStatusMiddleware)
+AUTH_API_AUTH_STATUS = {
+    'MODE': 'cache',             # 'cache' or 'signed_cookie'
+    'CACHE_ALIAS': 'default',
+    'TTL': 300,                  # seconds a recorded status is trusted
+    'COOKIE_NAME': 'auth_status',
+    'SHORT_CIRCUIT': True,       # answer from the middleware before the view runs
+    'ALLOW_PROCESS_LOCAL': DEBUG or os.environ.get('AUTH_API_SINGLE_PROCESS', '') == '1',
+}
+
+# Versioned cache of User + Profile used to resolve the session user. It must
+# be shared by every worker (system check auth_api.E001) unless the server runs
+# a single process.
+AUTH_API_USER_CACHE = {
+    'CACHE_ALIAS': 'default',
+    'TTL': 300,
+    'ALLOW_PROCESS_LOCAL': DEBUG or os.environ.get('AUTH_API_SINGLE_PROCESS', '') == '1',
 }
 
 # Sessionid Expire default is 1209600 sec = 14 days
-SESSION_COOKIE_AGE = 1800   # 30 Min
\ No newline at end of file
+SESSION_COOKIE_AGE = 1800   # 30 Min
+
+# Write-behind cached_db sessions: reads come from the cache, django_session is
+# written only when session data changes or the sliding expiry moved more than
+# EXPIRY_REFRESH_SECONDS. Run `manage.py sweep_sessions` to purge expired rows.
+SESSION_ENGINE = 'auth_api.session_store'
+SESSION_CACHE_ALIAS = 'default'
+SESSION_SAVE_EVERY_REQUEST = True   # sliding expiry, made cheap by the engine above
+AUTH_API_SESSIONS = {
+    'EXPIRY_REFRESH_SECONDS': 300,
+    'SWEEP_BATCH_SIZE': 1000,
+}
+
+# `manage.py purge_unactivated` deletes accounts never activated after MAX_AGE_DAYS
+AUTH_API_PURGE = {
+    'MAX_AGE_DAYS': 7,
+    'BATCH_SIZE': 1000,          # users deleted per transaction
+}
+
+# Staff user listing (/api/auth-api/users/) and streaming export (users/export/)
+AUTH_API_USER_LISTING = {
+    'PAGE_SIZE': 100,
+    'MAX_PAGE_SIZE': 1000,
+    'EXACT_COUNT_LIMIT': 10000,  # COUNT(*) stops here, larger totals are estimated
+    'EXPORT_CHUNK_SIZE': 2000,   # rows fetched per server-side cursor round trip
+}
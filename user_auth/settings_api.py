@@ -0,0 +1,41 @@
+"""
+API-only runtime profile.
+
+Same as user_auth.settings, minus the admin, messages, staticfiles and drf_yasg
+apps, their middleware and URLs, so that autoscaled API workers start faster:
+
+    DJANGO_SETTINGS_MODULE=user_auth.settings_api gunicorn user_auth.wsgi
+
+Use the full settings for the admin, the Swagger UI and collectstatic.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import INSTALLED_APPS, MIDDLEWARE
+
+SLIM_REMOVED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'drf_yasg',
+]
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in SLIM_REMOVED_APPS]
+
+MIDDLEWARE = [
+    middleware for middleware in MIDDLEWARE
+    if middleware not in (
+        'django.contrib.messages.middleware.MessageMiddleware',
+        'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    )
+]
+
+ROOT_URLCONF = 'user_auth.urls_api'
+
+# The API renders no pages; the engine is only used by the email outbox worker
+# (`manage.py process_email_queue`), without any context processors
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [],
+        'APP_DIRS': True,
+    },
+]
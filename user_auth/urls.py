@@ -14,6 +14,8 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path,include
 
@@ -21,4 +23,9 @@ from django.urls import path,include
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('auth_api.urls')),
+    path('api/async/', include('auth_api.async_urls')),
 ]
+
+# Development only; in production serve MEDIA_ROOT from the web server. Avatar
+# file names are content hashes, so they can be cached as immutable.
+urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
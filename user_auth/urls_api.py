@@ -0,0 +1,12 @@
+"""
+URL configuration of the API-only runtime profile (user_auth.settings_api).
+
+Only the API endpoints: no admin, Swagger UI/schema or media files.
+"""
+from django.urls import path, include
+
+
+urlpatterns = [
+    path('api/', include('auth_api.api_urls')),
+    path('api/async/', include('auth_api.async_urls')),
+]